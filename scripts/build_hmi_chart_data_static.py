@@ -5,16 +5,34 @@ Requires a region config file (copy assets/data/region_config.example.json).
 """
 from __future__ import annotations
 
+import argparse
+import concurrent.futures
 import csv
 import datetime as dt
 import gzip
+import hashlib
 import io
+import itertools
 import json
+import operator
+import os
 import pathlib
+import shutil
 import sys
-import urllib.request
+import threading
+import time
 from collections import defaultdict
-from typing import Dict, Iterable, List, Tuple
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+import columnar_sidecar
+import fetch_pool
+import ghcn_station_catalog
+import gzip_seek_index
+import http_cache
+import modis_pixels
+import quickstats_rollup
+import stage_graph
+import station_index
 
 ROOT = pathlib.Path(__file__).resolve().parents[1]
 ASSETS_DIR = ROOT / "assets" / "data"
@@ -22,9 +40,38 @@ CONFIG_PATH = ASSETS_DIR / "region_config.json"
 
 OUTPUT_QUICKSTATS = ASSETS_DIR / "quickstats_irrigation.csv"
 OUTPUT_QUICKSTATS_STATE = ASSETS_DIR / "quickstats_irrigation_state_summary.csv"
+OUTPUT_QUICKSTATS_ROLLUPS = [ASSETS_DIR / quickstats_rollup.output_name(name) for name in quickstats_rollup.GROUPINGS]
 OUTPUT_GHCN_DAILY = ASSETS_DIR / "ghcn_daily_summary.csv"
 OUTPUT_MODIS_NDVI = ASSETS_DIR / "modis_ndvi_timeseries.csv"
+MANIFEST_PATH = ASSETS_DIR / "chart_build_manifest.json"
+MANIFEST_VERSION = 1
 GHCN_STATIONS_URL = "https://www.ncei.noaa.gov/pub/data/ghcn/daily/ghcnd-stations.txt"
+GHCN_INVENTORY_URL = "https://www.ncei.noaa.gov/pub/data/ghcn/daily/ghcnd-inventory.txt"
+HTTP_CACHE_DIR = ASSETS_DIR / ".http_cache"
+GHCN_SEEK_LINEAR_BYTES = 64 << 10
+MODIS_API = "https://modis.ornl.gov/rst/api/v1"
+# ORNL subset requests accept at most 10 composite dates.
+MODIS_WINDOW_DATES = 10
+MODIS_FIELDS = [
+    "site_id",
+    "site_name",
+    "date",
+    "value",
+    "band",
+    "product",
+    "modis_date",
+    "value_median",
+    "value_p10",
+    "value_p90",
+    "valid_fraction",
+    "pixel_count",
+]
+
+FETCH_POOL = fetch_pool.FetchPool()
+HTTP_CACHE = http_cache.HttpCache(HTTP_CACHE_DIR, client=FETCH_POOL)
+STATION_CATALOG: Optional[ghcn_station_catalog.StationCatalog] = None
+# Stages run on threads and share one manifest dict; every write (and stage record read) holds this.
+MANIFEST_LOCK = threading.Lock()
 
 
 def die(msg: str) -> None:
@@ -41,113 +88,510 @@ def load_config() -> Dict:
         return json.load(fh)
 
 
+def config_hash(payload: object) -> str:
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def load_manifest() -> Dict:
+    try:
+        manifest = json.loads(MANIFEST_PATH.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        manifest = {}
+    if manifest.get("version") != MANIFEST_VERSION:
+        manifest = {"version": MANIFEST_VERSION}
+    manifest["last_run"] = {}
+    return manifest
+
+
+def save_manifest(manifest: Dict) -> None:
+    manifest["updated_at"] = dt.datetime.now(dt.timezone.utc).isoformat(timespec="seconds")
+    MANIFEST_PATH.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = MANIFEST_PATH.with_name(MANIFEST_PATH.name + ".tmp")
+    tmp_path.write_text(json.dumps(manifest, indent=2, sort_keys=True), encoding="utf-8")
+    os.replace(tmp_path, MANIFEST_PATH)
+
+
+def summarize_changes(manifest: Dict) -> List[str]:
+    lines = []
+    for source, change in sorted(manifest.get("last_run", {}).items()):
+        if "added" in change:
+            changed = {key: count for key, count in change["added"].items() if count}
+            lines.append(
+                f"{source}: +{sum(changed.values())} rows across {len(changed)} of {len(change['added'])} "
+                f"{change.get('unit', 'keys')} ({change.get('mode', 'full')})"
+            )
+        else:
+            lines.append(f"{source}: {change.get('status')} ({change.get('rows', 0)} rows)")
+    return lines
+
+
+def configure_http(cfg: Dict) -> None:
+    global FETCH_POOL, HTTP_CACHE
+    http_cfg = cfg.get("http", {})
+    FETCH_POOL = fetch_pool.FetchPool(
+        workers=int(http_cfg.get("workers") or 8),
+        per_host=int(http_cfg.get("per_host") or 4),
+        retries=int(http_cfg.get("retries") if http_cfg.get("retries") is not None else 4),
+        backoff_seconds=float(http_cfg.get("backoff_seconds") or 0.5),
+        timeout=int(http_cfg.get("timeout") or 60),
+    )
+    cache_cfg = cfg.get("http_cache", {})
+    root = pathlib.Path(cache_cfg["dir"]) if cache_cfg.get("dir") else HTTP_CACHE_DIR
+    max_bytes = int(float(cache_cfg.get("max_mb") or 0) * (1 << 20)) or http_cache.DEFAULT_MAX_BYTES
+    HTTP_CACHE = http_cache.HttpCache(root, max_bytes=max_bytes, client=FETCH_POOL)
+
+
 def download(url: str, dest: pathlib.Path) -> pathlib.Path:
     dest.parent.mkdir(parents=True, exist_ok=True)
-    if dest.exists():
+    try:
+        cached = HTTP_CACHE.fetch(url)
+    except OSError as exc:
+        if not dest.exists():
+            raise
+        print(f"Revalidation failed for {url} ({exc}); using existing {dest.name}", file=sys.stderr)
         return dest
-    req = urllib.request.Request(url, headers={"User-Agent": "ClarkSoft-HMI-Static-Builder"})
-    with urllib.request.urlopen(req, timeout=60) as resp:
-        data = resp.read()
-    dest.write_bytes(data)
+    cached_stat = cached.stat()
+    if dest.exists():
+        dest_stat = dest.stat()
+        if dest_stat.st_size == cached_stat.st_size and dest_stat.st_mtime_ns == cached_stat.st_mtime_ns:
+            return dest
+    # Hard links (or mtime-preserving copies) keep dest stable while the cached body is unchanged.
+    tmp_path = dest.with_name(dest.name + ".tmp")
+    try:
+        tmp_path.unlink()
+    except OSError:
+        pass
+    try:
+        os.link(cached, tmp_path)
+    except OSError:
+        shutil.copy2(cached, tmp_path)
+    os.replace(tmp_path, dest)
     return dest
 
 
+QUICKSTATS_FIELDS: List[Tuple[str, str]] = [
+    ("state_alpha", "STATE_ALPHA"),
+    ("state_name", "STATE_NAME"),
+    ("county_name", "COUNTY_NAME"),
+    ("agg_level", "AGG_LEVEL_DESC"),
+    ("year", "YEAR"),
+    ("value", "VALUE"),
+    ("unit", "UNIT_DESC"),
+    ("short_desc", "SHORT_DESC"),
+    ("commodity", "COMMODITY_DESC"),
+    ("statistic", "STATISTICCAT_DESC"),
+]
+QUICKSTATS_SUPPRESSED = frozenset(("", "(D)", "(Z)"))
+QUICKSTATS_READ_BUFFER = 1 << 20
+
+
+def open_quickstats(path: pathlib.Path) -> TextIO:
+    raw = gzip.open(path, "rb")
+    return io.TextIOWrapper(
+        io.BufferedReader(raw, QUICKSTATS_READ_BUFFER), encoding="utf-8", errors="replace", newline=""
+    )
+
+
 def iter_quickstats_rows(path: pathlib.Path) -> Iterable[Dict[str, str]]:
-    with gzip.open(path, "rt", encoding="utf-8", errors="replace") as fh:
+    with open_quickstats(path) as fh:
         reader = csv.DictReader(fh, delimiter="\t")
         for row in reader:
             yield row
 
 
-def quickstats_match(row: Dict[str, str], cfg: Dict) -> bool:
-    states = set(state.upper() for state in cfg.get("states", []))
-    if states and row.get("STATE_ALPHA", "").upper() not in states:
-        return False
-    agg_levels = set(level.upper() for level in cfg.get("agg_level_desc", []))
-    if agg_levels and row.get("AGG_LEVEL_DESC", "").upper() not in agg_levels:
-        return False
-    unit_filters = [item.upper() for item in cfg.get("unit_desc_contains", [])]
-    if unit_filters:
-        unit = row.get("UNIT_DESC", "").upper()
-        if not any(token in unit for token in unit_filters):
-            return False
-    short_filters = [item.upper() for item in cfg.get("short_desc_contains", [])]
-    if short_filters:
-        short_desc = row.get("SHORT_DESC", "").upper()
-        if not any(token in short_desc for token in short_filters):
-            return False
-    value = row.get("VALUE", "").strip()
-    if value in ("", "(D)", "(Z)"):
-        return False
-    return True
+class QuickStatsMatcher:
+    """Region filters compiled once, then bound to the TSV header positions."""
 
+    def __init__(self, quick_cfg: Dict, states: Iterable[str]) -> None:
+        self.states = frozenset(state.upper() for state in states)
+        self.agg_levels = frozenset(level.upper() for level in quick_cfg.get("agg_level_desc", []))
+        self.unit_filters = tuple(item.upper() for item in quick_cfg.get("unit_desc_contains", []))
+        self.short_filters = tuple(item.upper() for item in quick_cfg.get("short_desc_contains", []))
+
+    def bind(self, header: List[str]) -> Callable[[List[str]], Optional[Tuple[str, ...]]]:
+        index = {name.strip().upper(): pos for pos, name in enumerate(header)}
+        required = [source for _, source in QUICKSTATS_FIELDS]
+        missing = [name for name in required if name not in index]
+        if missing:
+            die(f"QuickStats header is missing columns: {', '.join(missing)}")
+        state_pos = index["STATE_ALPHA"]
+        agg_pos = index["AGG_LEVEL_DESC"]
+        unit_pos = index["UNIT_DESC"]
+        short_pos = index["SHORT_DESC"]
+        value_pos = index["VALUE"]
+        width = max(index[name] for name in required) + 1
+        pick = operator.itemgetter(*(index[source] for _, source in QUICKSTATS_FIELDS))
+        states = self.states
+        agg_levels = self.agg_levels
+        unit_filters = self.unit_filters
+        short_filters = self.short_filters
+
+        def project(row: List[str]) -> Optional[Tuple[str, ...]]:
+            if len(row) < width:
+                return None
+            if states and row[state_pos].upper() not in states:
+                return None
+            if agg_levels and row[agg_pos].upper() not in agg_levels:
+                return None
+            if unit_filters:
+                unit = row[unit_pos].upper()
+                if not any(token in unit for token in unit_filters):
+                    return None
+            if short_filters:
+                short_desc = row[short_pos].upper()
+                if not any(token in short_desc for token in short_filters):
+                    return None
+            if row[value_pos].strip() in QUICKSTATS_SUPPRESSED:
+                return None
+            return pick(row)
+
+        return project
 
-def build_quickstats(cfg: Dict) -> None:
-    quick_cfg = cfg.get("quickstats", {})
-    url = quick_cfg.get("dataset_url")
-    if not url:
-        die("Missing quickstats.dataset_url in region_config.json")
-    dest = ASSETS_DIR / pathlib.Path(url).name
-    download(url, dest)
 
+def parse_quickstats_value(value: str) -> Optional[float]:
+    try:
+        return float(value.replace(",", ""))
+    except ValueError:
+        return None
+
+
+def log_throughput(label: str, scanned: int, matched: int, elapsed: float) -> None:
+    rate = scanned / elapsed if elapsed > 0 else 0.0
+    print(f"{label}: scanned {scanned} rows, kept {matched} in {elapsed:.1f}s ({rate:,.0f} rows/sec)")
+
+
+def scan_quickstats(
+    source: pathlib.Path, quick_cfg: Dict, states: List[str]
+) -> Tuple[Dict[str, float], int, quickstats_rollup.RollupCube]:
+    matcher = QuickStatsMatcher(quick_cfg, states)
     max_rows = int(quick_cfg.get("max_rows") or 0)
-    output_rows = []
-    for idx, row in enumerate(iter_quickstats_rows(dest)):
-        if max_rows and idx >= max_rows:
+    names = [name for name, _ in QUICKSTATS_FIELDS]
+    state_pos = names.index("state_alpha")
+    value_pos = names.index("value")
+    state_totals: Dict[str, float] = defaultdict(float)
+    cube = quickstats_rollup.RollupCube(names)
+    scanned = 0
+    matched = 0
+    started = time.perf_counter()
+
+    OUTPUT_QUICKSTATS.parent.mkdir(parents=True, exist_ok=True)
+    with open_quickstats(source) as src, OUTPUT_QUICKSTATS.open("w", encoding="utf-8", newline="") as out:
+        reader = csv.reader(src, delimiter="\t")
+        header = next(reader, None)
+        if header is None:
+            die(f"QuickStats source is empty: {source}")
+        project = matcher.bind(header)
+        writer = csv.writer(out)
+        writer.writerow(names)
+        for row in itertools.islice(reader, max_rows or None):
+            scanned += 1
+            record = project(row)
+            if record is None:
+                continue
+            matched += 1
+            writer.writerow(record)
+            value = parse_quickstats_value(record[value_pos])
+            if value is not None:
+                state_totals[record[state_pos]] += value
+            cube.add(record, value)
+
+    log_throughput("QuickStats", scanned, matched, time.perf_counter() - started)
+    return state_totals, matched, cube
+
+
+def _quickstats_filters(quick_cfg: Dict, states: List[str]) -> Dict:
+    return {
+        "states": sorted(state.upper() for state in states),
+        "agg_level_desc": quick_cfg.get("agg_level_desc", []),
+        "unit_desc_contains": quick_cfg.get("unit_desc_contains", []),
+        "short_desc_contains": quick_cfg.get("short_desc_contains", []),
+        "max_rows": int(quick_cfg.get("max_rows") or 0),
+        # Output layout: a change rebuilds CSVs and discards checkpoint parts written with the old one.
+        "fields": [name for name, _ in QUICKSTATS_FIELDS],
+        "rollup_levels": quickstats_rollup.GROUPING_LEVELS,
+    }
+
+
+def _quickstats_scan_key(quick_cfg: Dict, states: List[str], index: Dict) -> str:
+    return config_hash(
+        {**_quickstats_filters(quick_cfg, states), "source": index["source"], "chunk_rows": index["chunk_rows"]}
+    )
+
+
+def scan_quickstats_checkpoint(task: Dict) -> Dict:
+    header = next(csv.reader([task["header"]], delimiter="\t"))
+    project = QuickStatsMatcher(task["quick_cfg"], task["states"]).bind(header)
+    names = [name for name, _ in QUICKSTATS_FIELDS]
+    state_pos = names.index("state_alpha")
+    value_pos = names.index("value")
+    state_totals: Dict[str, float] = defaultdict(float)
+    cube = quickstats_rollup.RollupCube(names)
+    scanned = 0
+    matched = 0
+
+    part_path = pathlib.Path(task["part_path"])
+    tmp_path = part_path.with_name(part_path.name + ".tmp")
+    lines = gzip_seek_index.iter_checkpoint_lines(pathlib.Path(task["chunks_path"]), task["checkpoint"])
+    with tmp_path.open("w", encoding="utf-8", newline="") as out:
+        writer = csv.writer(out)
+        for row in itertools.islice(csv.reader(lines, delimiter="\t"), task["limit"] or None):
+            scanned += 1
+            record = project(row)
+            if record is None:
+                continue
+            matched += 1
+            writer.writerow(record)
+            value = parse_quickstats_value(record[value_pos])
+            if value is not None:
+                state_totals[record[state_pos]] += value
+            cube.add(record, value)
+    os.replace(tmp_path, part_path)
+
+    stats = {"scanned": scanned, "matched": matched, "state_totals": state_totals, "rollups": cube.to_state()}
+    # The stats file marks the checkpoint as done, so it is written last.
+    done_path = part_path.with_suffix(".json")
+    done_path.with_name(done_path.name + ".tmp").write_text(json.dumps(stats), encoding="utf-8")
+    os.replace(done_path.with_name(done_path.name + ".tmp"), done_path)
+    return stats
+
+
+def scan_quickstats_parallel(
+    source: pathlib.Path, quick_cfg: Dict, states: List[str], workers: int
+) -> Tuple[Dict[str, float], int, quickstats_rollup.RollupCube]:
+    chunk_rows = int(quick_cfg.get("index_chunk_rows") or gzip_seek_index.DEFAULT_CHUNK_ROWS)
+    started = time.perf_counter()
+    index = gzip_seek_index.ensure_index(source, chunk_rows, int(quick_cfg.get("max_rows") or 0))
+    indexed = time.perf_counter()
+    print(f"QuickStats seek index: {len(index['checkpoints'])} checkpoints ({indexed - started:.1f}s)")
+
+    parts_dir = OUTPUT_QUICKSTATS.with_name(OUTPUT_QUICKSTATS.name + ".parts")
+    scan_key = _quickstats_scan_key(quick_cfg, states, index)
+    key_path = parts_dir / "scan_key.txt"
+    if parts_dir.exists() and (not key_path.exists() or key_path.read_text(encoding="utf-8") != scan_key):
+        shutil.rmtree(parts_dir)
+    parts_dir.mkdir(parents=True, exist_ok=True)
+    key_path.write_text(scan_key, encoding="utf-8")
+
+    max_rows = int(quick_cfg.get("max_rows") or 0)
+    part_paths = []
+    tasks = []
+    resumed = 0
+    for number, checkpoint in enumerate(index["checkpoints"]):
+        if max_rows and checkpoint["first_row"] >= max_rows:
             break
-        if not quickstats_match(row, quick_cfg | {"states": cfg.get("states", [])}):
+        part_path = parts_dir / f"part_{number:05d}.csv"
+        part_paths.append(part_path)
+        if part_path.with_suffix(".json").exists():
+            resumed += 1
             continue
-        output_rows.append(
+        tasks.append(
             {
-                "state_alpha": row.get("STATE_ALPHA", ""),
-                "state_name": row.get("STATE_NAME", ""),
-                "county_name": row.get("COUNTY_NAME", ""),
-                "year": row.get("YEAR", ""),
-                "value": row.get("VALUE", ""),
-                "unit": row.get("UNIT_DESC", ""),
-                "short_desc": row.get("SHORT_DESC", ""),
-                "commodity": row.get("COMMODITY_DESC", ""),
-                "statistic": row.get("STATISTICCAT_DESC", ""),
+                "chunks_path": index["chunks_path"],
+                "checkpoint": checkpoint,
+                "header": index["header"],
+                "quick_cfg": quick_cfg,
+                "states": states,
+                "part_path": str(part_path),
+                "limit": max_rows - checkpoint["first_row"] if max_rows else 0,
             }
         )
+    if resumed:
+        print(f"QuickStats: resuming after {resumed} finished checkpoints")
+
+    scanned = 0
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+        for stats in pool.map(scan_quickstats_checkpoint, tasks):
+            scanned += stats["scanned"]
 
+    state_totals: Dict[str, float] = defaultdict(float)
+    cube = quickstats_rollup.RollupCube([name for name, _ in QUICKSTATS_FIELDS])
+    matched = 0
     OUTPUT_QUICKSTATS.parent.mkdir(parents=True, exist_ok=True)
-    with OUTPUT_QUICKSTATS.open("w", encoding="utf-8", newline="") as fh:
-        writer = csv.DictWriter(fh, fieldnames=list(output_rows[0].keys()) if output_rows else [])
-        if output_rows:
-            writer.writeheader()
-            writer.writerows(output_rows)
-
-    # State-level aggregation for quick charting.
-    state_totals = defaultdict(float)
-    for row in output_rows:
-        try:
-            value = float(str(row["value"]).replace(",", ""))
-        except ValueError:
-            continue
-        state_totals[row["state_alpha"]] += value
+    with OUTPUT_QUICKSTATS.open("w", encoding="utf-8", newline="") as out:
+        csv.writer(out).writerow([name for name, _ in QUICKSTATS_FIELDS])
+        for part_path in part_paths:
+            stats = json.loads(part_path.with_suffix(".json").read_text(encoding="utf-8"))
+            matched += stats["matched"]
+            for state, total in stats["state_totals"].items():
+                state_totals[state] += total
+            cube.merge_state(stats["rollups"])
+            with part_path.open("r", encoding="utf-8", newline="") as part:
+                shutil.copyfileobj(part, out)
+    shutil.rmtree(parts_dir)
 
+    log_throughput(f"QuickStats ({workers} workers)", scanned, matched, time.perf_counter() - indexed)
+    return state_totals, matched, cube
+
+
+def write_quickstats_state_summary(state_totals: Dict[str, float]) -> None:
     with OUTPUT_QUICKSTATS_STATE.open("w", encoding="utf-8", newline="") as fh:
         writer = csv.writer(fh)
         writer.writerow(["state_alpha", "total_value"])
         for state, total in sorted(state_totals.items()):
             writer.writerow([state, round(total, 3)])
 
+
+def build_quickstats(cfg: Dict, manifest: Dict, incremental: bool = False) -> None:
+    quick_cfg = cfg.get("quickstats", {})
+    url = quick_cfg.get("dataset_url")
+    if not url:
+        die("Missing quickstats.dataset_url in region_config.json")
+    dest = ASSETS_DIR / pathlib.Path(url).name
+    fetch_stats = FETCH_POOL.snapshot()
+    download(url, dest)
+    print(FETCH_POOL.report("QuickStats fetch", fetch_stats))
+
+    cached = HTTP_CACHE.cached_path(url)
+    source_sha256 = cached.name if cached is not None else None
+    filters_hash = config_hash(_quickstats_filters(quick_cfg, cfg.get("states", [])))
+    previous = manifest.get("quickstats", {})
+    unchanged = (
+        incremental
+        and source_sha256 is not None
+        and previous.get("source_sha256") == source_sha256
+        and previous.get("filters_hash") == filters_hash
+        and OUTPUT_QUICKSTATS.exists()
+        and OUTPUT_QUICKSTATS_STATE.exists()
+        and all(path.exists() for path in OUTPUT_QUICKSTATS_ROLLUPS)
+    )
+    if unchanged:
+        print("QuickStats: source and filters unchanged; keeping existing CSVs")
+        with MANIFEST_LOCK:
+            manifest["last_run"]["quickstats"] = {"status": "unchanged", "rows": previous.get("rows", 0)}
+    else:
+        # Matching rows stream straight to the CSV; only the state totals and rollup cells stay in memory.
+        workers = int(quick_cfg.get("workers") or 1)
+        if workers > 1 and quick_cfg.get("delete_source_after"):
+            # The seek index is removed with the source, so every parallel run would re-index the whole dump.
+            print("QuickStats: delete_source_after is set; scanning serially instead of re-indexing for workers")
+            workers = 1
+        if workers > 1:
+            state_totals, matched, cube = scan_quickstats_parallel(dest, quick_cfg, cfg.get("states", []), workers)
+        else:
+            state_totals, matched, cube = scan_quickstats(dest, quick_cfg, cfg.get("states", []))
+        write_quickstats_state_summary(state_totals)
+        cube.write(ASSETS_DIR)
+        with MANIFEST_LOCK:
+            manifest["quickstats"] = {
+                "source_url": url,
+                "source_sha256": source_sha256,
+                "filters_hash": filters_hash,
+                "rows": matched,
+                "states": len(state_totals),
+            }
+            manifest["last_run"]["quickstats"] = {"status": "rebuilt", "rows": matched}
+
     if quick_cfg.get("delete_source_after"):
         try:
             dest.unlink()
         except OSError:
             pass
+        gzip_seek_index.remove_index(dest)
 
 
-def fetch_json(url: str) -> Dict:
-    req = urllib.request.Request(url, headers={"Accept": "application/json", "User-Agent": "ClarkSoft-HMI-Static-Builder"})
-    with urllib.request.urlopen(req, timeout=60) as resp:
-        payload = resp.read().decode("utf-8")
+def fetch_json(url: str, max_age: float = 0) -> Dict:
+    payload = HTTP_CACHE.fetch(url, headers={"Accept": "application/json"}, max_age=max_age).read_text(encoding="utf-8")
     return json.loads(payload)
 
 
-def build_modis_ndvi(cfg: Dict) -> None:
+def fetch_modis_dates(site: Dict, product: str, dates_override: List, ttl_seconds: float) -> Optional[List[Dict[str, str]]]:
+    dates = []
+    if dates_override:
+        for item in dates_override:
+            if isinstance(item, str):
+                dates.append({"modis_date": item, "calendar_date": item})
+        return dates
+    lat = site.get("lat")
+    lon = site.get("lon")
+    try:
+        dates_resp = fetch_json(f"{MODIS_API}/{product}/dates?latitude={lat}&longitude={lon}", max_age=ttl_seconds)
+    except Exception as exc:
+        print(f"MODIS dates fetch failed for {site.get('id', 'site')}: {exc}", file=sys.stderr)
+        return None
+    for item in dates_resp.get("dates", []):
+        if isinstance(item, str):
+            dates.append({"modis_date": item, "calendar_date": item})
+            continue
+        if isinstance(item, dict):
+            modis_date = item.get("modis_date")
+            calendar_date = item.get("calendar_date") or modis_date
+            if modis_date:
+                dates.append({"modis_date": modis_date, "calendar_date": calendar_date})
+    return dates
+
+
+def plan_modis_windows(dates: List[Dict[str, str]], stored: set, window_size: int) -> List[List[Dict[str, str]]]:
+    # Runs of consecutive missing dates, split so each /subset call stays within the API limit.
+    windows = []
+    run: List[Dict[str, str]] = []
+    for item in dates:
+        if item["modis_date"] in stored:
+            if run:
+                windows.append(run)
+                run = []
+            continue
+        run.append(item)
+        if len(run) == window_size:
+            windows.append(run)
+            run = []
+    if run:
+        windows.append(run)
+    return windows
+
+
+def fetch_modis_window(
+    site: Dict, window: List[Dict[str, str]], product: str, band_name: str, km_radius: float, pixel_cfg: Dict
+) -> List[Dict]:
+    lat = site.get("lat")
+    lon = site.get("lon")
+    wanted = {item["modis_date"] for item in window}
+    subset_url = (
+        f"{MODIS_API}/{product}/subset"
+        f"?latitude={lat}&longitude={lon}&startDate={window[0]['modis_date']}&endDate={window[-1]['modis_date']}"
+        f"&kmAboveBelow={km_radius}&kmLeftRight={km_radius}"
+    )
+    try:
+        subset = fetch_json(subset_url)
+    except Exception as exc:
+        print(f"MODIS subset fetch failed for {site.get('id', 'site')}: {exc}", file=sys.stderr)
+        return []
+    records = [
+        record
+        for record in subset.get("subset", [])
+        if str(record.get("band", "")) == band_name and record.get("modis_date") in wanted
+    ]
+    rows = []
+    for record, stats in zip(records, modis_pixels.aggregate_records(subset, records, **pixel_cfg)):
+        rows.append(
+            {
+                "site_id": site.get("id", ""),
+                "site_name": site.get("name", ""),
+                "date": record.get("calendar_date", ""),
+                "band": band_name,
+                "product": product,
+                "modis_date": record.get("modis_date", ""),
+                **stats,
+            }
+        )
+    return rows
+
+
+def load_modis_rows(product: str, band_name: str) -> Dict[str, List[Dict[str, str]]]:
+    stored: Dict[str, List[Dict[str, str]]] = defaultdict(list)
+    if not OUTPUT_MODIS_NDVI.exists():
+        return stored
+    with OUTPUT_MODIS_NDVI.open("r", encoding="utf-8", newline="") as fh:
+        for row in csv.DictReader(fh):
+            if row.get("product") != product or row.get("band") != band_name:
+                continue
+            # Rows from older builds hold raw pixel lists in value; refetch those dates.
+            if "valid_fraction" not in row:
+                continue
+            stored[row.get("site_id", "")].append(row)
+    return stored
+
+
+def build_modis_ndvi(cfg: Dict, manifest: Dict, incremental: bool = False) -> None:
     modis_cfg = cfg.get("modis", {})
     if not modis_cfg:
         return
@@ -157,17 +601,25 @@ def build_modis_ndvi(cfg: Dict) -> None:
     sites = modis_cfg.get("sites", [])
     if districts:
         sites = districts
+    sites = [site for site in sites if site.get("lat") is not None and site.get("lon") is not None]
     if not sites:
         print("MODIS sites not provided; writing empty NDVI CSV.", file=sys.stderr)
         write_empty_modis()
         return
-    dates_limit = int(modis_cfg.get("dates_limit") or 10)
-    dates_limit = min(10, max(1, dates_limit))
+    # 0 keeps every available date; the API limit now only bounds each /subset window.
+    dates_limit = max(0, int(modis_cfg.get("dates_limit") if modis_cfg.get("dates_limit") is not None else 10))
+    window_size = min(MODIS_WINDOW_DATES, max(1, int(modis_cfg.get("window_dates") or MODIS_WINDOW_DATES)))
+    dates_ttl = float(modis_cfg.get("dates_ttl_hours") if modis_cfg.get("dates_ttl_hours") is not None else 24) * 3600
     dates_override = modis_cfg.get("dates_override", [])
     km_radius = float(modis_cfg.get("km_radius") or 0)
+    pixel_cfg = {
+        "fill_value": float(modis_cfg.get("fill_value", modis_pixels.DEFAULT_FILL_VALUE)),
+        "valid_range": tuple(float(item) for item in modis_cfg.get("valid_range", modis_pixels.DEFAULT_VALID_RANGE)),
+        "pixel_window": int(modis_cfg.get("pixel_window") or 0),
+    }
 
     try:
-        bands = fetch_json(f"https://modis.ornl.gov/rst/api/v1/{product}/bands")
+        bands = fetch_json(f"{MODIS_API}/{product}/bands", max_age=dates_ttl)
     except Exception as exc:
         print(f"MODIS bands fetch failed: {exc}", file=sys.stderr)
         write_empty_modis()
@@ -181,72 +633,56 @@ def build_modis_ndvi(cfg: Dict) -> None:
     if not band_name:
         die(f"No MODIS band found containing '{band_contains}'.")
 
+    fetch_stats = FETCH_POOL.snapshot()
+    stored_rows = load_modis_rows(product, band_name) if incremental else {}
+    site_dates = FETCH_POOL.map(lambda site: fetch_modis_dates(site, product, dates_override, dates_ttl), sites)
+
     rows = []
-    for site in sites:
-        lat = site.get("lat")
-        lon = site.get("lon")
-        if lat is None or lon is None:
-            continue
-        dates = []
-        if dates_override:
-            for item in dates_override:
-                if isinstance(item, str):
-                    dates.append({"modis_date": item, "calendar_date": item})
-        else:
-            try:
-                dates_resp = fetch_json(
-                    f"https://modis.ornl.gov/rst/api/v1/{product}/dates?latitude={lat}&longitude={lon}"
-                )
-            except Exception as exc:
-                print(f"MODIS dates fetch failed for {site.get('id', 'site')}: {exc}", file=sys.stderr)
-                continue
-            dates_raw = dates_resp.get("dates", [])
-            for item in dates_raw:
-                if isinstance(item, str):
-                    dates.append({"modis_date": item, "calendar_date": item})
-                    continue
-                if isinstance(item, dict):
-                    modis_date = item.get("modis_date")
-                    calendar_date = item.get("calendar_date") or modis_date
-                    if modis_date:
-                        dates.append({"modis_date": modis_date, "calendar_date": calendar_date})
-        dates = [d for d in dates if isinstance(d, dict) and d.get("modis_date")]
-        if not dates:
-            continue
-        dates = dates[-dates_limit:]
-        start_date = dates[0]["modis_date"]
-        end_date = dates[-1]["modis_date"]
-        subset_url = (
-            f"https://modis.ornl.gov/rst/api/v1/{product}/subset"
-            f"?latitude={lat}&longitude={lon}&startDate={start_date}&endDate={end_date}"
-            f"&kmAboveBelow={km_radius}&kmLeftRight={km_radius}"
-        )
-        try:
-            subset = fetch_json(subset_url)
-        except Exception as exc:
-            print(f"MODIS subset fetch failed for {site.get('id', 'site')}: {exc}", file=sys.stderr)
+    tasks = []
+    reused = 0
+    added_by_site = {site.get("id", ""): 0 for site in sites}
+    for site, dates in zip(sites, site_dates):
+        existing = stored_rows.get(site.get("id", ""), [])
+        if dates is None:
+            # Keep what we already have when the date listing is unavailable.
+            rows.extend(existing)
             continue
-        for record in subset.get("subset", []):
-            if str(record.get("band", "")) != band_name:
-                continue
-            calendar_date = record.get("calendar_date", "")
-            rows.append(
-                {
-                    "site_id": site.get("id", ""),
-                    "site_name": site.get("name", ""),
-                    "date": calendar_date,
-                    "value": record.get("data", ""),
-                    "band": band_name,
-                    "product": product,
-                    "modis_date": record.get("modis_date", ""),
-                }
-            )
+        if dates_limit:
+            dates = dates[-dates_limit:]
+        planned = {item["modis_date"] for item in dates}
+        kept = [row for row in existing if row.get("modis_date") in planned]
+        rows.extend(kept)
+        reused += len(kept)
+        for window in plan_modis_windows(dates, {row["modis_date"] for row in kept}, window_size):
+            tasks.append((site, window))
+
+    for window_rows in FETCH_POOL.map(
+        lambda task: fetch_modis_window(task[0], task[1], product, band_name, km_radius, pixel_cfg), tasks
+    ):
+        rows.extend(window_rows)
+        for row in window_rows:
+            added_by_site[row["site_id"]] += 1
+    print(f"MODIS plan: {len(sites)} sites, {len(tasks)} subset windows, {reused} stored rows reused")
+    print(FETCH_POOL.report("MODIS fetch", fetch_stats))
+
+    site_order = {site.get("id", ""): pos for pos, site in enumerate(sites)}
+    rows.sort(key=lambda row: (site_order.get(row.get("site_id", ""), len(site_order)), row.get("modis_date", "")))
+    site_marks: Dict[str, Dict] = {}
+    for row in rows:
+        mark = site_marks.setdefault(row.get("site_id", ""), {"rows": 0})
+        mark["rows"] += 1
+        mark["last_modis_date"] = row.get("modis_date", "")
+    with MANIFEST_LOCK:
+        manifest["modis"] = {"product": product, "band": band_name, "sites": site_marks}
+        manifest["last_run"]["modis"] = {
+            "mode": "incremental" if incremental else "full",
+            "unit": "sites",
+            "added": added_by_site,
+        }
 
     OUTPUT_MODIS_NDVI.parent.mkdir(parents=True, exist_ok=True)
     with OUTPUT_MODIS_NDVI.open("w", encoding="utf-8", newline="") as fh:
-        writer = csv.DictWriter(
-            fh, fieldnames=["site_id", "site_name", "date", "value", "band", "product", "modis_date"]
-        )
+        writer = csv.DictWriter(fh, fieldnames=MODIS_FIELDS)
         writer.writeheader()
         writer.writerows(rows)
 
@@ -254,13 +690,78 @@ def build_modis_ndvi(cfg: Dict) -> None:
 def write_empty_modis() -> None:
     OUTPUT_MODIS_NDVI.parent.mkdir(parents=True, exist_ok=True)
     with OUTPUT_MODIS_NDVI.open("w", encoding="utf-8", newline="") as fh:
-        writer = csv.DictWriter(
-            fh, fieldnames=["site_id", "site_name", "date", "value", "band", "product", "modis_date"]
-        )
+        writer = csv.DictWriter(fh, fieldnames=MODIS_FIELDS)
         writer.writeheader()
 
 
-def build_ghcn_daily(cfg: Dict) -> None:
+def _ghcn_line_date(line: bytes, date_pos: int) -> str:
+    fields = next(csv.reader([line.decode("utf-8", errors="replace")]), [])
+    return fields[date_pos] if len(fields) > date_pos else ""
+
+
+def _seek_ghcn_start(fh, header_end: int, date_pos: int, start_key: str) -> int:
+    # Station files are date-ordered, so bisect byte offsets to the first line near start_key.
+    lo = header_end
+    hi = fh.seek(0, io.SEEK_END)
+    while hi - lo > GHCN_SEEK_LINEAR_BYTES:
+        mid = (lo + hi) // 2
+        fh.seek(mid)
+        skipped = fh.readline()
+        line = fh.readline()
+        if not line:
+            hi = mid
+            continue
+        if _ghcn_line_date(line, date_pos) < start_key:
+            lo = mid + len(skipped)
+        else:
+            hi = mid
+    return lo
+
+
+def iter_ghcn_window(path: pathlib.Path, start: dt.date, end: dt.date) -> Iterator[Tuple[str, str, str, str]]:
+    start_key = start.isoformat()
+    end_key = end.isoformat()
+    with path.open("rb") as fh:
+        header_line = fh.readline()
+        header = next(csv.reader([header_line.decode("utf-8", errors="replace")]), [])
+        index = {name.strip().upper(): pos for pos, name in enumerate(header)}
+        date_pos = index.get("DATE")
+        if date_pos is None:
+            return
+        value_pos = [index.get(name) for name in ("PRCP", "TMAX", "TMIN")]
+        fh.seek(_seek_ghcn_start(fh, len(header_line), date_pos, start_key))
+        text = io.TextIOWrapper(fh, encoding="utf-8", errors="replace", newline="")
+        for row in csv.reader(text):
+            if len(row) <= date_pos:
+                continue
+            day = row[date_pos]
+            # ISO dates order as strings; only parse dates that decide the window.
+            if day < start_key:
+                continue
+            try:
+                dt.date.fromisoformat(day)
+            except ValueError:
+                continue
+            if day > end_key:
+                break
+            yield (day, *(row[pos] if pos is not None and pos < len(row) else "" for pos in value_pos))
+
+
+def ghcn_station_url(station: str) -> str:
+    return f"https://www.ncei.noaa.gov/data/global-historical-climatology-network-daily/access/{station}.csv"
+
+
+def load_ghcn_rows() -> Dict[str, List[Dict[str, str]]]:
+    stored: Dict[str, List[Dict[str, str]]] = defaultdict(list)
+    if not OUTPUT_GHCN_DAILY.exists():
+        return stored
+    with OUTPUT_GHCN_DAILY.open("r", encoding="utf-8", newline="") as fh:
+        for row in csv.DictReader(fh):
+            stored[row.get("station", "")].append(row)
+    return stored
+
+
+def build_ghcn_daily(cfg: Dict, manifest: Dict, incremental: bool = False) -> None:
     ghcn_cfg = cfg.get("ghcn", {})
     stations = ghcn_cfg.get("stations", [])
     auto_select = bool(ghcn_cfg.get("auto_select_from_sites"))
@@ -280,31 +781,49 @@ def build_ghcn_daily(cfg: Dict) -> None:
     start = dt.date.fromisoformat(start_date)
     end = dt.date.fromisoformat(end_date)
 
+    previous = manifest.get("ghcn", {})
+    window = [start.isoformat(), end.isoformat()]
+    # Watermarks only apply while the configured window is unchanged.
+    marks = previous.get("stations", {}) if incremental and previous.get("window") == window else {}
+    stored = load_ghcn_rows() if marks else {}
+
+    def fetch_station(station: str) -> Tuple[List[Dict[str, str]], Dict, int]:
+        path = HTTP_CACHE.fetch(ghcn_station_url(station))
+        source_sha256 = path.name
+        mark = marks.get(station)
+        existing = stored.get(station, [])
+        if mark and existing and len(existing) == mark.get("rows") and mark.get("source_sha256") == source_sha256:
+            return existing, mark, 0
+        # A changed file can revise past days (late reports, QC flags), so the whole window is
+        # re-read; "added" counts the rows that are new or differ from the stored ones.
+        state = station_meta.get(station, {}).get("state", "")
+        station_rows = [
+            {"station": station, "state": state, "date": day, "prcp": prcp, "tmax": tmax, "tmin": tmin}
+            for day, prcp, tmax, tmin in iter_ghcn_window(path, start, end)
+        ]
+        previous_rows = {row["date"]: row for row in existing}
+        changed = sum(1 for row in station_rows if previous_rows.get(row["date"]) != row)
+        mark = {"source_sha256": source_sha256, "rows": len(station_rows)}
+        if station_rows:
+            mark["last_date"] = station_rows[-1]["date"]
+        return station_rows, mark, changed
+
+    fetch_stats = FETCH_POOL.snapshot()
     rows = []
-    for station in stations:
-        url = f"https://www.ncei.noaa.gov/data/global-historical-climatology-network-daily/access/{station}.csv"
-        req = urllib.request.Request(url, headers={"User-Agent": "ClarkSoft-HMI-Static-Builder"})
-        with urllib.request.urlopen(req, timeout=60) as resp:
-            text = resp.read().decode("utf-8", errors="replace")
-        reader = csv.DictReader(io.StringIO(text))
-        for row in reader:
-            try:
-                day = dt.date.fromisoformat(row.get("DATE", ""))
-            except ValueError:
-                continue
-            if day < start or day > end:
-                continue
-            meta = station_meta.get(station, {})
-            rows.append(
-                {
-                    "station": station,
-                    "state": meta.get("state", ""),
-                    "date": row.get("DATE", ""),
-                    "prcp": row.get("PRCP", ""),
-                    "tmax": row.get("TMAX", ""),
-                    "tmin": row.get("TMIN", ""),
-                }
-            )
+    new_marks = {}
+    added_by_station = {}
+    for station, (station_rows, mark, added) in zip(stations, FETCH_POOL.map(fetch_station, stations)):
+        rows.extend(station_rows)
+        new_marks[station] = mark
+        added_by_station[station] = added
+    print(FETCH_POOL.report("GHCN fetch", fetch_stats))
+    with MANIFEST_LOCK:
+        manifest["ghcn"] = {"window": window, "stations": new_marks}
+        manifest["last_run"]["ghcn"] = {
+            "mode": "incremental" if marks else "full",
+            "unit": "stations",
+            "added": added_by_station,
+        }
 
     OUTPUT_GHCN_DAILY.parent.mkdir(parents=True, exist_ok=True)
     with OUTPUT_GHCN_DAILY.open("w", encoding="utf-8", newline="") as fh:
@@ -313,44 +832,41 @@ def build_ghcn_daily(cfg: Dict) -> None:
         writer.writerows(rows)
 
 
+def load_station_catalog() -> ghcn_station_catalog.StationCatalog:
+    global STATION_CATALOG
+    if STATION_CATALOG is None:
+        source = HTTP_CACHE.fetch(GHCN_STATIONS_URL)
+        # Cached bodies are content-addressed, so the file name is the source sha256.
+        STATION_CATALOG = ghcn_station_catalog.StationCatalog.open(
+            ASSETS_DIR, source.name
+        ) or ghcn_station_catalog.StationCatalog.build(ASSETS_DIR, source, source.name)
+    return STATION_CATALOG
+
+
 def parse_ghcn_stations(states: List[str]) -> List[Dict[str, str]]:
-    req = urllib.request.Request(GHCN_STATIONS_URL, headers={"User-Agent": "ClarkSoft-HMI-Static-Builder"})
-    with urllib.request.urlopen(req, timeout=60) as resp:
-        text = resp.read().decode("utf-8", errors="replace")
-    stations = []
+    return load_station_catalog().stations(states)
+
+
+def parse_ghcn_inventory(start_year: int = 0, end_year: int = 0) -> Dict[str, set]:
+    text = HTTP_CACHE.fetch(GHCN_INVENTORY_URL).read_text(encoding="utf-8", errors="replace")
+    elements: Dict[str, set] = defaultdict(set)
     for line in text.splitlines():
-        if len(line) < 40:
-            continue
-        station_id = line[0:11].strip()
-        lat = line[12:20].strip()
-        lon = line[21:30].strip()
-        state = line[38:40].strip()
-        name = line[41:71].strip()
-        if states and state not in states:
+        if len(line) < 45:
             continue
         try:
-            float(lat)
-            float(lon)
+            first_year = int(line[36:40])
+            last_year = int(line[41:45])
         except ValueError:
             continue
-        stations.append({"id": station_id, "lat": lat, "lon": lon, "state": state, "name": name})
-    return stations
-
-
-def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
-    import math
-
-    r = 6371.0
-    phi1 = math.radians(lat1)
-    phi2 = math.radians(lat2)
-    dphi = math.radians(lat2 - lat1)
-    dlambda = math.radians(lon2 - lon1)
-    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
-    return 2 * r * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+        if (start_year and last_year < start_year) or (end_year and first_year > end_year):
+            continue
+        elements[line[0:11].strip()].add(line[31:35].strip())
+    return elements
 
 
 def auto_select_stations(cfg: Dict, include_meta: bool = False) -> Tuple[List[str], Dict[str, Dict[str, str]]]:
     states = [state.upper() for state in cfg.get("states", [])]
+    ghcn_cfg = cfg.get("ghcn", {})
     sites = cfg.get("modis", {}).get("sites", [])
     if not sites:
         sites = cfg.get("modis", {}).get("irrigation_districts", [])
@@ -360,21 +876,36 @@ def auto_select_stations(cfg: Dict, include_meta: bool = False) -> Tuple[List[st
     selected = []
     selected_meta = {}
     if sites:
+        predicate = None
+        required = [element.upper() for element in ghcn_cfg.get("required_elements", [])]
+        if required:
+            start_year = int(str(ghcn_cfg.get("start_date") or "0")[:4] or 0)
+            end_year = int(str(ghcn_cfg.get("end_date") or "0")[:4] or 0)
+            inventory = parse_ghcn_inventory(start_year, end_year)
+
+            def predicate(station: Dict[str, str]) -> bool:
+                reported = inventory.get(station["id"], ())
+                return all(element in reported for element in required)
+
+        index = station_index.StationIndex(stations)
+        per_site = max(1, int(ghcn_cfg.get("stations_per_site") or 1))
+        max_km = ghcn_cfg.get("max_distance_km")
         for site in sites:
             lat = site.get("lat")
             lon = site.get("lon")
             if lat is None or lon is None:
                 continue
-            best = None
-            best_dist = None
-            for station in stations:
-                dist = haversine_km(float(lat), float(lon), float(station["lat"]), float(station["lon"]))
-                if best_dist is None or dist < best_dist:
-                    best = station
-                    best_dist = dist
-            if best and best["id"] not in selected:
-                selected.append(best["id"])
-                selected_meta[best["id"]] = best
+            matches = index.nearest(
+                float(lat),
+                float(lon),
+                k=per_site,
+                max_km=float(max_km) if max_km else None,
+                predicate=predicate,
+            )
+            for _, best in matches:
+                if best["id"] not in selected:
+                    selected.append(best["id"])
+                    selected_meta[best["id"]] = best
     else:
         # Fallback: one station per state (first in list) when no site coordinates are provided.
         by_state = defaultdict(list)
@@ -392,11 +923,186 @@ def auto_select_stations(cfg: Dict, include_meta: bool = False) -> Tuple[List[st
     return selected, {}
 
 
+STAGE_BUILDERS = {
+    "quickstats": build_quickstats,
+    "modis": build_modis_ndvi,
+    "ghcn": build_ghcn_daily,
+}
+STAGE_OUTPUTS = {
+    "quickstats": [OUTPUT_QUICKSTATS, OUTPUT_QUICKSTATS_STATE, *OUTPUT_QUICKSTATS_ROLLUPS],
+    "modis": [OUTPUT_MODIS_NDVI],
+    "ghcn": [OUTPUT_GHCN_DAILY],
+}
+
+
+def stage_fingerprint(cfg: Dict, name: str) -> str:
+    if name == "quickstats":
+        inputs = {"states": cfg.get("states", []), "quickstats": cfg.get("quickstats", {})}
+    elif name == "modis":
+        inputs = {"modis": cfg.get("modis", {})}
+    else:
+        ghcn_cfg = cfg.get("ghcn", {})
+        inputs = {"states": cfg.get("states", []), "ghcn": ghcn_cfg}
+        if ghcn_cfg.get("auto_select_from_sites"):
+            modis_cfg = cfg.get("modis", {})
+            inputs["sites"] = modis_cfg.get("sites") or modis_cfg.get("irrigation_districts", [])
+    return config_hash(inputs)
+
+
+def output_stamps(paths: List[pathlib.Path]) -> Optional[Dict[str, List[int]]]:
+    stamps = {}
+    for path in paths:
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+        stamps[path.name] = [stat.st_size, stat.st_mtime_ns]
+    return stamps
+
+
+def stage_sources(cfg: Dict, manifest: Dict, name: str) -> List[Tuple[str, float]]:
+    """Remote bodies a stage read last time, as (url, cache max_age) pairs."""
+    if name == "quickstats":
+        url = cfg.get("quickstats", {}).get("dataset_url")
+        return [(url, 0)] if url else []
+    if name == "ghcn":
+        ghcn_cfg = cfg.get("ghcn", {})
+        sources = [(GHCN_STATIONS_URL, 0)]
+        if ghcn_cfg.get("auto_select_from_sites") and ghcn_cfg.get("required_elements"):
+            sources.append((GHCN_INVENTORY_URL, 0))
+        stations = manifest.get("ghcn", {}).get("stations", {})
+        return sources + [(ghcn_station_url(station), 0) for station in sorted(stations)]
+    modis_cfg = cfg.get("modis", {})
+    if not modis_cfg:
+        return []
+    product = modis_cfg.get("product", "MOD13Q1")
+    ttl = float(modis_cfg.get("dates_ttl_hours") if modis_cfg.get("dates_ttl_hours") is not None else 24) * 3600
+    sources = [(f"{MODIS_API}/{product}/bands", ttl)]
+    if not modis_cfg.get("dates_override"):
+        sites = modis_cfg.get("irrigation_districts") or modis_cfg.get("sites", [])
+        sources += [
+            (f"{MODIS_API}/{product}/dates?latitude={site.get('lat')}&longitude={site.get('lon')}", ttl)
+            for site in sites
+            if site.get("lat") is not None and site.get("lon") is not None
+        ]
+    return sources
+
+
+def source_validators(sources: List[Tuple[str, float]], revalidate: bool) -> Optional[Dict[str, str]]:
+    """url -> sha256 of its cached body; with revalidate, conditional GETs refresh the cache first."""
+
+    def validator(source: Tuple[str, float]) -> Optional[str]:
+        url, max_age = source
+        if not revalidate:
+            cached = HTTP_CACHE.cached_path(url)
+            return cached.name if cached is not None else None
+        try:
+            # Cached bodies are content-addressed, so the file name is the sha256.
+            return HTTP_CACHE.fetch(url, max_age=max_age).name
+        except Exception as exc:
+            print(f"Revalidation failed for {url}: {exc}", file=sys.stderr)
+            return None
+
+    hashes = FETCH_POOL.map(validator, sources) if revalidate else [validator(source) for source in sources]
+    if any(value is None for value in hashes):
+        return None
+    return {url: value for (url, _), value in zip(sources, hashes)}
+
+
+def stage_is_fresh(cfg: Dict, manifest: Dict, name: str, max_age: float) -> bool:
+    """Up to date when config, outputs and every source body match the last run.
+
+    Sources are revalidated (304s for unchanged bodies), so a daily run rebuilds
+    exactly the stages whose upstream data moved. max_age > 0 additionally
+    forces a rebuild of records older than that many seconds.
+    """
+    with MANIFEST_LOCK:
+        record = manifest.get("stages", {}).get(name)
+        sources = stage_sources(cfg, manifest, name)
+    if not record or not record.get("sources"):
+        return False
+    if max_age > 0 and time.time() - record.get("finished_at", 0) >= max_age:
+        return False
+    if (
+        record.get("fingerprint") != stage_fingerprint(cfg, name)
+        or record.get("outputs") != output_stamps(STAGE_OUTPUTS[name])
+    ):
+        return False
+    return bool(sources) and record["sources"] == source_validators(sources, revalidate=True)
+
+
+def write_sidecars(paths: List[pathlib.Path], fmt: str) -> None:
+    if not fmt:
+        return
+    if not columnar_sidecar.available():
+        print(f"pyarrow not installed; skipping {fmt} sidecars")
+        return
+    for path in paths:
+        sidecar = columnar_sidecar.write_sidecar(path, fmt)
+        if sidecar is not None:
+            print(f"Wrote {sidecar.name}")
+
+
+def build_stages(cfg: Dict, manifest: Dict, incremental: bool) -> stage_graph.StageGraph:
+    sidecar_format = cfg.get("build", {}).get("sidecar_format", "arrow")
+    if sidecar_format and sidecar_format not in columnar_sidecar.FORMATS:
+        die(f"build.sidecar_format must be one of {', '.join(columnar_sidecar.FORMATS)} or empty")
+
+    def stage(name: str) -> stage_graph.Stage:
+        def run() -> None:
+            # Scoped counters keep each stage's fetch report to its own requests.
+            with FETCH_POOL.scope():
+                STAGE_BUILDERS[name](cfg, manifest, incremental)
+            write_sidecars(STAGE_OUTPUTS[name], sidecar_format)
+            with MANIFEST_LOCK:
+                sources = stage_sources(cfg, manifest, name)
+            record = {
+                "fingerprint": stage_fingerprint(cfg, name),
+                "outputs": output_stamps(STAGE_OUTPUTS[name]),
+                "sources": source_validators(sources, revalidate=False),
+                "finished_at": time.time(),
+            }
+            with MANIFEST_LOCK:
+                manifest.setdefault("stages", {})[name] = record
+
+        return stage_graph.Stage(name, run)
+
+    # GHCN auto-selection reads the MODIS sites from the config, not the MODIS output,
+    # so the three stages are independent; the sites are folded into the GHCN fingerprint.
+    return stage_graph.StageGraph(stage(name) for name in STAGE_BUILDERS)
+
+
 def main() -> None:
+    parser = argparse.ArgumentParser(description="Build static chart CSVs from official datasets")
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Rebuild every dataset from scratch instead of merging from the build manifest watermarks",
+    )
+    parser.add_argument("--only", action="append", choices=list(STAGE_BUILDERS), default=[], help="Run only this stage (repeatable)")
+    parser.add_argument("--skip", action="append", choices=list(STAGE_BUILDERS), default=[], help="Skip this stage (repeatable)")
+    args = parser.parse_args()
+
     cfg = load_config()
-    build_quickstats(cfg)
-    build_modis_ndvi(cfg)
-    build_ghcn_daily(cfg)
+    configure_http(cfg)
+    build_cfg = cfg.get("build", {})
+    # Freshness comes from the source validators; the age cap is an optional extra (0 = off).
+    max_age = float(build_cfg.get("stage_max_age_hours") or 0) * 3600
+    manifest = load_manifest()
+    incremental = not args.full
+    graph = build_stages(cfg, manifest, incremental)
+    try:
+        results = graph.run(
+            graph.select(args.only, args.skip),
+            workers=int(build_cfg.get("workers") or len(STAGE_BUILDERS)),
+            is_fresh=(lambda name: stage_is_fresh(cfg, manifest, name, max_age)) if incremental else None,
+        )
+    finally:
+        save_manifest(manifest)
+    for line in graph.summary(results):
+        print(f"Stage {line}")
+    for line in summarize_changes(manifest):
+        print(f"Changed: {line}")
     print("Static chart CSVs written to assets/data/")
 
 
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""Regenerate only the charts whose source data changed, driven by LISTEN/NOTIFY.
+
+The triggers from migration 011 send one ``hmi_chart_data`` notification per
+changed statement, naming the table and the distinct stations, MODIS sites or
+states it touched. The worker maps those keys to the plan charts that read
+them, waits for the burst to go quiet, and regenerates just those charts with
+the batch generator (unchanged charts are skipped by their content hash).
+Decks that do not depend on the changed keys cost the database nothing.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any
+
+try:
+    import psycopg
+except ImportError as exc:
+    raise SystemExit("psycopg is required. Install in the venv before running.") from exc
+
+import generate_simple_charts as charts
+
+CHANNEL = "hmi_chart_data"
+# Chart dataset (generate_simple_charts.CHART_DATASETS) -> table whose triggers announce changes to it.
+SOURCE_TABLES = {
+    "state_summary": "quickstats_irrigation_state_summary",
+    "state_year_totals": "quickstats_rollup_state_year",
+    "ghcn_series": "ghcn_daily_summary",
+    "ghcn_pairs": "ghcn_daily_summary",
+    "modis_series": "modis_ndvi_timeseries",
+}
+ANY_KEY = None
+MAX_RETRY_DELAY = 300.0
+
+
+class DependencyIndex:
+    """(table, key) -> {(deck_id, chart position)}; ANY_KEY entries depend on every row of the table."""
+
+    def __init__(self, plans: list[charts.ChartPlan], args: argparse.Namespace) -> None:
+        self.plans = {plan.deck_id: plan for plan in plans}
+        self.args = args
+        self.entries: dict[tuple[str, str | None], set[tuple[str, int]]] = defaultdict(set)
+
+    def build(self, conn) -> None:
+        """Resolve each plan's station/site once (auto-picked ones may move after a full reload)."""
+        entries: dict[tuple[str, str | None], set[tuple[str, int]]] = defaultdict(set)
+        with conn.cursor() as cursor:
+            for plan in self.plans.values():
+                datasets = charts.DatasetPlanner(plan, self.args)
+                datasets.resolve(cursor)
+                for position, chart in enumerate(plan.charts):
+                    source = charts.CHART_DATASETS[chart["id"]]
+                    if source in ("ghcn_series", "ghcn_pairs"):
+                        key = datasets.station
+                    elif source == "modis_series":
+                        key = datasets.site_id
+                    else:
+                        # The state charts rank or span every state, so any state can change them.
+                        key = ANY_KEY
+                    entries[(SOURCE_TABLES[source], key)].add((plan.deck_id, position))
+        conn.rollback()
+        # Swapped in whole: rebuilds run in a worker thread while the listener keeps reading it.
+        self.entries = entries
+
+    def affected(self, table: str, keys: list[str] | None) -> set[tuple[str, int]]:
+        hits = set(self.entries.get((table, ANY_KEY), ()))
+        if keys is None:
+            for (entry_table, _), targets in self.entries.items():
+                if entry_table == table:
+                    hits |= targets
+            return hits
+        for key in keys:
+            hits |= self.entries.get((table, key), set())
+        return hits
+
+    def subplans(self, targets: set[tuple[str, int]]) -> list[charts.ChartPlan]:
+        positions: dict[str, list[int]] = defaultdict(list)
+        for deck_id, position in targets:
+            positions[deck_id].append(position)
+        return [
+            charts.ChartPlan(
+                deck_id=deck_id,
+                charts=[self.plans[deck_id].charts[position] for position in sorted(selected)],
+                options=self.plans[deck_id].options,
+            )
+            for deck_id, selected in sorted(positions.items())
+        ]
+
+
+def parse_notification(payload: str) -> tuple[str, list[str] | None] | None:
+    try:
+        message = json.loads(payload)
+    except ValueError:
+        return None
+    table = message.get("table")
+    if not isinstance(table, str):
+        return None
+    keys = message.get("keys")
+    return table, keys if isinstance(keys, list) else None
+
+
+class RegenerationWorker:
+    def __init__(self, index: DependencyIndex, args: argparse.Namespace) -> None:
+        self.index = index
+        self.args = args
+        self.pending: set[tuple[str, int]] = set()
+        self.reresolve = False
+        self.first_change = 0.0
+        self.retry_delay = 0.0
+        self.wake = asyncio.Event()
+
+    def notify(self, payload: str) -> None:
+        parsed = parse_notification(payload)
+        if parsed is None:
+            print(f"Ignoring malformed notification: {payload[:200]}", file=sys.stderr)
+            return
+        table, keys = parsed
+        targets = self.index.affected(table, keys)
+        if keys is None:
+            self.reresolve = True
+        if not targets:
+            return
+        if not self.pending:
+            self.first_change = time.monotonic()
+        self.pending |= targets
+        self.wake.set()
+
+    def mark_all(self) -> None:
+        targets = {target for entries in self.index.entries.values() for target in entries}
+        if not targets:
+            return
+        if not self.pending:
+            self.first_change = time.monotonic()
+        self.pending |= targets
+        self.reresolve = True
+        self.wake.set()
+
+    async def run(self) -> None:
+        while True:
+            await self.wake.wait()
+            # Debounce: flush once the channel has been quiet for --debounce seconds,
+            # but never hold a change back longer than --max-delay.
+            while True:
+                self.wake.clear()
+                remaining = self.args.max_delay - (time.monotonic() - self.first_change)
+                if remaining <= 0:
+                    break
+                try:
+                    await asyncio.wait_for(self.wake.wait(), timeout=min(self.args.debounce, remaining))
+                except asyncio.TimeoutError:
+                    break
+            targets, self.pending = self.pending, set()
+            reresolve, self.reresolve = self.reresolve, False
+            first_change = self.first_change
+            regenerated, resolved = await asyncio.to_thread(self.flush, targets, reresolve, first_change)
+            if regenerated:
+                self.retry_delay = 0.0
+            else:
+                # Back on the loop thread: requeue the charts, which stay stale until they are rebuilt.
+                self.retry_delay = min(max(self.retry_delay * 2, self.args.debounce, 1.0), MAX_RETRY_DELAY)
+                print(f"Retrying {len(targets)} charts in {self.retry_delay:.0f}s", file=sys.stderr)
+                await asyncio.sleep(self.retry_delay)
+                self.requeue(targets, first_change)
+            if not resolved:
+                # Retried with the next flush.
+                self.reresolve = True
+
+    def requeue(self, targets: set[tuple[str, int]], first_change: float) -> None:
+        if not self.pending:
+            self.first_change = first_change
+        else:
+            self.first_change = min(self.first_change, first_change)
+        self.pending |= targets
+        self.wake.set()
+
+    def flush(self, targets: set[tuple[str, int]], reresolve: bool, first_change: float) -> tuple[bool, bool]:
+        """Regenerate targets, then re-resolve if asked; returns (regenerated, resolved).
+
+        Runs in a worker thread. Every failure is logged and reported back rather than
+        raised, since an exception here would stop the whole daemon.
+        """
+        try:
+            plans = self.index.subplans(targets)
+            started = time.perf_counter()
+            charts.run_batch(plans, self.args)
+        except (Exception, SystemExit) as exc:
+            print(f"Regeneration failed for {len(targets)} charts: {exc!r}", file=sys.stderr)
+            return False, not reresolve
+        lag = time.monotonic() - first_change
+        print(
+            f"Regenerated {len(targets)} charts in {len(plans)} decks in {time.perf_counter() - started:.2f}s "
+            f"({lag:.1f}s after first change)",
+            file=sys.stderr,
+        )
+        if reresolve:
+            try:
+                with psycopg.connect(**charts._get_db_config()) as conn:
+                    self.index.build(conn)
+            except (Exception, SystemExit) as exc:
+                # e.g. a reloaded table is still empty; keep the old index and retry on the next flush.
+                print(f"Dependency re-resolve failed ({exc!r}); keeping the previous index", file=sys.stderr)
+                return True, False
+        return True, True
+
+
+async def listen(worker: RegenerationWorker, config: dict[str, Any]) -> None:
+    backoff = 1.0
+    while True:
+        try:
+            async with await psycopg.AsyncConnection.connect(**config, autocommit=True) as conn:
+                await conn.execute(f"LISTEN {CHANNEL}")
+                print(f"Listening on {CHANNEL}", file=sys.stderr)
+                backoff = 1.0
+                async for notification in conn.notifies():
+                    worker.notify(notification.payload)
+        except psycopg.OperationalError as exc:
+            # Notifications sent while disconnected are lost, so rebuild affected decks on reconnect.
+            print(f"Listener connection lost ({exc}); reconnecting in {backoff:.0f}s", file=sys.stderr)
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 60.0)
+            worker.mark_all()
+
+
+async def main_async(args: argparse.Namespace) -> None:
+    plans = charts.load_batch_plans(args.plans, args.catalog, args.plan, args.template_fallback)
+    if not plans:
+        plans = [charts.load_plan(args.plan)]
+    for plan in plans:
+        charts._validate_plan(plan)
+    config = charts._get_db_config()
+    index = DependencyIndex(plans, args)
+    with psycopg.connect(**config) as conn:
+        index.build(conn)
+    print(
+        f"Watching {len(plans)} decks, {sum(len(targets) for targets in index.entries.values())} chart dependencies",
+        file=sys.stderr,
+    )
+    worker = RegenerationWorker(index, args)
+    await asyncio.gather(listen(worker, {key: value for key, value in config.items() if key != "row_factory"}), worker.run())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Regenerate affected charts when chart data tables change")
+    parser.add_argument("--plan", type=Path, default=charts.DEFAULT_PLAN_PATH, help="Plan JSON (or template for --catalog)")
+    parser.add_argument("--plans", nargs="+", default=[], help="Plan JSON files or glob patterns to watch")
+    parser.add_argument("--catalog", type=Path, help="Deck catalog JSON (one plan per deck)")
+    parser.add_argument(
+        "--template-fallback",
+        action="store_true",
+        help="Give catalog decks without a chart_plan the --plan template",
+    )
+    parser.add_argument("--station", help="Override GHCN station id")
+    parser.add_argument("--site-id", help="Override MODIS site id")
+    parser.add_argument("--encoding", choices=charts.ENCODINGS, help="data_spec encoding for regenerated charts")
+    parser.add_argument("--workers", type=int, default=2, help="Connections used per regeneration batch")
+    parser.add_argument("--debounce", type=float, default=2.0, help="Seconds of quiet before regenerating")
+    parser.add_argument("--max-delay", type=float, default=15.0, help="Longest a change may wait during a burst")
+    args = parser.parse_args()
+    args.apply = True
+    try:
+        asyncio.run(main_async(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
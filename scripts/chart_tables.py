@@ -0,0 +1,91 @@
+"""Column layout of the hmi_presenter chart tables and the builder CSVs that feed them.
+
+Shared by the Postgres bulk loader and the offline SQLite engine so both read
+the CSVs into the same columns with the same conversions (``text``,
+``numeric``, ``integer`` and ``date``; see ``load_hmi_chart_data.CONVERSIONS``).
+"""
+from __future__ import annotations
+
+# target table -> (csv file, [(target column, conversion, csv column)])
+DATASETS: dict[str, tuple[str, list[tuple[str, str, str]]]] = {
+    "quickstats_irrigation": (
+        "quickstats_irrigation.csv",
+        [
+            ("state_alpha", "text", "state_alpha"),
+            ("state_name", "text", "state_name"),
+            ("county_name", "text", "county_name"),
+            ("year", "integer", "year"),
+            ("value_text", "text", "value"),
+            ("value_numeric", "numeric", "value"),
+            ("unit", "text", "unit"),
+            ("short_desc", "text", "short_desc"),
+            ("commodity", "text", "commodity"),
+            ("statistic", "text", "statistic"),
+        ],
+    ),
+    "quickstats_irrigation_state_summary": (
+        "quickstats_irrigation_state_summary.csv",
+        [
+            ("state_alpha", "text", "state_alpha"),
+            ("total_value", "numeric", "total_value"),
+        ],
+    ),
+    "quickstats_rollup_state_year": (
+        "quickstats_rollup_state_year.csv",
+        [
+            ("state_alpha", "text", "state_alpha"),
+            ("year", "integer", "year"),
+            ("commodity", "text", "commodity"),
+            ("statistic", "text", "statistic"),
+            ("row_count", "integer", "row_count"),
+            ("value_count", "integer", "value_count"),
+            ("value_sum", "numeric", "value_sum"),
+            ("value_min", "numeric", "value_min"),
+            ("value_max", "numeric", "value_max"),
+        ],
+    ),
+    "quickstats_rollup_county_year": (
+        "quickstats_rollup_county_year.csv",
+        [
+            ("state_alpha", "text", "state_alpha"),
+            ("county_name", "text", "county_name"),
+            ("year", "integer", "year"),
+            ("row_count", "integer", "row_count"),
+            ("value_count", "integer", "value_count"),
+            ("value_sum", "numeric", "value_sum"),
+            ("value_min", "numeric", "value_min"),
+            ("value_max", "numeric", "value_max"),
+        ],
+    ),
+    "ghcn_daily_summary": (
+        "ghcn_daily_summary.csv",
+        [
+            ("station", "text", "station"),
+            ("state", "text", "state"),
+            ("date", "date", "date"),
+            ("prcp_tenths_mm", "numeric", "prcp"),
+            ("tmax_tenths_c", "numeric", "tmax"),
+            ("tmin_tenths_c", "numeric", "tmin"),
+        ],
+    ),
+    "modis_ndvi_timeseries": (
+        "modis_ndvi_timeseries.csv",
+        [
+            ("site_id", "text", "site_id"),
+            ("site_name", "text", "site_name"),
+            ("date", "text", "date"),
+            ("modis_date", "text", "modis_date"),
+            ("value", "numeric", "value"),
+            ("band", "text", "band"),
+            ("product", "text", "product"),
+            ("value_median", "numeric", "value_median"),
+            ("value_p10", "numeric", "value_p10"),
+            ("value_p90", "numeric", "value_p90"),
+            ("valid_fraction", "numeric", "valid_fraction"),
+            ("pixel_count", "integer", "pixel_count"),
+        ],
+    ),
+}
+
+# Tables range-partitioned on a column (migration 012): rows where it is NULL are not loaded.
+PARTITION_KEYS = {"ghcn_daily_summary": "date"}
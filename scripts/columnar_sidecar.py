@@ -0,0 +1,170 @@
+"""Typed columnar sidecars for the static chart CSVs.
+
+Each CSV the builder writes can be mirrored into an Arrow IPC file
+(``<name>.arrow``, memory-mappable for zero-copy column reads) or a Parquet
+file. Repeated text columns (stations, states, commodities, ...) are
+dictionary-encoded, dates become ``date32`` and numeric columns are parsed
+once here ("29,741" -> 29741.0, suppressed values -> null) instead of in
+every consumer. pyarrow is optional; without it no sidecar is written.
+"""
+from __future__ import annotations
+
+import os
+import pathlib
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pa_csv
+    import pyarrow.feather as feather
+except ImportError:  # optional; the builder stays stdlib-only
+    pa = None
+
+FORMATS = {"arrow": ".arrow", "parquet": ".parquet"}
+NUMBER_PATTERN = r"^[-+]?([0-9]+\.?[0-9]*|\.[0-9]+)$"
+INTEGER_PATTERN = r"^[-+]?[0-9]+$"
+DATE_PATTERN = r"^[0-9]{4}-[0-9]{2}-[0-9]{2}$"
+
+# csv stem -> [(column, type)]; the CSV column is kept under the same name unless renamed by "name:source".
+SCHEMAS: Dict[str, List[Tuple[str, str]]] = {
+    "quickstats_irrigation": [
+        ("state_alpha", "dictionary"),
+        ("state_name", "dictionary"),
+        ("county_name", "dictionary"),
+        ("agg_level", "dictionary"),
+        ("year", "int16"),
+        ("value_text:value", "string"),
+        ("value", "float64"),
+        ("unit", "dictionary"),
+        ("short_desc", "dictionary"),
+        ("commodity", "dictionary"),
+        ("statistic", "dictionary"),
+    ],
+    "quickstats_irrigation_state_summary": [
+        ("state_alpha", "dictionary"),
+        ("total_value", "float64"),
+    ],
+    "quickstats_rollup_state_year": [
+        ("state_alpha", "dictionary"),
+        ("year", "int16"),
+        ("commodity", "dictionary"),
+        ("statistic", "dictionary"),
+        ("row_count", "int32"),
+        ("value_count", "int32"),
+        ("value_sum", "float64"),
+        ("value_min", "float64"),
+        ("value_max", "float64"),
+    ],
+    "quickstats_rollup_county_year": [
+        ("state_alpha", "dictionary"),
+        ("county_name", "dictionary"),
+        ("year", "int16"),
+        ("row_count", "int32"),
+        ("value_count", "int32"),
+        ("value_sum", "float64"),
+        ("value_min", "float64"),
+        ("value_max", "float64"),
+    ],
+    "ghcn_daily_summary": [
+        ("station", "dictionary"),
+        ("state", "dictionary"),
+        ("date", "date32"),
+        ("prcp", "int32"),
+        ("tmax", "int32"),
+        ("tmin", "int32"),
+    ],
+    "modis_ndvi_timeseries": [
+        ("site_id", "dictionary"),
+        ("site_name", "dictionary"),
+        ("date", "date32"),
+        ("value", "float64"),
+        ("band", "dictionary"),
+        ("product", "dictionary"),
+        ("modis_date", "string"),
+        ("value_median", "float64"),
+        ("value_p10", "float64"),
+        ("value_p90", "float64"),
+        ("valid_fraction", "float64"),
+        ("pixel_count", "int32"),
+    ],
+}
+
+
+def available() -> bool:
+    return pa is not None
+
+
+def sidecar_path(csv_path: pathlib.Path, fmt: str = "arrow") -> pathlib.Path:
+    return csv_path.with_suffix(FORMATS[fmt])
+
+
+def _matching(column: "pa.ChunkedArray", pattern: str) -> "pa.ChunkedArray":
+    cleaned = pc.utf8_trim_whitespace(column)
+    return pc.if_else(pc.match_substring_regex(cleaned, pattern), cleaned, pa.scalar(None, pa.string()))
+
+
+def _convert(column: "pa.ChunkedArray", kind: str) -> "pa.ChunkedArray":
+    if kind == "string":
+        return column
+    if kind == "dictionary":
+        return pc.dictionary_encode(pc.if_else(pc.equal(column, ""), pa.scalar(None, pa.string()), column))
+    if kind == "float64":
+        return pc.cast(_matching(pc.replace_substring(column, ",", ""), NUMBER_PATTERN), pa.float64())
+    if kind in ("int16", "int32"):
+        return pc.cast(_matching(pc.replace_substring(column, ",", ""), INTEGER_PATTERN), getattr(pa, kind)())
+    if kind == "date32":
+        return pc.cast(pc.strptime(_matching(column, DATE_PATTERN), format="%Y-%m-%d", unit="s"), pa.date32())
+    raise ValueError(f"Unknown sidecar column type: {kind}")
+
+
+def read_typed_csv(csv_path: pathlib.Path) -> "pa.Table":
+    schema = SCHEMAS[csv_path.stem]
+    raw = pa_csv.read_csv(
+        csv_path,
+        convert_options=pa_csv.ConvertOptions(
+            column_types={source.split(":")[-1]: pa.string() for source, _ in schema},
+            strings_can_be_null=False,
+        ),
+    )
+    names, columns = [], []
+    for spec, kind in schema:
+        name, _, source = spec.partition(":")
+        source = source or name
+        if source not in raw.column_names:
+            # Older CSVs (e.g. MODIS before the pixel statistics) get an all-null column.
+            columns.append(pa.nulls(raw.num_rows, pa.string() if kind in ("string", "dictionary") else getattr(pa, kind)()))
+        else:
+            columns.append(_convert(raw.column(source), kind))
+        names.append(name)
+    return pa.table(columns, names=names)
+
+
+def write_sidecar(csv_path: pathlib.Path, fmt: str = "arrow") -> Optional[pathlib.Path]:
+    """Write the typed sidecar next to ``csv_path``; returns None when pyarrow is missing."""
+    if pa is None or csv_path.stem not in SCHEMAS or not csv_path.exists():
+        return None
+    target = sidecar_path(csv_path, fmt)
+    if target.exists() and target.stat().st_mtime_ns >= csv_path.stat().st_mtime_ns:
+        return target
+    table = read_typed_csv(csv_path)
+    tmp_path = target.with_name(target.name + ".tmp")
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+
+        pq.write_table(table, tmp_path)
+    else:
+        # Uncompressed IPC so readers can memory-map the columns without copying.
+        feather.write_feather(table, tmp_path, compression="uncompressed")
+    os.replace(tmp_path, target)
+    return target
+
+
+def read_sidecar(path: pathlib.Path, columns: Optional[List[str]] = None) -> "pa.Table":
+    if pa is None:
+        raise RuntimeError("pyarrow is required to read columnar sidecars")
+    if path.suffix == ".parquet":
+        import pyarrow.parquet as pq
+
+        return pq.read_table(path, columns=columns)
+    return feather.read_table(path, columns=columns, memory_map=True)
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""EXPLAIN (ANALYZE) every chart query and check it uses the migration 012 access paths.
+
+The queries are the real ``_fetch_*`` calls from generate_simple_charts, run
+through a cursor that prefixes ``EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON)``.
+Each plan is reduced to its scans: large tables (GHCN, MODIS and their
+pyramids) must be read by index (index-only where covered) and GHCN date
+ranges must prune partitions.
+
+``--seed-rows 100000000`` first inserts synthetic stations/sites (BENCH*) at
+that scale, refreshes the pyramids and ANALYZEs; the whole run is one
+transaction that is always rolled back, so nothing seeded is ever committed.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from typing import Any
+
+try:
+    import psycopg
+except ImportError as exc:
+    raise SystemExit("psycopg is required. Install in the venv before running.") from exc
+
+import generate_simple_charts as charts
+
+LARGE_TABLES = ("ghcn_daily_summary", "modis_ndvi_timeseries", "ghcn_summary_pyramid", "modis_ndvi_pyramid")
+PYRAMIDS = ("ghcn_summary_pyramid", "modis_ndvi_pyramid")
+INDEX_SCANS = {"Index Only Scan", "Index Scan", "Bitmap Index Scan", "Bitmap Heap Scan"}
+BENCH_STATION = "BENCH000001"
+BENCH_SITE = "bench_0001"
+
+
+def benchmark_keys(station: str, site_id: str, days: int) -> list[tuple]:
+    """One dataset key per query shape in generate_simple_charts._fetch_dataset."""
+    return [
+        ("state_summary", 6),
+        ("state_year_totals",),
+        ("ghcn_series", station, days, "daily"),
+        ("ghcn_series", station, days * 12, "monthly"),
+        ("ghcn_pairs", station, days, "daily"),
+        ("modis_series", site_id, 12, 0, "daily"),
+        ("modis_series", site_id, 12, days * 12, "daily"),
+        ("modis_series", site_id, 12, days * 12, "monthly"),
+    ]
+
+
+class ExplainCursor:
+    """Cursor stand-in that EXPLAINs each statement instead of returning its rows."""
+
+    def __init__(self, cursor, analyze: bool = True) -> None:
+        self._cursor = cursor
+        self._options = "ANALYZE, BUFFERS, FORMAT JSON" if analyze else "FORMAT JSON"
+        self.plans: list[dict[str, Any]] = []
+        self.statements: list[tuple[str, tuple]] = []
+
+    def execute(self, query: str, params: tuple = ()) -> None:
+        self.statements.append((query, params))
+        if self._cursor is None:
+            return
+        self._cursor.execute(f"EXPLAIN ({self._options}) {query}", params)
+        row = self._cursor.fetchone()
+        plan = row["QUERY PLAN"] if isinstance(row, dict) else row[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        self.plans.append(plan[0])
+
+    def fetchall(self) -> list[dict[str, Any]]:
+        return []
+
+    def fetchone(self) -> None:
+        return None
+
+
+def _walk(node: dict[str, Any]):
+    yield node
+    for child in node.get("Plans") or []:
+        yield from _walk(child)
+
+
+def summarize_plan(plan: dict[str, Any], partition_counts: dict[str, int]) -> dict[str, Any]:
+    scans = []
+    partitions: dict[str, set[str]] = {}
+    for node in _walk(plan["Plan"]):
+        relation = node.get("Relation Name")
+        if not relation:
+            continue
+        parent = next((table for table in LARGE_TABLES if relation.startswith(table)), None)
+        scans.append(
+            {
+                "relation": relation,
+                "node": node["Node Type"],
+                "index": node.get("Index Name"),
+                "heap_fetches": node.get("Heap Fetches"),
+                "large": parent is not None,
+            }
+        )
+        if parent in partition_counts:
+            partitions.setdefault(parent, set()).add(relation)
+    large = [scan for scan in scans if scan["large"]]
+    problems = [f"{scan['node']} on {scan['relation']}" for scan in large if scan["node"] not in INDEX_SCANS]
+    pruned = {
+        table: f"{len(scanned)}/{partition_counts[table]}" for table, scanned in partitions.items()
+    }
+    for table, scanned in partitions.items():
+        if len(scanned) >= partition_counts[table] > 1:
+            problems.append(f"no partition pruning on {table}")
+    if large and all(scan["node"] == "Index Only Scan" for scan in large):
+        access = "index-only"
+    elif large:
+        access = "index" if not problems else "scan"
+    else:
+        access = "small tables"
+    return {
+        "execution_ms": plan.get("Execution Time"),
+        "access": access,
+        "partitions": pruned,
+        "scans": scans,
+        "problems": problems,
+    }
+
+
+def _partition_counts(cursor) -> dict[str, int]:
+    cursor.execute(
+        """
+        SELECT parent.relname AS table_name, count(*) AS partitions
+        FROM pg_inherits
+        JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+        JOIN pg_namespace ns ON ns.oid = parent.relnamespace
+        WHERE ns.nspname = 'hmi_presenter'
+        GROUP BY parent.relname
+        """
+    )
+    return {row["table_name"]: int(row["partitions"]) for row in cursor.fetchall()}
+
+
+def seed(cursor, rows: int, stations: int, modis_rows: int, sites: int) -> None:
+    """Insert synthetic GHCN/MODIS rows ending today (rolled back with the run)."""
+    days = max(1, -(-rows // stations))
+    started = time.perf_counter()
+    cursor.execute(
+        """
+        SELECT hmi_presenter.ensure_ghcn_partitions(
+            extract(year FROM CURRENT_DATE - %s)::integer, extract(year FROM CURRENT_DATE)::integer + 1
+        )
+        """,
+        (days,),
+    )
+    cursor.execute(
+        """
+        INSERT INTO hmi_presenter.ghcn_daily_summary (station, state, date, prcp_tenths_mm, tmax_tenths_c, tmin_tenths_c)
+        SELECT 'BENCH' || lpad(s::text, 6, '0'), 'KS', CURRENT_DATE - d,
+               (random() * 300)::integer, (random() * 450 - 100)::integer, (random() * 400 - 200)::integer
+        FROM generate_series(1, %s) AS d
+        CROSS JOIN generate_series(1, %s) AS s
+        """,
+        (days, stations),
+    )
+    composites = max(1, -(-modis_rows // sites))
+    cursor.execute(
+        """
+        INSERT INTO hmi_presenter.modis_ndvi_timeseries (site_id, site_name, date, value, band, product)
+        SELECT 'bench_' || lpad(s::text, 4, '0'), 'Bench site ' || s, to_char(CURRENT_DATE - d * 16, 'YYYY-MM-DD'),
+               round(random()::numeric, 4), 'ndvi', 'MOD13Q1'
+        FROM generate_series(0, %s - 1) AS d
+        CROSS JOIN generate_series(1, %s) AS s
+        """,
+        (composites, sites),
+    )
+    seeded = time.perf_counter()
+    # Weekly/monthly/seasonal charts read the pyramids, which only see the seed once refreshed.
+    for view in PYRAMIDS:
+        cursor.execute(f"REFRESH MATERIALIZED VIEW hmi_presenter.{view}")
+    for table in LARGE_TABLES:
+        cursor.execute(f"ANALYZE hmi_presenter.{table}")
+    print(
+        f"Seeded {days * stations} GHCN rows ({stations} stations x {days} days) and "
+        f"{composites * sites} MODIS rows in {seeded - started:.1f}s; "
+        f"refreshed pyramids and analyzed in {time.perf_counter() - seeded:.1f}s",
+        file=sys.stderr,
+    )
+
+
+def explain_all(cursor, keys: list[tuple], analyze: bool = True) -> list[dict[str, Any]]:
+    counts = _partition_counts(cursor) if cursor is not None else {}
+    results = []
+    for key in keys:
+        explain = ExplainCursor(cursor, analyze)
+        charts._fetch_dataset(explain, key)
+        for (query, params), plan in zip(explain.statements, explain.plans or [None] * len(explain.statements)):
+            entry = {"dataset": list(key), "query": " ".join(query.split()), "params": list(params)}
+            if plan is not None:
+                entry.update(summarize_plan(plan, counts))
+            results.append(entry)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="EXPLAIN the chart queries and verify index/partition access")
+    parser.add_argument("--station", help="GHCN station to query (default: busiest, or the seeded bench station)")
+    parser.add_argument("--site-id", help="MODIS site to query (default: busiest, or the seeded bench site)")
+    parser.add_argument("--days", type=int, default=30, help="Chart window in days (long-range variants use 12x)")
+    parser.add_argument("--seed-rows", type=int, default=0, help="Insert this many synthetic GHCN rows first (rolled back)")
+    parser.add_argument("--seed-stations", type=int, default=10000, help="Synthetic GHCN stations")
+    parser.add_argument("--seed-modis-rows", type=int, default=0, help="Synthetic MODIS rows (default: seed-rows / 10)")
+    parser.add_argument("--seed-sites", type=int, default=1000, help="Synthetic MODIS sites")
+    parser.add_argument("--no-analyze", action="store_true", help="Plan only (EXPLAIN without ANALYZE)")
+    parser.add_argument("--output", help="Write the plan summaries as JSON")
+    parser.add_argument("--dry-run", action="store_true", help="Print the statements that would be explained")
+    args = parser.parse_args()
+
+    if args.dry_run:
+        keys = benchmark_keys(args.station or BENCH_STATION, args.site_id or BENCH_SITE, args.days)
+        for entry in explain_all(None, keys):
+            print(f"{entry['dataset']}: {entry['query']} {entry['params']}")
+        return
+
+    failures = 0
+    with psycopg.connect(**charts._get_db_config()) as conn:
+        with conn.cursor() as cursor:
+            if args.seed_rows:
+                seed(
+                    cursor,
+                    args.seed_rows,
+                    args.seed_stations,
+                    args.seed_modis_rows or args.seed_rows // 10,
+                    args.seed_sites,
+                )
+            options: dict[str, Any] = {}
+            station = args.station or (BENCH_STATION if args.seed_rows else charts._pick_ghcn_station(cursor, None, options))
+            site_id = args.site_id or (BENCH_SITE if args.seed_rows else charts._pick_modis_site(cursor, None, options))
+            results = explain_all(cursor, benchmark_keys(station, site_id, args.days), analyze=not args.no_analyze)
+        # Seeded rows and new partitions are never kept.
+        conn.rollback()
+
+    for entry in results:
+        partitions = ", ".join(f"{table} {count}" for table, count in entry["partitions"].items())
+        elapsed = entry["execution_ms"]
+        print(
+            f"{'/'.join(str(part) for part in entry['dataset']):<48} {entry['access']:<12} "
+            f"{'' if elapsed is None else f'{elapsed:.2f} ms':>12}  {partitions}"
+        )
+        for problem in entry["problems"]:
+            failures += 1
+            print(f"    !! {problem}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            json.dump(results, fh, indent=2)
+    if failures:
+        raise SystemExit(f"{failures} chart queries do not use an index or partition-pruned plan")
+
+
+if __name__ == "__main__":
+    main()
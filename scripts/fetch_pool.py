@@ -0,0 +1,235 @@
+"""Pooled keep-alive HTTP client shared by the static chart-data builders.
+
+Idle ``http.client`` connections are kept per host and reused, a per-host
+semaphore caps concurrent requests to each upstream, and transient
+failures (connection errors, 429 and 5xx) are retried with jittered
+exponential backoff. ``FetchPool.map`` fans work out over a bounded thread
+pool and the pool keeps request/byte counters for the build log; inside
+``FetchPool.scope()`` the counters cover only that context's requests, so
+concurrent build stages each report their own traffic.
+"""
+from __future__ import annotations
+
+import concurrent.futures
+import contextlib
+import contextvars
+import http.client
+import random
+import threading
+import time
+import urllib.parse
+from collections import defaultdict
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, TypeVar
+
+USER_AGENT = "ClarkSoft-HMI-Static-Builder"
+RETRY_STATUSES = frozenset((429, 500, 502, 503, 504))
+REDIRECT_STATUSES = frozenset((301, 302, 303, 307, 308))
+MAX_REDIRECTS = 5
+
+T = TypeVar("T")
+R = TypeVar("R")
+HostKey = Tuple[str, str, int]
+
+# Counters of the innermost FetchPool.scope(); map() runs each item in a copy of the caller's context.
+_SCOPE: contextvars.ContextVar[Optional[Dict[str, int]]] = contextvars.ContextVar("fetch_pool_scope", default=None)
+
+
+def _new_stats() -> Dict[str, int]:
+    return {"requests": 0, "retries": 0, "connections": 0, "bytes": 0}
+
+
+class HTTPStatusError(OSError):
+    def __init__(self, url: str, status: int, reason: str = "") -> None:
+        super().__init__(f"HTTP {status} {reason} for {url}".replace("  ", " "))
+        self.url = url
+        self.status = status
+
+
+class PooledResponse:
+    """Response wrapper that hands its connection back to the pool once drained."""
+
+    def __init__(self, pool: "FetchPool", key: HostKey, conn: http.client.HTTPConnection, resp: http.client.HTTPResponse) -> None:
+        self._pool = pool
+        self._key = key
+        self._conn: Optional[http.client.HTTPConnection] = conn
+        self._resp = resp
+        self.status = resp.status
+        self.reason = resp.reason
+        self.headers = resp.headers
+
+    def read(self, amt: Optional[int] = None) -> bytes:
+        data = self._resp.read(amt)
+        self._pool._count(bytes=len(data))
+        return data
+
+    def close(self) -> None:
+        if self._conn is None:
+            return
+        conn = self._conn
+        self._conn = None
+        if not self._resp.isclosed() and self._resp.length == 0:
+            self._resp.read()
+        reusable = self._resp.isclosed() and not self._resp.will_close
+        if not reusable:
+            self._resp.close()
+        self._pool._release(self._key, conn, reusable)
+
+    def __enter__(self) -> "PooledResponse":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class FetchPool:
+    def __init__(
+        self,
+        workers: int = 8,
+        per_host: int = 4,
+        retries: int = 4,
+        backoff_seconds: float = 0.5,
+        timeout: int = 60,
+    ) -> None:
+        self.workers = max(1, workers)
+        self.per_host = max(1, per_host)
+        self.retries = max(0, retries)
+        self.backoff_seconds = backoff_seconds
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._idle: Dict[HostKey, List[http.client.HTTPConnection]] = defaultdict(list)
+        self._slots: Dict[HostKey, threading.BoundedSemaphore] = {}
+        self.stats = _new_stats()
+
+    def _count(self, **deltas: int) -> None:
+        with self._lock:
+            self._count_locked(deltas)
+
+    def _count_locked(self, deltas: Dict[str, int]) -> None:
+        scoped = _SCOPE.get()
+        for name, delta in deltas.items():
+            self.stats[name] += delta
+            if scoped is not None:
+                scoped[name] += delta
+
+    def _slot(self, key: HostKey) -> threading.BoundedSemaphore:
+        with self._lock:
+            slot = self._slots.get(key)
+            if slot is None:
+                slot = self._slots[key] = threading.BoundedSemaphore(self.per_host)
+            return slot
+
+    def _acquire(self, key: HostKey) -> Tuple[http.client.HTTPConnection, bool]:
+        self._slot(key).acquire()
+        with self._lock:
+            idle = self._idle[key]
+            if idle:
+                return idle.pop(), True
+            self._count_locked({"connections": 1})
+        scheme, host, port = key
+        if scheme == "https":
+            return http.client.HTTPSConnection(host, port, timeout=self.timeout), False
+        return http.client.HTTPConnection(host, port, timeout=self.timeout), False
+
+    def _release(self, key: HostKey, conn: http.client.HTTPConnection, reusable: bool) -> None:
+        if reusable:
+            with self._lock:
+                self._idle[key].append(conn)
+        else:
+            conn.close()
+        self._slot(key).release()
+
+    def _sleep_before_retry(self, attempt: int, retry_after: Optional[str] = None) -> None:
+        delay = self.backoff_seconds * (2 ** attempt) * random.uniform(0.5, 1.5)
+        if retry_after and retry_after.isdigit():
+            delay = max(delay, float(retry_after))
+        self._count(retries=1)
+        time.sleep(delay)
+
+    def request(self, url: str, headers: Optional[Dict[str, str]] = None) -> PooledResponse:
+        request_headers = {"User-Agent": USER_AGENT, **(headers or {})}
+        for _ in range(MAX_REDIRECTS + 1):
+            resp = self._request_once(url, request_headers)
+            if resp.status not in REDIRECT_STATUSES or not resp.headers.get("Location"):
+                return resp
+            location = resp.headers["Location"]
+            resp.read()
+            resp.close()
+            url = urllib.parse.urljoin(url, location)
+        raise HTTPStatusError(url, 310, "Too many redirects")
+
+    def _request_once(self, url: str, headers: Dict[str, str]) -> PooledResponse:
+        parts = urllib.parse.urlsplit(url)
+        scheme = parts.scheme.lower()
+        port = parts.port or (443 if scheme == "https" else 80)
+        key = (scheme, parts.hostname or "", port)
+        target = parts.path or "/"
+        if parts.query:
+            target = f"{target}?{parts.query}"
+
+        attempt = 0
+        while True:
+            conn, reused = self._acquire(key)
+            try:
+                conn.request("GET", target, headers=headers)
+                raw = conn.getresponse()
+            except (OSError, http.client.HTTPException):
+                self._release(key, conn, reusable=False)
+                if reused:
+                    # The server dropped an idle keep-alive connection; try a fresh one.
+                    continue
+                if attempt >= self.retries:
+                    raise
+                self._sleep_before_retry(attempt)
+                attempt += 1
+                continue
+            self._count(requests=1)
+            resp = PooledResponse(self, key, conn, raw)
+            if resp.status in RETRY_STATUSES and attempt < self.retries:
+                retry_after = resp.headers.get("Retry-After")
+                resp.read()
+                resp.close()
+                self._sleep_before_retry(attempt, retry_after)
+                attempt += 1
+                continue
+            return resp
+
+    def map(self, fn: Callable[[T], R], items: Iterable[T]) -> List[R]:
+        items = list(items)
+        if len(items) <= 1 or self.workers == 1:
+            return [fn(item) for item in items]
+        with concurrent.futures.ThreadPoolExecutor(max_workers=min(self.workers, len(items))) as executor:
+            futures = [executor.submit(contextvars.copy_context().run, fn, item) for item in items]
+            return [future.result() for future in futures]
+
+    @contextlib.contextmanager
+    def scope(self) -> Iterator[None]:
+        """Give this context (and the map() workers it starts) its own counters for snapshot()/report()."""
+        token = _SCOPE.set(_new_stats())
+        try:
+            yield
+        finally:
+            _SCOPE.reset(token)
+
+    def snapshot(self) -> Dict[str, float]:
+        scoped = _SCOPE.get()
+        with self._lock:
+            return {**(self.stats if scoped is None else scoped), "clock": time.perf_counter()}
+
+    def report(self, label: str, since: Dict[str, float]) -> str:
+        now = self.snapshot()
+        elapsed = max(now["clock"] - since["clock"], 1e-9)
+        requests = now["requests"] - since["requests"]
+        megabytes = (now["bytes"] - since["bytes"]) / (1 << 20)
+        return (
+            f"{label}: {requests} requests, {megabytes:.1f} MB in {elapsed:.1f}s "
+            f"({requests / elapsed:.1f} req/s, {megabytes / elapsed:.2f} MB/s), "
+            f"{now['retries'] - since['retries']} retries, "
+            f"{now['connections'] - since['connections']} new connections"
+        )
+
+    def close(self) -> None:
+        with self._lock:
+            idle = [conn for conns in self._idle.values() for conn in conns]
+            self._idle.clear()
+        for conn in idle:
+            conn.close()
@@ -3,23 +3,38 @@
 from __future__ import annotations
 
 import argparse
+import glob
+import hashlib
 import json
 import os
+import queue
 import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from dataclasses import dataclass
 from datetime import date
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable, Iterator
 
 try:
     import psycopg
     from psycopg.rows import dict_row
     from psycopg.types.json import Json
-except ImportError as exc:
-    raise SystemExit("psycopg is required. Install in the venv before running.") from exc
+except ImportError:  # only the postgres backend needs it; --backend sqlite runs without
+    psycopg = None
+
+import offline_chart_db
 
 ROOT = Path(__file__).resolve().parents[1]
-DEFAULT_PLAN_PATH = ROOT / "assets" / "data" / "chart_auto_plan.example.json"
+ASSETS_DIR = ROOT / "assets" / "data"
+DEFAULT_PLAN_PATH = ASSETS_DIR / "chart_auto_plan.example.json"
+BACKENDS = ("postgres", "sqlite")
+DEFAULT_MAX_POINTS = 400
+MODIS_NATIVE_DAYS = 16.0
+# Time-series pyramid levels (migration 009) with their nominal days per point; daily reads the base tables.
+RESOLUTIONS = {"daily": 1.0, "weekly": 7.0, "monthly": 30.44, "seasonal": 91.31}
 
 
 @dataclass
@@ -37,6 +52,8 @@ def _get_env(name: str) -> str:
 
 
 def _get_db_config() -> dict[str, Any]:
+    if psycopg is None:
+        raise SystemExit("psycopg is required. Install in the venv before running.")
     return {
         "host": os.environ.get("CLARKSOFT_PG_HOST", "127.0.0.1"),
         "port": int(os.environ.get("CLARKSOFT_PG_PORT", "5434")),
@@ -59,10 +76,20 @@ def load_plan(path: Path) -> ChartPlan:
     return ChartPlan(deck_id=deck_id, charts=charts, options=options)
 
 
-def _fetch_state_summary(cursor, limit: int) -> list[dict[str, Any]]:
+# Fetches return column arrays ({column: [values]}) that the builders drop straight into options:
+# limits, NULL handling, unit conversion and float casts all happen in the SQL.
+Columns = dict[str, list[Any]]
+
+
+def _column_arrays(cursor, names: tuple[str, ...]) -> Columns:
+    rows = cursor.fetchall()
+    return {name: [row[name] for row in rows] for name in names}
+
+
+def _fetch_state_summary(cursor, limit: int) -> Columns:
     cursor.execute(
         """
-        SELECT state_alpha, total_value
+        SELECT state_alpha, CAST(total_value AS double precision) AS total_value
         FROM hmi_presenter.quickstats_irrigation_state_summary
         WHERE total_value IS NOT NULL
         ORDER BY total_value DESC, state_alpha ASC
@@ -70,7 +97,21 @@ def _fetch_state_summary(cursor, limit: int) -> list[dict[str, Any]]:
         """,
         (limit,),
     )
-    return cursor.fetchall()
+    return _column_arrays(cursor, ("state_alpha", "total_value"))
+
+
+def _fetch_state_year_totals(cursor) -> Columns:
+    # Reads the pre-aggregated rollup written by the builder instead of scanning quickstats_irrigation.
+    cursor.execute(
+        """
+        SELECT state_alpha, year, CAST(sum(value_sum) AS double precision) AS total_value
+        FROM hmi_presenter.quickstats_rollup_state_year
+        WHERE year IS NOT NULL AND value_sum IS NOT NULL
+        GROUP BY state_alpha, year
+        ORDER BY year ASC, state_alpha ASC
+        """
+    )
+    return _column_arrays(cursor, ("state_alpha", "year", "total_value"))
 
 
 def _pick_ghcn_station(cursor, override: str | None, plan_options: dict[str, Any]) -> str:
@@ -98,10 +139,57 @@ def _pick_ghcn_station(cursor, override: str | None, plan_options: dict[str, Any
     return row["station"]
 
 
-def _fetch_ghcn_timeseries(cursor, station: str, days: int) -> list[dict[str, Any]]:
+def pick_resolution(days: int, max_points: int, native_days: float = 1.0) -> str:
+    for name, span in RESOLUTIONS.items():
+        if days / max(span, native_days) <= max_points:
+            return name
+    return "seasonal"
+
+
+def _series_resolution(options: dict[str, Any], key: str, days: int, native_days: float = 1.0) -> str:
+    requested = str(options.get(key) or "auto")
+    if requested == "auto":
+        return pick_resolution(days, int(options.get("max_points") or DEFAULT_MAX_POINTS), native_days)
+    if requested not in RESOLUTIONS:
+        raise ValueError(f"{key} must be auto or one of: {', '.join(RESOLUTIONS)}")
+    return requested
+
+
+def _ghcn_resolution(options: dict[str, Any]) -> str:
+    return _series_resolution(options, "ghcn_resolution", int(options.get("ghcn_days") or 30))
+
+
+GHCN_COLUMNS = ("day", "prcp_mm", "tmax_c", "tmin_c")
+GHCN_PAIR_COLUMNS = ("tmax_c", "prcp_mm")
+
+
+def _fetch_ghcn_timeseries(cursor, station: str, days: int, resolution: str = "daily") -> Columns:
+    """Daily (or pyramid) GHCN series in mm / degrees C; missing readings plot as 0."""
+    if resolution != "daily":
+        # Weekly/monthly/seasonal points come from the pyramid: precipitation sums, mean temperatures.
+        cursor.execute(
+            """
+            SELECT
+                to_char(period_start, 'YYYY-MM-DD') AS day,
+                CAST(round(coalesce(prcp_tenths_mm, 0) / 10, 2) AS double precision) AS prcp_mm,
+                CAST(round(coalesce(tmax_tenths_c, 0) / 10, 2) AS double precision) AS tmax_c,
+                CAST(round(coalesce(tmin_tenths_c, 0) / 10, 2) AS double precision) AS tmin_c
+            FROM hmi_presenter.ghcn_summary_pyramid
+            WHERE resolution = %s
+              AND station = %s
+              AND period_end >= (CURRENT_DATE - (%s * INTERVAL '1 day'))
+            ORDER BY period_start ASC
+            """,
+            (resolution, station, days),
+        )
+        return _column_arrays(cursor, GHCN_COLUMNS)
     cursor.execute(
         """
-        SELECT date, prcp_tenths_mm, tmax_tenths_c, tmin_tenths_c
+        SELECT
+            to_char(date, 'YYYY-MM-DD') AS day,
+            CAST(coalesce(prcp_tenths_mm, 0) / 10 AS double precision) AS prcp_mm,
+            CAST(coalesce(tmax_tenths_c, 0) / 10 AS double precision) AS tmax_c,
+            CAST(coalesce(tmin_tenths_c, 0) / 10 AS double precision) AS tmin_c
         FROM hmi_presenter.ghcn_daily_summary
         WHERE station = %s
           AND date >= (CURRENT_DATE - (%s * INTERVAL '1 day'))
@@ -109,7 +197,43 @@ def _fetch_ghcn_timeseries(cursor, station: str, days: int) -> list[dict[str, An
         """,
         (station, days),
     )
-    return cursor.fetchall()
+    return _column_arrays(cursor, GHCN_COLUMNS)
+
+
+def _fetch_ghcn_pairs(cursor, station: str, days: int, resolution: str = "daily") -> Columns:
+    """(tmax C, precip mm) pairs for the scatter chart; days missing either reading are left out."""
+    if resolution != "daily":
+        cursor.execute(
+            """
+            SELECT
+                CAST(round(tmax_tenths_c / 10, 2) AS double precision) AS tmax_c,
+                CAST(round(prcp_tenths_mm / 10, 2) AS double precision) AS prcp_mm
+            FROM hmi_presenter.ghcn_summary_pyramid
+            WHERE resolution = %s
+              AND station = %s
+              AND period_end >= (CURRENT_DATE - (%s * INTERVAL '1 day'))
+              AND tmax_tenths_c IS NOT NULL
+              AND prcp_tenths_mm IS NOT NULL
+            ORDER BY period_start ASC
+            """,
+            (resolution, station, days),
+        )
+        return _column_arrays(cursor, GHCN_PAIR_COLUMNS)
+    cursor.execute(
+        """
+        SELECT
+            CAST(tmax_tenths_c / 10 AS double precision) AS tmax_c,
+            CAST(prcp_tenths_mm / 10 AS double precision) AS prcp_mm
+        FROM hmi_presenter.ghcn_daily_summary
+        WHERE station = %s
+          AND date >= (CURRENT_DATE - (%s * INTERVAL '1 day'))
+          AND tmax_tenths_c IS NOT NULL
+          AND prcp_tenths_mm IS NOT NULL
+        ORDER BY date ASC
+        """,
+        (station, days),
+    )
+    return _column_arrays(cursor, GHCN_PAIR_COLUMNS)
 
 
 def _pick_modis_site(cursor, override: str | None, plan_options: dict[str, Any]) -> str:
@@ -137,20 +261,64 @@ def _pick_modis_site(cursor, override: str | None, plan_options: dict[str, Any])
     return row["site_id"]
 
 
-def _fetch_modis_timeseries(cursor, site_id: str, limit: int) -> list[dict[str, Any]]:
-    cursor.execute(
-        """
-        SELECT date, value
-        FROM hmi_presenter.modis_ndvi_timeseries
-        WHERE site_id = %s
-        ORDER BY date ASC
-        """,
-        (site_id,),
-    )
-    rows = cursor.fetchall()
-    if limit <= 0:
-        return rows
-    return rows[-limit:]
+MODIS_COLUMNS = ("day", "value")
+
+
+def _fetch_modis_timeseries(cursor, site_id: str, limit: int, days: int = 0, resolution: str = "daily") -> Columns:
+    """NDVI for the last ``days`` days, else the latest ``limit`` composites (all when limit <= 0)."""
+    if days > 0 and resolution != "daily":
+        # Pyramid points carry the median NDVI of each period.
+        cursor.execute(
+            """
+            SELECT to_char(period_start, 'YYYY-MM-DD') AS day, CAST(value AS double precision) AS value
+            FROM hmi_presenter.modis_ndvi_pyramid
+            WHERE resolution = %s
+              AND site_id = %s
+              AND period_end >= (CURRENT_DATE - (%s * INTERVAL '1 day'))
+            ORDER BY period_start ASC
+            """,
+            (resolution, site_id, days),
+        )
+    elif days > 0:
+        cursor.execute(
+            """
+            SELECT date AS day, CAST(coalesce(value, 0) AS double precision) AS value
+            FROM hmi_presenter.modis_ndvi_timeseries
+            WHERE site_id = %s
+              AND obs_date >= (CURRENT_DATE - (%s * INTERVAL '1 day'))
+            ORDER BY obs_date ASC
+            """,
+            (site_id, days),
+        )
+    elif limit > 0:
+        # Newest composites first through the (site_id, obs_date) index, then back into date order.
+        cursor.execute(
+            """
+            SELECT day, value
+            FROM (
+                SELECT obs_date, date AS day, CAST(coalesce(value, 0) AS double precision) AS value
+                FROM hmi_presenter.modis_ndvi_timeseries
+                WHERE site_id = %s
+                  AND obs_date IS NOT NULL
+                ORDER BY obs_date DESC
+                LIMIT %s
+            ) AS latest
+            ORDER BY obs_date ASC
+            """,
+            (site_id, limit),
+        )
+    else:
+        cursor.execute(
+            """
+            SELECT date AS day, CAST(coalesce(value, 0) AS double precision) AS value
+            FROM hmi_presenter.modis_ndvi_timeseries
+            WHERE site_id = %s
+              AND obs_date IS NOT NULL
+            ORDER BY obs_date ASC
+            """,
+            (site_id,),
+        )
+    return _column_arrays(cursor, MODIS_COLUMNS)
 
 
 def _echarts_base(title: str) -> dict[str, Any]:
@@ -162,11 +330,9 @@ def _echarts_base(title: str) -> dict[str, Any]:
     }
 
 
-def build_state_summary_chart(cursor, options: dict[str, Any]) -> dict[str, Any]:
-    limit = int(options.get("state_limit") or 6)
-    rows = _fetch_state_summary(cursor, limit)
-    labels = [row["state_alpha"] for row in rows]
-    values = [float(row["total_value"]) if row["total_value"] is not None else 0 for row in rows]
+def build_state_summary_chart(columns: Columns, options: dict[str, Any]) -> dict[str, Any]:
+    labels = columns["state_alpha"]
+    values = columns["total_value"]
     option = _echarts_base("Irrigated acres by state")
     option.update(
         {
@@ -185,12 +351,35 @@ def build_state_summary_chart(cursor, options: dict[str, Any]) -> dict[str, Any]
     return option
 
 
-def build_precip_chart(cursor, options: dict[str, Any], station: str) -> dict[str, Any]:
-    days = int(options.get("ghcn_days") or 30)
-    rows = _fetch_ghcn_timeseries(cursor, station, days)
-    labels = [row["date"].isoformat() if isinstance(row["date"], date) else str(row["date"]) for row in rows]
-    values = [float(row["prcp_tenths_mm"] or 0) / 10 for row in rows]
-    option = _echarts_base("Daily precipitation (mm)")
+def build_acres_by_year_chart(columns: Columns, options: dict[str, Any]) -> dict[str, Any]:
+    years = sorted(set(columns["year"]))
+    states = sorted(set(columns["state_alpha"]))
+    totals = dict(zip(zip(columns["state_alpha"], columns["year"]), columns["total_value"]))
+    option = _echarts_base("Irrigated acres by year")
+    option.update(
+        {
+            "legend": {"data": states, "bottom": 8, "textStyle": {"fontSize": 16}},
+            "xAxis": {"type": "category", "data": [str(year) for year in years], "axisLabel": {"fontSize": 16}},
+            "yAxis": {"type": "value", "axisLabel": {"fontSize": 16}},
+            "series": [
+                {
+                    "name": state,
+                    "type": "line",
+                    "showSymbol": True,
+                    "data": [totals.get((state, year)) for year in years],
+                    "lineStyle": {"width": 2},
+                }
+                for state in states
+            ],
+        }
+    )
+    return option
+
+
+def build_precip_chart(columns: Columns, options: dict[str, Any], resolution: str) -> dict[str, Any]:
+    labels = columns["day"]
+    values = columns["prcp_mm"]
+    option = _echarts_base(f"{resolution.capitalize()} precipitation (mm)")
     option.update(
         {
             "xAxis": {"type": "category", "data": labels, "axisLabel": {"fontSize": 16}},
@@ -215,13 +404,11 @@ def build_precip_chart(cursor, options: dict[str, Any], station: str) -> dict[st
     return option
 
 
-def build_temp_dual_axis_chart(cursor, options: dict[str, Any], station: str) -> dict[str, Any]:
-    days = int(options.get("ghcn_days") or 30)
-    rows = _fetch_ghcn_timeseries(cursor, station, days)
-    labels = [row["date"].isoformat() if isinstance(row["date"], date) else str(row["date"]) for row in rows]
-    tmax = [float(row["tmax_tenths_c"] or 0) / 10 for row in rows]
-    tmin = [float(row["tmin_tenths_c"] or 0) / 10 for row in rows]
-    option = _echarts_base("Daily temperature (C)")
+def build_temp_dual_axis_chart(columns: Columns, options: dict[str, Any], resolution: str) -> dict[str, Any]:
+    labels = columns["day"]
+    tmax = columns["tmax_c"]
+    tmin = columns["tmin_c"]
+    option = _echarts_base(f"{resolution.capitalize()} temperature (C)")
     option.update(
         {
             "legend": {"data": ["Tmax", "Tmin"], "bottom": 8, "textStyle": {"fontSize": 16}},
@@ -261,11 +448,9 @@ def build_temp_dual_axis_chart(cursor, options: dict[str, Any], station: str) ->
     return option
 
 
-def build_ndvi_area_chart(cursor, options: dict[str, Any], site_id: str) -> dict[str, Any]:
-    limit = int(options.get("modis_points") or 12)
-    rows = _fetch_modis_timeseries(cursor, site_id, limit)
-    labels = [str(row["date"]) for row in rows]
-    values = [float(row["value"] or 0) for row in rows]
+def build_ndvi_area_chart(columns: Columns, options: dict[str, Any]) -> dict[str, Any]:
+    labels = columns["day"]
+    values = columns["value"]
     option = _echarts_base("NDVI trend")
     option.update(
         {
@@ -292,16 +477,8 @@ def build_ndvi_area_chart(cursor, options: dict[str, Any], site_id: str) -> dict
     return option
 
 
-def build_scatter_temp_precip_chart(cursor, options: dict[str, Any], station: str) -> dict[str, Any]:
-    days = int(options.get("ghcn_days") or 30)
-    rows = _fetch_ghcn_timeseries(cursor, station, days)
-    points = []
-    for row in rows:
-        tmax = row.get("tmax_tenths_c")
-        prcp = row.get("prcp_tenths_mm")
-        if tmax is None or prcp is None:
-            continue
-        points.append([float(tmax) / 10, float(prcp) / 10])
+def build_scatter_temp_precip_chart(columns: Columns, options: dict[str, Any], resolution: str) -> dict[str, Any]:
+    points = [list(pair) for pair in zip(columns["tmax_c"], columns["prcp_mm"])]
     option = _echarts_base("Temp vs precip scatter")
     option.update(
         {
@@ -309,7 +486,7 @@ def build_scatter_temp_precip_chart(cursor, options: dict[str, Any], station: st
             "yAxis": {"type": "value", "name": "Precip (mm)", "axisLabel": {"fontSize": 16}},
             "series": [
                 {
-                    "name": "Daily",
+                    "name": resolution.capitalize(),
                     "type": "scatter",
                     "data": points,
                     "symbolSize": 8,
@@ -321,7 +498,304 @@ def build_scatter_temp_precip_chart(cursor, options: dict[str, Any], station: st
     return option
 
 
-def build_chart_payload(chart_id: str, cursor, plan: ChartPlan, overrides: dict[str, Any], args: argparse.Namespace) -> dict[str, Any]:
+ENCODINGS = ("labels", "compact")
+# Decimal places kept per chart in compact encoding (plan "precision" or a chart's "precision" overrides).
+CHART_PRECISION = {
+    "quickstats_state_totals": 0,
+    "quickstats_acres_by_year": 0,
+    "ghcn_precip_last_days": 1,
+    "ghcn_temp_dual_axis": 1,
+    "ghcn_temp_precip_scatter": 1,
+    "modis_ndvi_trend": 3,
+}
+EPOCH = date(1970, 1, 1)
+
+
+def _compact_number(value: Any, precision: int) -> Any:
+    if value is None:
+        return None
+    rounded = round(float(value), precision)
+    return int(rounded) if rounded.is_integer() else rounded
+
+
+def _epoch_days(labels: list[Any]) -> list[int] | None:
+    days = []
+    for label in labels:
+        try:
+            days.append((date.fromisoformat(str(label)) - EPOCH).days)
+        except ValueError:
+            return None
+    return days
+
+
+def compact_option(option: dict[str, Any], precision: int) -> dict[str, Any]:
+    """Re-encode an option as column-major ``dataset.source`` with each dimension stored once.
+
+    Category axes of ISO dates become a time axis over epoch-day integers, listed in
+    ``hmi_encoding.epoch_days`` for the presenter to expand to milliseconds (an evenly
+    spaced axis is stored as ``hmi_encoding.day_steps`` [start, step] instead of a column);
+    series values are rounded to ``precision`` decimals and bound to their column with ``encode``.
+    """
+    x_axis = option.get("xAxis")
+    series = option.get("series") or []
+    encoded = {key: value for key, value in option.items() if key not in ("xAxis", "series")}
+    datasets: list[dict[str, Any]] = []
+    epoch_columns: list[str] = []
+    day_steps: dict[str, list[int]] = {}
+    new_series: list[dict[str, Any]] = []
+
+    labels = x_axis.get("data") if isinstance(x_axis, dict) and x_axis.get("type") == "category" else None
+    line_series = [item for item in series if item.get("type") != "scatter"]
+    if labels is not None and line_series and all(len(item.get("data") or []) == len(labels) for item in line_series):
+        days = _epoch_days(labels)
+        x_axis = {key: value for key, value in x_axis.items() if key != "data"}
+        source: dict[str, list[Any]] = {}
+        if days is not None:
+            x_axis["type"] = "time"
+            epoch_columns.append("x")
+            steps = {later - earlier for earlier, later in zip(days, days[1:])}
+            if len(days) > 2 and len(steps) == 1:
+                # Evenly spaced (daily/weekly) axes collapse to [start, step]; the presenter rebuilds them.
+                day_steps["x"] = [days[0], steps.pop()]
+            else:
+                source["x"] = days
+        else:
+            source["x"] = list(labels)
+        for position, item in enumerate(line_series):
+            column = f"y{position}"
+            source[column] = [_compact_number(value, precision) for value in item["data"]]
+            new_series.append(
+                {**{key: value for key, value in item.items() if key != "data"}, "datasetIndex": 0, "encode": {"x": "x", "y": column}}
+            )
+        datasets.append({"source": source})
+        series = [item for item in series if item.get("type") == "scatter"]
+    for item in series:
+        points = item.get("data") or []
+        if item.get("type") != "scatter" or not all(isinstance(point, (list, tuple)) and len(point) == 2 for point in points):
+            new_series.append(item)
+            continue
+        datasets.append(
+            {
+                "source": {
+                    "x": [_compact_number(point[0], precision) for point in points],
+                    "y": [_compact_number(point[1], precision) for point in points],
+                }
+            }
+        )
+        new_series.append(
+            {**{key: value for key, value in item.items() if key != "data"}, "datasetIndex": len(datasets) - 1, "encode": {"x": "x", "y": "y"}}
+        )
+
+    if not datasets:
+        return option
+    if x_axis is not None:
+        encoded["xAxis"] = x_axis
+    encoded["dataset"] = datasets
+    encoded["series"] = new_series
+    if epoch_columns:
+        # Epoch days are UTC midnights; keep the axis in UTC so labels do not shift a day.
+        encoded["useUTC"] = True
+        encoded["hmi_encoding"] = {"epoch_days": epoch_columns}
+        if day_steps:
+            encoded["hmi_encoding"]["day_steps"] = day_steps
+    return encoded
+
+
+def _spec_size(option: dict[str, Any]) -> int:
+    return len(json.dumps(option, separators=(",", ":"), default=str).encode("utf-8"))
+
+
+def _chart_encoding(plan: ChartPlan, chart: dict[str, Any], args: argparse.Namespace) -> tuple[str, int]:
+    encoding = chart.get("encoding") or getattr(args, "encoding", None) or plan.options.get("encoding") or "labels"
+    if encoding not in ENCODINGS:
+        raise ValueError(f"Unknown chart encoding: {encoding}")
+    precision = chart.get("precision", plan.options.get("precision", CHART_PRECISION.get(chart["id"], 2)))
+    return encoding, int(precision)
+
+
+# Datasets each chart reads; the planner fetches every distinct dataset of a plan once.
+CHART_DATASETS = {
+    "quickstats_state_totals": "state_summary",
+    "quickstats_acres_by_year": "state_year_totals",
+    "ghcn_precip_last_days": "ghcn_series",
+    "ghcn_temp_dual_axis": "ghcn_series",
+    "ghcn_temp_precip_scatter": "ghcn_pairs",
+    "modis_ndvi_trend": "modis_series",
+}
+
+
+def _modis_resolution(options: dict[str, Any]) -> str:
+    days = int(options.get("modis_days") or 0)
+    return _series_resolution(options, "modis_resolution", days, MODIS_NATIVE_DAYS) if days > 0 else "daily"
+
+
+def _fetch_dataset(cursor, key: tuple) -> Columns:
+    kind, *params = key
+    if kind == "state_summary":
+        return _fetch_state_summary(cursor, *params)
+    if kind == "state_year_totals":
+        return _fetch_state_year_totals(cursor)
+    if kind == "ghcn_series":
+        return _fetch_ghcn_timeseries(cursor, *params)
+    if kind == "ghcn_pairs":
+        return _fetch_ghcn_pairs(cursor, *params)
+    if kind == "modis_series":
+        return _fetch_modis_timeseries(cursor, *params)
+    raise ValueError(f"Unknown dataset: {kind}")
+
+
+def _connector(args: argparse.Namespace) -> tuple[Callable[[], Any], Callable[[], None]]:
+    """(connect, close) for the selected backend; sqlite loads the chart CSVs in-process."""
+    if getattr(args, "backend", "postgres") == "sqlite":
+        db = offline_chart_db.OfflineChartDB(Path(getattr(args, "assets_dir", None) or ASSETS_DIR))
+        return db.connect, db.close
+    config = _get_db_config()
+    return lambda: psycopg.connect(**config), lambda: None
+
+
+POOL_WAIT_SECONDS = 1.0
+
+
+class ConnectionPool:
+    """Small pool of connections (psycopg or offline) handed out to worker threads."""
+
+    def __init__(self, connect: Callable[[], Any], size: int) -> None:
+        self._connect = connect
+        self._size = max(1, size)
+        self._idle: queue.LifoQueue = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0
+
+    @contextmanager
+    def connection(self) -> Iterator[Any]:
+        conn = self._acquire()
+        discard = False
+        try:
+            yield conn
+        except BaseException:
+            try:
+                conn.rollback()
+            except Exception:
+                # Keep the original error; a connection that cannot roll back is not reused.
+                discard = True
+            raise
+        finally:
+            self._release(conn, discard)
+
+    def _acquire(self) -> Any:
+        while True:
+            try:
+                return self._idle.get_nowait()
+            except queue.Empty:
+                pass
+            with self._lock:
+                create = self._created < self._size
+                if create:
+                    self._created += 1
+            if create:
+                try:
+                    return self._connect()
+                except BaseException:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+            # Poll: a slot frees up when another worker fails to connect or drops a broken connection.
+            try:
+                return self._idle.get(timeout=POOL_WAIT_SECONDS)
+            except queue.Empty:
+                continue
+
+    def _release(self, conn: Any, discard: bool) -> None:
+        if discard or getattr(conn, "closed", False) or getattr(conn, "broken", False):
+            try:
+                conn.close()
+            except Exception:
+                pass
+            with self._lock:
+                self._created -= 1
+            return
+        self._idle.put(conn)
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+class DatasetPlanner:
+    """Request-scoped plan of the distinct datasets a ChartPlan needs, fetched once and cached."""
+
+    def __init__(self, plan: ChartPlan, args: argparse.Namespace, cache: dict[tuple, Columns] | None = None) -> None:
+        self.plan = plan
+        self.args = args
+        self.station: str | None = None
+        self.site_id: str | None = None
+        self.chart_keys: dict[int, tuple] = {}
+        # Batch runs pass one cache shared by every deck, so decks with the same options reuse datasets.
+        self.cache: dict[tuple, Columns] = {} if cache is None else cache
+        self.fetched = 0
+
+    def resolve(self, cursor) -> list[tuple]:
+        """Map every chart to a dataset key, picking the station/site only if some chart needs it."""
+        options = self.plan.options
+        sources = {}
+        for position, chart in enumerate(self.plan.charts):
+            chart_id = chart.get("id")
+            if chart_id not in CHART_DATASETS:
+                raise ValueError(f"Unknown chart id: {chart_id}")
+            sources[position] = CHART_DATASETS[chart_id]
+        if {"ghcn_series", "ghcn_pairs"} & set(sources.values()) and self.station is None:
+            self.station = _pick_ghcn_station(cursor, self.args.station, options)
+        if "modis_series" in sources.values() and self.site_id is None:
+            self.site_id = _pick_modis_site(cursor, self.args.site_id, options)
+        for position, source in sources.items():
+            if source == "state_summary":
+                key = (source, int(options.get("state_limit") or 6))
+            elif source == "state_year_totals":
+                key = (source,)
+            elif source in ("ghcn_series", "ghcn_pairs"):
+                key = (source, self.station, int(options.get("ghcn_days") or 30), _ghcn_resolution(options))
+            else:
+                key = (
+                    source,
+                    self.site_id,
+                    int(options.get("modis_points") or 12),
+                    int(options.get("modis_days") or 0),
+                    _modis_resolution(options),
+                )
+            self.chart_keys[position] = key
+        return list(dict.fromkeys(self.chart_keys.values()))
+
+    def fetch(self, cursor, pool: ConnectionPool | None = None, workers: int = 1) -> None:
+        """Fetch uncached datasets; with a pool, ``cursor``'s connection must be one of its ``workers``."""
+        missing = [key for key in dict.fromkeys(self.chart_keys.values()) if key not in self.cache]
+        if pool is None or workers <= 1 or len(missing) <= 1:
+            for key in missing:
+                self.cache[key] = _fetch_dataset(cursor, key)
+        else:
+
+            def fetch_one(key: tuple) -> Columns:
+                with pool.connection() as conn, conn.cursor() as pooled_cursor:
+                    columns = _fetch_dataset(pooled_cursor, key)
+                    conn.rollback()
+                    return columns
+
+            # The caller already holds a pooled connection, so it fetches the first dataset itself.
+            first, rest = missing[0], missing[1:]
+            with ThreadPoolExecutor(max_workers=min(workers - 1, len(rest))) as executor:
+                pending = executor.map(fetch_one, rest)
+                self.cache[first] = _fetch_dataset(cursor, first)
+                for key, columns in zip(rest, pending):
+                    self.cache[key] = columns
+        self.fetched += len(missing)
+
+    def columns(self, position: int) -> Columns:
+        return self.cache[self.chart_keys[position]]
+
+
+def build_chart_payload(chart_id: str, columns: Columns, plan: ChartPlan, overrides: dict[str, Any], datasets: DatasetPlanner) -> dict[str, Any]:
     title = overrides.get("chart_title")
     alt_text = overrides.get("alt_text")
     chart_type = overrides.get("chart_type")
@@ -331,34 +805,59 @@ def build_chart_payload(chart_id: str, cursor, plan: ChartPlan, overrides: dict[
     if height:
         layout_spec = {**layout_spec, "height": height}
 
-    station = _pick_ghcn_station(cursor, args.station, plan.options)
-    site_id = _pick_modis_site(cursor, args.site_id, plan.options)
+    station = datasets.station
+    site_id = datasets.site_id
 
     if chart_id == "quickstats_state_totals":
-        option = build_state_summary_chart(cursor, plan.options)
+        option = build_state_summary_chart(columns, plan.options)
         chart_type = chart_type or "bar"
         title = title or "Irrigated acres by state"
         alt_text = alt_text or "Bar chart comparing irrigated acres by state."
+    elif chart_id == "quickstats_acres_by_year":
+        option = build_acres_by_year_chart(columns, plan.options)
+        chart_type = chart_type or "line"
+        title = title or "Irrigated acres by year"
+        alt_text = alt_text or "Line chart showing irrigated acres per state by survey year."
     elif chart_id == "ghcn_precip_last_days":
-        option = build_precip_chart(cursor, plan.options, station)
+        resolution = _ghcn_resolution(plan.options)
+        option = build_precip_chart(columns, plan.options, resolution)
         chart_type = chart_type or "line"
-        title = title or f"Daily precipitation ({station})"
-        alt_text = alt_text or "Line chart showing daily precipitation in millimeters."
+        title = title or f"{resolution.capitalize()} precipitation ({station})"
+        alt_text = alt_text or (
+            "Line chart showing daily precipitation in millimeters."
+            if resolution == "daily"
+            else f"Line chart showing {resolution} precipitation totals in millimeters."
+        )
     elif chart_id == "ghcn_temp_dual_axis":
-        option = build_temp_dual_axis_chart(cursor, plan.options, station)
+        resolution = _ghcn_resolution(plan.options)
+        option = build_temp_dual_axis_chart(columns, plan.options, resolution)
         chart_type = chart_type or "dual_axis_line"
-        title = title or f"Daily temperature ({station})"
-        alt_text = alt_text or "Dual-axis line chart showing daily maximum and minimum temperatures."
+        title = title or f"{resolution.capitalize()} temperature ({station})"
+        alt_text = alt_text or (
+            "Dual-axis line chart showing daily maximum and minimum temperatures."
+            if resolution == "daily"
+            else f"Dual-axis line chart showing {resolution} means of the daily maximum and minimum temperatures."
+        )
     elif chart_id == "modis_ndvi_trend":
-        option = build_ndvi_area_chart(cursor, plan.options, site_id)
+        resolution = _modis_resolution(plan.options)
+        option = build_ndvi_area_chart(columns, plan.options)
         chart_type = chart_type or "area"
         title = title or f"NDVI trend ({site_id})"
-        alt_text = alt_text or "Area chart showing NDVI trend over time."
+        alt_text = alt_text or (
+            "Area chart showing NDVI trend over time."
+            if resolution == "daily"
+            else f"Area chart showing the {resolution} median NDVI over time."
+        )
     elif chart_id == "ghcn_temp_precip_scatter":
-        option = build_scatter_temp_precip_chart(cursor, plan.options, station)
+        resolution = _ghcn_resolution(plan.options)
+        option = build_scatter_temp_precip_chart(columns, plan.options, resolution)
         chart_type = chart_type or "scatter"
         title = title or f"Temp vs precip ({station})"
-        alt_text = alt_text or "Scatter chart comparing daily maximum temperature and precipitation."
+        alt_text = alt_text or (
+            "Scatter chart comparing daily maximum temperature and precipitation."
+            if resolution == "daily"
+            else f"Scatter chart comparing {resolution} mean maximum temperature and total precipitation."
+        )
     else:
         raise ValueError(f"Unknown chart id: {chart_id}")
 
@@ -376,7 +875,44 @@ def build_chart_payload(chart_id: str, cursor, plan: ChartPlan, overrides: dict[
     }
 
 
-def upsert_chart_metadata(cursor, deck_id: str, slide_index: int, payload: dict[str, Any]) -> None:
+CONTENT_FIELDS = ("chart_library", "chart_type", "chart_title", "alt_text", "data_spec", "layout_spec", "config_spec")
+
+
+def content_hash(payload: dict[str, Any]) -> str:
+    """sha256 of the chart fields as canonical JSON (sorted keys, no whitespace)."""
+    canonical = json.dumps(
+        {field: payload.get(field) for field in CONTENT_FIELDS},
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def upsert_chart_metadata(cursor, records: list[dict[str, Any]]) -> int:
+    """Upsert many chart rows in one statement; returns how many rows were inserted or changed.
+
+    Rows whose stored content_hash already matches are left untouched (no new tuple, no
+    updated_at bump), so re-running an unchanged plan writes nothing.
+    """
+    rows: dict[tuple[str, int], dict[str, Any]] = {}
+    for record in records:
+        # ON CONFLICT cannot touch the same key twice in one statement; the last chart for a slide wins.
+        rows[(record["deck_id"], int(record["slide_index"]))] = {
+            "deck_id": record["deck_id"],
+            "slide_index": int(record["slide_index"]),
+            "chart_library": record["chart_library"],
+            "chart_type": record.get("chart_type"),
+            "chart_title": record.get("chart_title"),
+            "alt_text": record.get("alt_text"),
+            "data_spec": record.get("data_spec") or {},
+            "layout_spec": record.get("layout_spec") or {},
+            "config_spec": record.get("config_spec") or {},
+            "content_hash": record.get("content_hash") or content_hash(record),
+        }
+    if not rows:
+        return 0
     cursor.execute(
         """
         INSERT INTO hmi_presenter.slide_chart_metadata (
@@ -388,9 +924,32 @@ def upsert_chart_metadata(cursor, deck_id: str, slide_index: int, payload: dict[
             alt_text,
             data_spec,
             layout_spec,
-            config_spec
+            config_spec,
+            content_hash
+        )
+        SELECT
+            deck_id,
+            slide_index,
+            chart_library,
+            chart_type,
+            chart_title,
+            alt_text,
+            data_spec,
+            layout_spec,
+            config_spec,
+            content_hash
+        FROM jsonb_to_recordset(%s::jsonb) AS incoming (
+            deck_id text,
+            slide_index integer,
+            chart_library text,
+            chart_type text,
+            chart_title text,
+            alt_text text,
+            data_spec jsonb,
+            layout_spec jsonb,
+            config_spec jsonb,
+            content_hash text
         )
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
         ON CONFLICT (deck_id, slide_index)
         DO UPDATE SET
             chart_library = EXCLUDED.chart_library,
@@ -400,43 +959,165 @@ def upsert_chart_metadata(cursor, deck_id: str, slide_index: int, payload: dict[
             data_spec = EXCLUDED.data_spec,
             layout_spec = EXCLUDED.layout_spec,
             config_spec = EXCLUDED.config_spec,
+            content_hash = EXCLUDED.content_hash,
             updated_at = now()
+        WHERE slide_chart_metadata.content_hash IS DISTINCT FROM EXCLUDED.content_hash
         """,
-        (
-            deck_id,
-            slide_index,
-            payload["chart_library"],
-            payload.get("chart_type"),
-            payload.get("chart_title"),
-            payload.get("alt_text"),
-            Json(payload.get("data_spec") or {}),
-            Json(payload.get("layout_spec") or {}),
-            Json(payload.get("config_spec") or {}),
-        ),
+        (Json(list(rows.values())),),
     )
+    return max(cursor.rowcount, 0)
+
+
+def _validate_plan(plan: ChartPlan) -> None:
+    for chart in plan.charts:
+        if not chart.get("id") or chart.get("slide_index") is None:
+            raise ValueError("Each chart requires id and slide_index")
+
+
+def generate_deck(
+    conn,
+    plan: ChartPlan,
+    args: argparse.Namespace,
+    cache: dict[tuple, Columns] | None = None,
+    pool: ConnectionPool | None = None,
+    workers: int = 1,
+) -> list[dict[str, Any]]:
+    """Build (and with --apply upsert) one deck's charts in its own transaction on ``conn``."""
+    datasets = DatasetPlanner(plan, args, cache)
+    with conn.cursor() as cursor:
+        keys = datasets.resolve(cursor)
+        datasets.fetch(cursor, pool, workers)
+        print(
+            f"{plan.deck_id}: planned {len(plan.charts)} charts over {len(keys)} distinct datasets "
+            f"({datasets.fetched} fetched)",
+            file=sys.stderr,
+        )
+        results = _build_deck(cursor, plan, datasets, args.apply)
+    if args.apply:
+        conn.commit()
+    else:
+        conn.rollback()
+    return results
 
 
 def run(plan: ChartPlan, args: argparse.Namespace) -> list[dict[str, Any]]:
-    config = _get_db_config()
+    connect, close_backend = _connector(args)
+    _validate_plan(plan)
+    workers = max(1, int(args.workers or 1))
+    # The deck's own connection comes from the pool too, so a deck never holds more than --workers.
+    pool = ConnectionPool(connect, workers)
+    try:
+        with pool.connection() as conn:
+            return generate_deck(conn, plan, args, pool=pool, workers=workers)
+    finally:
+        pool.close()
+        close_backend()
+
+
+def run_batch(plans: list[ChartPlan], args: argparse.Namespace) -> list[dict[str, Any]]:
+    """Generate many decks concurrently over one connection pool, one transaction per deck."""
+    deck_ids = [plan.deck_id for plan in plans]
+    duplicates = sorted({deck_id for deck_id in deck_ids if deck_ids.count(deck_id) > 1})
+    if duplicates:
+        raise ValueError(f"Duplicate deck_id in batch: {', '.join(duplicates)}")
+    for plan in plans:
+        _validate_plan(plan)
+
+    workers = max(1, int(args.workers or 1))
+    connect, close_backend = _connector(args)
+    pool = ConnectionPool(connect, workers)
+    cache: dict[tuple, Columns] = {}
+    started = time.perf_counter()
+
+    def build(plan: ChartPlan) -> dict[str, Any]:
+        deck_started = time.perf_counter()
+        with pool.connection() as conn:
+            results = generate_deck(conn, plan, args, cache)
+        print(f"{plan.deck_id}: {len(results)} charts in {time.perf_counter() - deck_started:.2f}s", file=sys.stderr)
+        return {"deck_id": plan.deck_id, "chart_count": len(results), "charts": results}
+
+    try:
+        with ThreadPoolExecutor(max_workers=min(workers, len(plans))) as executor:
+            decks = list(executor.map(build, plans))
+    finally:
+        pool.close()
+        close_backend()
+
+    elapsed = time.perf_counter() - started
+    chart_count = sum(deck["chart_count"] for deck in decks)
+    print(
+        f"Batch: {len(decks)} decks, {chart_count} charts in {elapsed:.2f}s "
+        f"({chart_count / elapsed if elapsed > 0 else 0.0:.1f} charts/sec, {workers} connections)",
+        file=sys.stderr,
+    )
+    return decks
+
+
+def load_batch_plans(
+    patterns: list[str], catalog: Path | None, template: Path, template_fallback: bool = False
+) -> list[ChartPlan]:
+    """Plans from files/globs, plus one per catalog deck.
+
+    A catalog deck names its plan with ``chart_plan`` (relative to the catalog). Decks
+    without one only get the template plan, including its fixed station/site, when
+    ``template_fallback`` is set, and each such deck is reported.
+    """
+    plans = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+        if not matches:
+            raise SystemExit(f"No plan files match: {pattern}")
+        for match in matches:
+            path = Path(match)
+            if not path.exists():
+                raise SystemExit(f"Plan file not found: {path}")
+            plans.append(load_plan(path))
+    if catalog is not None:
+        if not catalog.exists():
+            raise SystemExit(f"Deck catalog not found: {catalog}")
+        payload = json.loads(catalog.read_text(encoding="utf-8"))
+        for deck in payload.get("decks") or []:
+            deck_id = deck.get("id")
+            if not deck_id:
+                continue
+            if deck.get("chart_plan"):
+                plan_path = catalog.parent / deck["chart_plan"]
+            elif template_fallback:
+                print(f"Deck {deck_id} has no chart_plan in {catalog.name}; using template {template}", file=sys.stderr)
+                plan_path = template
+            else:
+                raise SystemExit(
+                    f"Deck {deck_id} has no chart_plan in {catalog}; add one or pass --template-fallback to use {template}"
+                )
+            plan = load_plan(plan_path)
+            plans.append(ChartPlan(deck_id=deck_id, charts=plan.charts, options=plan.options))
+    return plans
+
+
+def _build_deck(cursor, plan: ChartPlan, datasets: DatasetPlanner, apply: bool) -> list[dict[str, Any]]:
     results = []
-    with psycopg.connect(**config) as conn:
-        with conn.cursor() as cursor:
-            for chart in plan.charts:
-                chart_id = chart.get("id")
-                slide_index = chart.get("slide_index")
-                if not chart_id or slide_index is None:
-                    raise ValueError("Each chart requires id and slide_index")
-                payload = build_chart_payload(chart_id, cursor, plan, chart, args)
-                record = {
-                    "deck_id": plan.deck_id,
-                    "slide_index": int(slide_index),
-                    **payload,
-                }
-                results.append(record)
-                if args.apply:
-                    upsert_chart_metadata(cursor, plan.deck_id, int(slide_index), payload)
-        if args.apply:
-            conn.commit()
+    for position, chart in enumerate(plan.charts):
+        slide_index = int(chart["slide_index"])
+        payload = build_chart_payload(chart["id"], datasets.columns(position), plan, chart, datasets)
+        encoding, precision = _chart_encoding(plan, chart, datasets.args)
+        if encoding == "compact":
+            before = _spec_size(payload["data_spec"])
+            compact = compact_option(payload["data_spec"], precision)
+            after = _spec_size(compact)
+            if after < before:
+                payload["data_spec"] = compact
+            else:
+                after = before
+            print(
+                f"{plan.deck_id}: slide {slide_index} {chart['id']} data_spec {before} -> {after} bytes "
+                f"({before / after if after else 0.0:.1f}x smaller)",
+                file=sys.stderr,
+            )
+        results.append({"deck_id": plan.deck_id, "slide_index": slide_index, **payload, "content_hash": content_hash(payload)})
+    if apply:
+        changed = upsert_chart_metadata(cursor, results)
+        unchanged = len({(row["deck_id"], row["slide_index"]) for row in results}) - changed
+        print(f"{plan.deck_id}: {changed} charts written, {unchanged} unchanged", file=sys.stderr)
     return results
 
 
@@ -444,10 +1125,45 @@ def main() -> None:
     parser = argparse.ArgumentParser(description="Generate simplified ECharts charts from DB data")
     parser.add_argument("--plan", type=Path, default=DEFAULT_PLAN_PATH, help="Path to chart plan JSON")
     parser.add_argument("--apply", action="store_true", help="Upsert chart metadata into the DB")
+    parser.add_argument(
+        "--backend",
+        choices=BACKENDS,
+        default="postgres",
+        help="Data source: postgres (CLARKSOFT_PG_* env) or sqlite (builder CSVs loaded in-process, no server)",
+    )
+    parser.add_argument("--assets-dir", type=Path, default=ASSETS_DIR, help="CSV directory for --backend sqlite")
     parser.add_argument("--station", help="Override GHCN station id")
     parser.add_argument("--site-id", help="Override MODIS site id")
     parser.add_argument("--output", type=Path, help="Write generated payloads to a JSON file")
+    parser.add_argument("--workers", type=int, default=1, help="Fetch distinct datasets over this many connections")
+    parser.add_argument(
+        "--encoding",
+        choices=ENCODINGS,
+        help="data_spec encoding: labels (axis label arrays) or compact (column-major dataset, epoch-day time axis)",
+    )
+    parser.add_argument("--plans", nargs="+", default=[], help="Batch mode: plan JSON files or glob patterns")
+    parser.add_argument("--catalog", type=Path, help="Batch mode: deck catalog JSON (one plan per deck)")
+    parser.add_argument(
+        "--template-fallback",
+        action="store_true",
+        help="Give catalog decks without a chart_plan the --plan template",
+    )
     args = parser.parse_args()
+    if args.apply and args.backend != "postgres":
+        raise SystemExit("--apply writes slide_chart_metadata and needs --backend postgres")
+
+    if args.plans or args.catalog:
+        plans = load_batch_plans(args.plans, args.catalog, args.plan, args.template_fallback)
+        if not plans:
+            raise SystemExit("Batch mode found no decks to generate")
+        decks = run_batch(plans, args)
+        payload = {"deck_count": len(decks), "decks": decks}
+        if args.output:
+            args.output.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+            print(f"Wrote {sum(deck['chart_count'] for deck in decks)} charts for {len(decks)} decks to {args.output}")
+        else:
+            print(json.dumps(payload, indent=2))
+        return
 
     plan_path = args.plan
     if not plan_path.exists():
@@ -0,0 +1,151 @@
+"""Compact memory-mapped catalog of GHCN-Daily stations.
+
+``ghcnd-stations.txt`` is parsed once into fixed-width columns (id, state,
+name, lat, lon) sorted by state, written to one binary file and described
+by a JSON header that holds the per-state row ranges. Later runs map the
+file and slice a state's rows directly. The catalog is rebuilt only when
+the sha256 of the upstream file changes.
+"""
+from __future__ import annotations
+
+import array
+import json
+import mmap
+import os
+import pathlib
+import sys
+from typing import Dict, Iterable, List, Optional, Tuple
+
+CATALOG_VERSION = 1
+COLUMN_WIDTHS = {"id": 11, "state": 2, "name": 30}
+
+
+def _align(offset: int) -> int:
+    return (offset + 7) & ~7
+
+
+def _parse_stations(source: pathlib.Path) -> List[Tuple[str, str, str, float, float]]:
+    rows = []
+    with source.open("r", encoding="utf-8", errors="replace") as fh:
+        for line in fh:
+            if len(line) < 40:
+                continue
+            try:
+                lat = float(line[12:20])
+                lon = float(line[21:30])
+            except ValueError:
+                continue
+            rows.append((line[0:11].strip(), line[38:40].strip(), line[41:71].strip(), lat, lon))
+    rows.sort(key=lambda row: (row[1], row[0]))
+    return rows
+
+
+class StationCatalog:
+    def __init__(self, data_path: pathlib.Path, header: Dict) -> None:
+        self.header = header
+        self.count = int(header["count"])
+        self._fh = data_path.open("rb")
+        size = data_path.stat().st_size
+        self._map = mmap.mmap(self._fh.fileno(), size, access=mmap.ACCESS_READ) if size else None
+        self._view = memoryview(self._map) if self._map is not None else memoryview(b"")
+        offsets = header["offsets"]
+        self._text = {
+            name: self._view[offsets[name] : offsets[name] + width * self.count]
+            for name, width in COLUMN_WIDTHS.items()
+        }
+        self.lat = self._view[offsets["lat"] : offsets["lat"] + 8 * self.count].cast("d")
+        self.lon = self._view[offsets["lon"] : offsets["lon"] + 8 * self.count].cast("d")
+
+    @staticmethod
+    def paths(root: pathlib.Path) -> Tuple[pathlib.Path, pathlib.Path]:
+        return root / "ghcn_station_catalog.json", root / "ghcn_station_catalog.bin"
+
+    @classmethod
+    def open(cls, root: pathlib.Path, source_sha256: str) -> Optional["StationCatalog"]:
+        header_path, data_path = cls.paths(root)
+        if not header_path.exists() or not data_path.exists():
+            return None
+        try:
+            header = json.loads(header_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if (
+            header.get("version") != CATALOG_VERSION
+            or header.get("source_sha256") != source_sha256
+            or header.get("byteorder") != sys.byteorder
+            or header.get("size") != data_path.stat().st_size
+        ):
+            return None
+        return cls(data_path, header)
+
+    @classmethod
+    def build(cls, root: pathlib.Path, source: pathlib.Path, source_sha256: str) -> "StationCatalog":
+        rows = _parse_stations(source)
+        count = len(rows)
+        offsets: Dict[str, int] = {}
+        state_ranges: Dict[str, List[int]] = {}
+        for pos, row in enumerate(rows):
+            state_ranges.setdefault(row[1], [pos, pos])[1] = pos + 1
+
+        header_path, data_path = cls.paths(root)
+        root.mkdir(parents=True, exist_ok=True)
+        tmp_data = data_path.with_name(data_path.name + ".tmp")
+        with tmp_data.open("wb") as out:
+            for column, (name, width) in enumerate(COLUMN_WIDTHS.items()):
+                offsets[name] = out.tell()
+                out.write(b"".join(row[column].encode("utf-8")[:width].ljust(width) for row in rows))
+                out.write(b"\0" * (_align(out.tell()) - out.tell()))
+            for column, name in ((3, "lat"), (4, "lon")):
+                offsets[name] = out.tell()
+                array.array("d", (row[column] for row in rows)).tofile(out)
+            size = out.tell()
+        os.replace(tmp_data, data_path)
+
+        header = {
+            "version": CATALOG_VERSION,
+            "source_sha256": source_sha256,
+            "byteorder": sys.byteorder,
+            "count": count,
+            "size": size,
+            "offsets": offsets,
+            "states": state_ranges,
+        }
+        tmp_header = header_path.with_name(header_path.name + ".tmp")
+        tmp_header.write_text(json.dumps(header, indent=2, sort_keys=True), encoding="utf-8")
+        os.replace(tmp_header, header_path)
+        return cls(data_path, header)
+
+    def _text_at(self, name: str, pos: int) -> str:
+        width = COLUMN_WIDTHS[name]
+        return bytes(self._text[name][pos * width : (pos + 1) * width]).decode("utf-8", errors="replace").rstrip()
+
+    def row(self, pos: int) -> Dict[str, str]:
+        return {
+            "id": self._text_at("id", pos),
+            "lat": f"{self.lat[pos]:.4f}",
+            "lon": f"{self.lon[pos]:.4f}",
+            "state": self._text_at("state", pos),
+            "name": self._text_at("name", pos),
+        }
+
+    def state_range(self, state: str) -> Tuple[int, int]:
+        start, end = self.header["states"].get(state, (0, 0))
+        return start, end
+
+    def stations(self, states: Iterable[str] = ()) -> List[Dict[str, str]]:
+        states = [state for state in states if state]
+        if not states:
+            return [self.row(pos) for pos in range(self.count)]
+        ranges = sorted(self.state_range(state) for state in set(states))
+        return [self.row(pos) for start, end in ranges for pos in range(start, end)]
+
+    def close(self) -> None:
+        for column in self._text.values():
+            column.release()
+        self._text = {}
+        self.lat.release()
+        self.lon.release()
+        self._view.release()
+        if self._map is not None:
+            self._map.close()
+        self._fh.close()
@@ -0,0 +1,267 @@
+"""Seekable checkpoint index for large single-member gzip text files.
+
+Python's zlib cannot resume inflation at an arbitrary bit offset, so the
+index pass re-packs the decompressed text into independent gzip members
+(one per checkpoint) stored beside the source. Each checkpoint can then be
+inflated on its own, which lets a scan fan out across processes and restart
+from the last finished checkpoint. Rows are csv records, so checkpoints never
+split a quoted field that holds a newline. A scan capped at ``max_rows`` only indexes
+up to the checkpoint holding that row; such a partial index is reused by any
+later scan with the same or a smaller cap.
+"""
+from __future__ import annotations
+
+import codecs
+import gzip
+import json
+import os
+import pathlib
+import zlib
+from typing import Dict, Iterator, List, Optional, Tuple
+
+INDEX_VERSION = 3
+DEFAULT_CHUNK_ROWS = 250_000
+READ_BLOCK = 4 << 20
+INFLATE_BLOCK = 1 << 20
+
+
+def index_paths(source: pathlib.Path) -> tuple[pathlib.Path, pathlib.Path]:
+    return (
+        source.with_name(source.name + ".idx.json"),
+        source.with_name(source.name + ".chunks.gz"),
+    )
+
+
+def _source_signature(source: pathlib.Path) -> Dict[str, int]:
+    stat = source.stat()
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def load_index(
+    source: pathlib.Path, chunk_rows: int = DEFAULT_CHUNK_ROWS, max_rows: int = 0, delimiter: str = "\t"
+) -> Optional[Dict]:
+    index_path, chunks_path = index_paths(source)
+    if not index_path.exists() or not chunks_path.exists():
+        return None
+    try:
+        index = json.loads(index_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if index.get("version") != INDEX_VERSION or index.get("chunk_rows") != chunk_rows:
+        return None
+    if index.get("delimiter") != delimiter:
+        return None
+    limit = index.get("max_rows") or 0
+    if limit and not (max_rows and max_rows <= limit):
+        return None
+    if index.get("source") != _source_signature(source):
+        return None
+    if index.get("chunks_size") != chunks_path.stat().st_size:
+        return None
+    index["chunks_path"] = str(chunks_path)
+    return index
+
+
+def _line_ends_quoted(data: bytes, pos: int, end: int, quoted: bool, delimiter: bytes) -> bool:
+    # Same rules as the csv module's default dialect: a quote opens a quoted field only at the
+    # start of a field, a doubled quote inside one is literal, anything else is field text.
+    while pos < end:
+        if quoted:
+            quote = data.find(b'"', pos, end)
+            if quote < 0:
+                return True
+            if data[quote + 1:quote + 2] == b'"':
+                pos = quote + 2
+                continue
+            quoted = False
+            pos = quote + 1
+        elif data[pos:pos + 1] == b'"':
+            quoted = True
+            pos += 1
+            continue
+        sep = data.find(delimiter, pos, end)
+        if sep < 0:
+            return False
+        pos = sep + 1
+    return quoted
+
+
+def record_ends(data: bytes, quoted: bool = False, delimiter: bytes = b"\t") -> Tuple[List[int], bool]:
+    """Offsets just past each newline in ``data`` that ends a csv record.
+
+    A newline inside a quoted field belongs to the field, so it does not end a
+    row; ``quoted`` carries that state across blocks.
+    """
+    ends = []
+    pos = 0
+    size = len(data)
+    while pos < size:
+        newline = data.find(b"\n", pos)
+        end = size if newline < 0 else newline + 1
+        if quoted or data.find(b'"', pos, end) >= 0:
+            quoted = _line_ends_quoted(data, pos, end, quoted, delimiter)
+        if not quoted and newline >= 0:
+            ends.append(end)
+        pos = end
+    return ends, quoted
+
+
+def build_index(
+    source: pathlib.Path, chunk_rows: int = DEFAULT_CHUNK_ROWS, max_rows: int = 0, delimiter: str = "\t"
+) -> Dict:
+    """Re-pack ``source`` into checkpoints of ``chunk_rows`` csv records each.
+
+    Rows are csv records, the same unit ``csv.reader`` yields, so a quoted
+    field holding a newline never straddles two checkpoints and row numbers
+    agree with a sequential scan. Blocks without a quote character take the
+    plain newline count.
+    """
+    index_path, chunks_path = index_paths(source)
+    tmp_chunks = chunks_path.with_name(chunks_path.name + ".tmp")
+    sep = delimiter.encode("utf-8")
+    checkpoints = []
+    header = b""
+    text_offset = 0
+    row_count = 0
+    truncated = False
+
+    with gzip.open(source, "rb") as src, tmp_chunks.open("wb") as out:
+        pending = b""
+        while b"\n" not in pending:
+            block = src.read(READ_BLOCK)
+            if not block:
+                break
+            pending += block
+        header, _, pending = pending.partition(b"\n")
+        text_offset = len(header) + 1
+
+        member = None
+        member_rows = 0
+        member_start = 0
+        member_text_offset = text_offset
+        quoted = False
+
+        def close_member() -> None:
+            nonlocal member, member_rows
+            out.write(member.flush())
+            checkpoints.append(
+                {
+                    "offset": member_start,
+                    "length": out.tell() - member_start,
+                    "text_offset": member_text_offset,
+                    "first_row": row_count - member_rows,
+                    "rows": member_rows,
+                }
+            )
+            member = None
+            member_rows = 0
+
+        # Blocks are processed up to their last newline; the partial line waits for the next read.
+        carry = pending
+        finished = False
+        unterminated = False
+        while not finished and not truncated:
+            block = src.read(READ_BLOCK)
+            if block:
+                data = carry + block
+                split = data.rfind(b"\n") + 1
+                data, carry = data[:split], data[split:]
+            else:
+                finished = True
+                data, carry = carry, b""
+                unterminated = bool(data) and not data.endswith(b"\n")
+            while data:
+                if member is None:
+                    member = zlib.compressobj(1, zlib.DEFLATED, 31)
+                    member_start = out.tell()
+                    member_text_offset = text_offset
+                need = chunk_rows - member_rows
+                if not quoted and b'"' not in data:
+                    rows = data.count(b"\n")
+                    after = False
+                    cut = len(data) - len(data.split(b"\n", need)[-1]) if rows >= need else len(data)
+                else:
+                    ends, after = record_ends(data, quoted, sep)
+                    rows = len(ends)
+                    cut = ends[need - 1] if rows >= need else len(data)
+                if rows < need:
+                    out.write(member.compress(data))
+                    member_rows += rows
+                    row_count += rows
+                    text_offset += len(data)
+                    quoted = after
+                    break
+                # Cut right after the record that fills this checkpoint.
+                out.write(member.compress(data[:cut]))
+                member_rows += need
+                row_count += need
+                text_offset += cut
+                close_member()
+                quoted = False
+                data = data[cut:]
+                if max_rows and row_count >= max_rows:
+                    # Later checkpoints start at or past max_rows, so a capped scan never reads them.
+                    truncated = True
+                    break
+
+        if member is not None:
+            # A last line without a newline, or an unclosed quote, is one more record to csv.reader.
+            if not truncated and (quoted or unterminated):
+                member_rows += 1
+                row_count += 1
+            if member_rows:
+                close_member()
+
+    os.replace(tmp_chunks, chunks_path)
+    index = {
+        "version": INDEX_VERSION,
+        "chunk_rows": chunk_rows,
+        "delimiter": delimiter,
+        "source": _source_signature(source),
+        "chunks_size": chunks_path.stat().st_size,
+        "header": header.decode("utf-8", errors="replace").rstrip("\r"),
+        "row_count": row_count,
+        "max_rows": max_rows if truncated else 0,
+        "checkpoints": checkpoints,
+    }
+    tmp_index = index_path.with_name(index_path.name + ".tmp")
+    tmp_index.write_text(json.dumps(index, indent=2), encoding="utf-8")
+    os.replace(tmp_index, index_path)
+    index["chunks_path"] = str(chunks_path)
+    return index
+
+
+def ensure_index(
+    source: pathlib.Path, chunk_rows: int = DEFAULT_CHUNK_ROWS, max_rows: int = 0, delimiter: str = "\t"
+) -> Dict:
+    return load_index(source, chunk_rows, max_rows, delimiter) or build_index(source, chunk_rows, max_rows, delimiter)
+
+
+def remove_index(source: pathlib.Path) -> None:
+    for path in index_paths(source):
+        try:
+            path.unlink()
+        except OSError:
+            pass
+
+
+def iter_checkpoint_lines(chunks_path: pathlib.Path, checkpoint: Dict) -> Iterator[str]:
+    inflater = zlib.decompressobj(31)
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    remaining = int(checkpoint["length"])
+    partial = ""
+    with open(chunks_path, "rb") as fh:
+        fh.seek(int(checkpoint["offset"]))
+        while remaining > 0:
+            block = fh.read(min(INFLATE_BLOCK, remaining))
+            if not block:
+                break
+            remaining -= len(block)
+            text = partial + decoder.decode(inflater.decompress(block))
+            lines = text.split("\n")
+            partial = lines.pop()
+            for line in lines:
+                yield line + "\n"
+    text = partial + decoder.decode(inflater.flush(), final=True)
+    if text:
+        yield text
@@ -0,0 +1,221 @@
+"""Content-addressed on-disk HTTP cache shared by the static chart-data builders.
+
+Bodies are stored once under ``objects/<sha256>`` and mapped from URLs in
+``index.json`` together with their ETag/Last-Modified validators. Every
+fetch revalidates with If-None-Match/If-Modified-Since unless the entry is
+younger than the caller's ``max_age``, interrupted downloads resume with a
+Range request, and the least recently used bodies are evicted once the
+cache grows past ``max_bytes``. Fetches of the same URL are serialised, so
+concurrent callers never write the same partial file.
+"""
+from __future__ import annotations
+
+import hashlib
+import http.client
+import json
+import os
+import pathlib
+import threading
+import time
+from typing import Dict, Optional
+
+from fetch_pool import FetchPool, HTTPStatusError
+
+DEFAULT_MAX_BYTES = 4 << 30
+READ_BLOCK = 1 << 20
+
+
+class HttpCache:
+    def __init__(self, root: pathlib.Path, max_bytes: int = DEFAULT_MAX_BYTES, client: Optional[FetchPool] = None) -> None:
+        self.root = root
+        self.max_bytes = max_bytes
+        self.client = client or FetchPool()
+        self.objects_dir = root / "objects"
+        self.partial_dir = root / "partial"
+        self.index_path = root / "index.json"
+        self._lock = threading.Lock()
+        self._url_locks: Dict[str, threading.Lock] = {}
+        self._index: Optional[Dict[str, Dict]] = None
+        self.stats = {"hits": 0, "misses": 0, "resumed": 0, "bytes_fetched": 0}
+
+    def _count(self, name: str, delta: int = 1) -> None:
+        with self._lock:
+            self.stats[name] += delta
+
+    def _load_index(self) -> Dict[str, Dict]:
+        if self._index is None:
+            try:
+                self._index = json.loads(self.index_path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                self._index = {}
+        return self._index
+
+    def _save_index(self) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.index_path.with_name(f"{self.index_path.name}.{threading.get_ident()}.tmp")
+        tmp_path.write_text(json.dumps(self._index, indent=2, sort_keys=True), encoding="utf-8")
+        os.replace(tmp_path, self.index_path)
+
+    def _partial_paths(self, url: str) -> tuple[pathlib.Path, pathlib.Path]:
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return self.partial_dir / f"{key}.part", self.partial_dir / f"{key}.json"
+
+    def cached_path(self, url: str) -> Optional[pathlib.Path]:
+        with self._lock:
+            entry = self._load_index().get(url)
+        if not entry:
+            return None
+        path = self.objects_dir / entry["sha256"]
+        return path if path.exists() else None
+
+    def fetch(self, url: str, headers: Optional[Dict[str, str]] = None, max_age: float = 0) -> pathlib.Path:
+        with self._lock:
+            url_lock = self._url_locks.setdefault(url, threading.Lock())
+        with url_lock:
+            return self._fetch(url, headers, max_age)
+
+    def _fetch(self, url: str, headers: Optional[Dict[str, str]], max_age: float) -> pathlib.Path:
+        request_headers = dict(headers or {})
+        with self._lock:
+            entry = dict(self._load_index().get(url) or {})
+        cached = self.objects_dir / entry["sha256"] if entry else None
+        if cached is not None and cached.exists():
+            if max_age and time.time() - entry.get("fetched_at", 0) < max_age:
+                self._count("hits")
+                self._touch(url)
+                return cached
+            if entry.get("etag"):
+                request_headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                request_headers["If-Modified-Since"] = entry["last_modified"]
+        else:
+            cached = None
+
+        part_path, part_meta_path = self._partial_paths(url)
+        offset = 0
+        if part_path.exists() and part_meta_path.exists():
+            part_meta = json.loads(part_meta_path.read_text(encoding="utf-8"))
+            validator = part_meta.get("etag") or part_meta.get("last_modified")
+            if validator:
+                offset = part_path.stat().st_size
+                request_headers["Range"] = f"bytes={offset}-"
+                request_headers["If-Range"] = validator
+
+        with self.client.request(url, request_headers) as resp:
+            if resp.status == 304 and cached is not None:
+                self._count("hits")
+                self._touch(url, revalidated=True)
+                return cached
+            if resp.status == 416 and offset:
+                resp.read()
+            elif resp.status >= 300:
+                raise HTTPStatusError(url, resp.status, resp.reason)
+            else:
+                return self._store(url, resp, offset)
+        # The server rejected the resume offset; fetch the whole body again.
+        self._discard_partial(url)
+        return self._fetch(url, headers, max_age)
+
+    def _store(self, url: str, resp, offset: int) -> pathlib.Path:
+        part_path, part_meta_path = self._partial_paths(url)
+        self.partial_dir.mkdir(parents=True, exist_ok=True)
+        validators = {
+            "etag": resp.headers.get("ETag"),
+            "last_modified": resp.headers.get("Last-Modified"),
+        }
+        digest = hashlib.sha256()
+        if resp.status == 206 and offset:
+            self._count("resumed")
+            with part_path.open("rb") as fh:
+                for block in iter(lambda: fh.read(READ_BLOCK), b""):
+                    digest.update(block)
+            mode = "ab"
+        else:
+            mode = "wb"
+        part_meta_path.write_text(json.dumps(validators), encoding="utf-8")
+        received = 0
+        with part_path.open(mode) as fh:
+            try:
+                for block in iter(lambda: resp.read(READ_BLOCK), b""):
+                    fh.write(block)
+                    digest.update(block)
+                    received += len(block)
+            except http.client.IncompleteRead as exc:
+                fh.write(exc.partial)
+                received += len(exc.partial)
+        self._count("bytes_fetched", received)
+        expected = resp.headers.get("Content-Length")
+        if expected is not None and expected.isdigit() and received != int(expected):
+            # Keep the partial body so the next fetch can resume with a Range request.
+            raise OSError(f"Incomplete download for {url}: {received} of {expected} bytes")
+        self._count("misses")
+
+        sha256 = digest.hexdigest()
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        target = self.objects_dir / sha256
+        if target.exists():
+            part_path.unlink()
+        else:
+            os.replace(part_path, target)
+        part_meta_path.unlink()
+
+        with self._lock:
+            index = self._load_index()
+            previous = index.get(url)
+            index[url] = {
+                "sha256": sha256,
+                "size": target.stat().st_size,
+                "last_access": time.time(),
+                "fetched_at": time.time(),
+                **validators,
+            }
+            if previous and previous["sha256"] != sha256:
+                self._drop_unreferenced(previous["sha256"])
+            self._evict(keep=sha256)
+            self._save_index()
+        return target
+
+    def _drop_unreferenced(self, sha256: str) -> None:
+        if any(entry["sha256"] == sha256 for entry in (self._index or {}).values()):
+            return
+        try:
+            (self.objects_dir / sha256).unlink()
+        except OSError:
+            pass
+
+    def _touch(self, url: str, revalidated: bool = False) -> None:
+        with self._lock:
+            entry = self._load_index().get(url)
+            if entry:
+                entry["last_access"] = time.time()
+                if revalidated:
+                    entry["fetched_at"] = entry["last_access"]
+                self._save_index()
+
+    def _discard_partial(self, url: str) -> None:
+        for path in self._partial_paths(url):
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+    def _evict(self, keep: str) -> None:
+        index = self._index or {}
+        blobs: Dict[str, Dict] = {}
+        for url, entry in index.items():
+            blob = blobs.setdefault(entry["sha256"], {"size": entry["size"], "last_access": 0.0, "urls": []})
+            blob["last_access"] = max(blob["last_access"], entry["last_access"])
+            blob["urls"].append(url)
+        total = sum(blob["size"] for blob in blobs.values())
+        for sha256, blob in sorted(blobs.items(), key=lambda item: item[1]["last_access"]):
+            if total <= self.max_bytes:
+                break
+            if sha256 == keep:
+                continue
+            try:
+                (self.objects_dir / sha256).unlink()
+            except OSError:
+                pass
+            for url in blob["urls"]:
+                index.pop(url, None)
+            total -= blob["size"]
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""Bulk load the static chart CSVs into the hmi_presenter chart tables (PG17).
+
+Each CSV is streamed as-is into a text staging table with COPY FROM STDIN,
+converted to the table types in one INSERT ... SELECT, and swapped into its
+target table. All selected datasets are replaced in a single transaction
+and each load is recorded in hmi_presenter.chart_ingest_runs.
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import datetime as dt
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any
+
+try:
+    import psycopg
+    from psycopg import sql
+except ImportError as exc:
+    raise SystemExit("psycopg is required. Install in the venv before running.") from exc
+
+from chart_tables import DATASETS, PARTITION_KEYS
+
+ROOT = Path(__file__).resolve().parents[1]
+ASSETS_DIR = ROOT / "assets" / "data"
+MANIFEST_PATH = ASSETS_DIR / "chart_build_manifest.json"
+COPY_BLOCK = 1 << 20
+
+# Staging columns are text; these expressions convert them on the way into the target table.
+CONVERSIONS = {
+    "text": "NULLIF(btrim({col}), '')",
+    "numeric": (
+        "CASE WHEN btrim(replace({col}, ',', '')) ~ '^[-+]?([0-9]+[.]?[0-9]*|[.][0-9]+)$' "
+        "THEN btrim(replace({col}, ',', ''))::numeric END"
+    ),
+    "integer": "CASE WHEN btrim({col}) ~ '^[-+]?[0-9]+$' THEN btrim({col})::integer END",
+    "date": "CASE WHEN btrim({col}) ~ '^[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]$' THEN btrim({col})::date END",
+}
+
+# Partitioned tables (migration 012) -> function creating the yearly partitions for a span of years.
+PARTITION_FUNCTIONS = {"ghcn_daily_summary": "ensure_ghcn_partitions"}
+
+# Materialized rollup pyramids (migration 009) refreshed whenever their base table is reloaded.
+PYRAMID_VIEWS = {
+    "ghcn_daily_summary": "ghcn_summary_pyramid",
+    "modis_ndvi_timeseries": "modis_ndvi_pyramid",
+}
+
+
+def _get_env(name: str) -> str:
+    value = os.environ.get(name)
+    if not value:
+        raise ValueError(f"{name} is not set")
+    return value
+
+
+def _get_db_config() -> dict[str, Any]:
+    return {
+        "host": os.environ.get("CLARKSOFT_PG_HOST", "127.0.0.1"),
+        "port": int(os.environ.get("CLARKSOFT_PG_PORT", "5434")),
+        "dbname": _get_env("CLARKSOFT_PG_DB"),
+        "user": _get_env("CLARKSOFT_PG_USER"),
+        "password": _get_env("CLARKSOFT_PG_PASSWORD"),
+    }
+
+
+def _read_header(path: Path) -> list[str]:
+    with path.open("r", encoding="utf-8", newline="") as fh:
+        return next(csv.reader(fh), [])
+
+
+def _count_rows(path: Path) -> int:
+    with path.open("r", encoding="utf-8", newline="") as fh:
+        return max(0, sum(1 for _ in csv.reader(fh)) - 1)
+
+
+def _source_uris() -> dict[str, str]:
+    try:
+        manifest = json.loads(MANIFEST_PATH.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    url = manifest.get("quickstats", {}).get("source_url")
+    if not url:
+        return {}
+    return {table: url for table in DATASETS if table.startswith("quickstats_")}
+
+
+def _select_list(header: list[str], columns: list[tuple[str, str, str]]) -> sql.Composed:
+    present = set(header)
+    exprs = []
+    for _, kind, source in columns:
+        if source in present:
+            exprs.append(sql.SQL(CONVERSIONS[kind]).format(col=sql.Identifier(source)))
+        else:
+            # Older CSVs (e.g. MODIS before the pixel statistics) simply load NULLs.
+            exprs.append(sql.NULL)
+    return sql.SQL(", ").join(exprs)
+
+
+def _load_dataset(cursor: "psycopg.Cursor", table: str, path: Path, header: list[str]) -> int:
+    _, columns = DATASETS[table]
+    stage = sql.Identifier(f"stage_{table}")
+    cursor.execute(
+        sql.SQL("CREATE TEMP TABLE {} ({}) ON COMMIT DROP").format(
+            stage, sql.SQL(", ").join(sql.SQL("{} text").format(sql.Identifier(name)) for name in header)
+        )
+    )
+    with cursor.copy(sql.SQL("COPY {} FROM STDIN WITH (FORMAT csv, HEADER true)").format(stage)) as copy:
+        with path.open("rb") as fh:
+            for block in iter(lambda: fh.read(COPY_BLOCK), b""):
+                copy.write(block)
+
+    target = sql.Identifier("hmi_presenter", table)
+    cursor.execute(sql.SQL("TRUNCATE {}").format(target))
+    where = sql.SQL("")
+    if table in PARTITION_KEYS:
+        # Rows need a partition key; create any missing yearly partitions before routing into them.
+        key = next((kind, source) for name, kind, source in columns if name == PARTITION_KEYS[table])
+        key_expr = sql.SQL(CONVERSIONS[key[0]]).format(col=sql.Identifier(key[1]))
+        where = sql.SQL(" WHERE {} IS NOT NULL").format(key_expr)
+        cursor.execute(
+            sql.SQL(
+                "SELECT {}(min(year), max(year)) "
+                "FROM (SELECT extract(year FROM {})::integer AS year FROM {}) AS years "
+                "WHERE year IS NOT NULL HAVING count(*) > 0"
+            ).format(sql.Identifier("hmi_presenter", PARTITION_FUNCTIONS[table]), key_expr, stage)
+        )
+    cursor.execute(
+        sql.SQL("INSERT INTO {} ({}) SELECT {} FROM {}{}").format(
+            target,
+            sql.SQL(", ").join(sql.Identifier(name) for name, _, _ in columns),
+            _select_list(header, columns),
+            stage,
+            where,
+        )
+    )
+    row_count = cursor.rowcount
+    cursor.execute(sql.SQL("ANALYZE {}").format(target))
+    return row_count
+
+
+def load_chart_data(tables: list[str], run_id: str, assets_dir: Path = ASSETS_DIR, dry_run: bool = False) -> None:
+    sources = []
+    for table in tables:
+        path = assets_dir / DATASETS[table][0]
+        if not path.exists():
+            raise SystemExit(f"CSV not found for {table}: {path}")
+        header = _read_header(path)
+        key_column = DATASETS[table][1][0][2]
+        if key_column not in header:
+            raise SystemExit(f"{path.name} is missing required column: {key_column}")
+        sources.append((table, path, header))
+
+    if dry_run:
+        for table, path, _ in sources:
+            print(f"{table}: {_count_rows(path)} rows from {path.name}")
+        return
+
+    source_uris = _source_uris()
+    config = _get_db_config()
+    with psycopg.connect(**config) as conn:
+        with conn.cursor() as cursor:
+            for table, path, header in sources:
+                started = time.perf_counter()
+                row_count = _load_dataset(cursor, table, path, header)
+                elapsed = time.perf_counter() - started
+                cursor.execute(
+                    """
+                    INSERT INTO hmi_presenter.chart_ingest_runs
+                        (run_id, source_name, source_uri, file_path, row_count, notes)
+                    VALUES (%s, %s, %s, %s, %s, %s)
+                    """,
+                    (
+                        run_id,
+                        table,
+                        source_uris.get(table),
+                        str(path),
+                        row_count,
+                        f"COPY load in {elapsed:.2f}s",
+                    ),
+                )
+                print(f"{table}: {row_count} rows in {elapsed:.2f}s")
+            for table, _, _ in sources:
+                view = PYRAMID_VIEWS.get(table)
+                if view:
+                    started = time.perf_counter()
+                    cursor.execute(sql.SQL("REFRESH MATERIALIZED VIEW {}").format(sql.Identifier("hmi_presenter", view)))
+                    print(f"{view}: refreshed in {time.perf_counter() - started:.2f}s")
+        # TRUNCATE locks each target until commit, so readers never see a half-loaded table.
+        conn.commit()
+
+    print(f"Loaded {len(sources)} chart dataset(s) for run {run_id}.")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Bulk load static chart CSVs into hmi_presenter tables")
+    parser.add_argument(
+        "--dataset",
+        action="append",
+        choices=list(DATASETS),
+        default=[],
+        help="Table to load (repeatable; default: all)",
+    )
+    parser.add_argument("--assets-dir", default=str(ASSETS_DIR), help="Directory holding the builder CSVs")
+    parser.add_argument("--run-id", default="", help="Ingest run id (default: chart_load_<UTC timestamp>)")
+    parser.add_argument("--dry-run", action="store_true", help="Validate and report row counts only")
+    args = parser.parse_args()
+
+    tables = args.dataset or list(DATASETS)
+    run_id = args.run_id or f"chart_load_{dt.datetime.now(dt.timezone.utc):%Y%m%dT%H%M%SZ}"
+    load_chart_data(tables, run_id, Path(args.assets_dir), dry_run=args.dry_run)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,58 @@
 #!/usr/bin/env python3
-"""Log ML improvement runs, steps, and prediction outputs to PG17."""
+"""Log ML improvement runs, steps, and prediction outputs to PG17.
+
+Steps and prediction batches go in as multi-row INSERT ... RETURNING id, so
+batch_key/step_key references are resolved to ids before any prediction is
+written. Predictions are then streamed with binary COPY, --batch-size rows per
+COPY and transaction, instead of one INSERT per prediction. The run row's
+predictions_complete flag (migration 013) stays false until the transaction
+that commits the last batch, so a crash mid-stream never looks like a full run.
+"""
 from __future__ import annotations
 
 import argparse
 import json
 import os
+import sys
+import time
+from decimal import Decimal, InvalidOperation
 from pathlib import Path
 from typing import Any
 
 try:
     import psycopg
-    from psycopg.types.json import Json
+    from psycopg.types.json import Json, Jsonb
 except ImportError as exc:
     raise SystemExit("psycopg is required. Install in the venv before running.") from exc
 
+DEFAULT_BATCH_SIZE = 50000
+# Rows per multi-row INSERT; keeps the bind parameters well under the 65535 limit.
+INSERT_CHUNK = 1000
+
+STEP_COLUMNS = (
+    "run_id", "step_name", "algorithm", "algorithm_variant", "seed",
+    "status", "metrics", "params", "training_seconds", "model_path", "notes",
+)
+BATCH_COLUMNS = (
+    "run_id", "step_id", "batch_key", "dataset_id", "dataset_version",
+    "split", "record_count", "metrics", "notes",
+)
+# ml_predictions columns and their binary COPY types (migration 005).
+PREDICTION_COLUMNS = (
+    ("batch_id", "int8"),
+    ("run_id", "text"),
+    ("step_id", "int8"),
+    ("sample_id", "text"),
+    ("input_ref", "text"),
+    ("target", "jsonb"),
+    ("prediction", "jsonb"),
+    ("score", "numeric"),
+    ("rank", "int4"),
+    ("error_flags", "jsonb"),
+    ("metadata", "jsonb"),
+)
+JSON_NULL = Jsonb(None)
+
 
 def _get_env(name: str) -> str:
     value = os.environ.get(name)
@@ -79,18 +118,165 @@ def _resolve_step_id(step_map: dict[str, int], step_ref: Any, steps: list[dict[s
     return step_map.get(str(step_ref))
 
 
-def log_improvement(payload: dict[str, Any], dry_run: bool = False) -> None:
+def _insert_returning_ids(
+    cursor: "psycopg.Cursor", table: str, columns: tuple[str, ...], rows: list[tuple]
+) -> list[int]:
+    """Multi-row INSERT into hmi_presenter.<table>; returns the new ids in row order."""
+    ids: list[int] = []
+    placeholders = "(" + ", ".join("%s" for _ in columns) + ")"
+    for offset in range(0, len(rows), INSERT_CHUNK):
+        chunk = rows[offset : offset + INSERT_CHUNK]
+        cursor.execute(
+            f"INSERT INTO hmi_presenter.{table} ({', '.join(columns)}) "
+            f"VALUES {', '.join(placeholders for _ in chunk)} RETURNING id",
+            [value for row in chunk for value in row],
+        )
+        # bigserial ids are drawn in VALUES order; sorting does not rely on RETURNING order.
+        ids.extend(sorted(row[0] for row in cursor.fetchall()))
+    return ids
+
+
+def _numeric(value: Any) -> Decimal | None:
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        raise ValueError(f"not a number: {value!r}")
+    # str() first so floats keep their JSON spelling (as the text INSERT did).
+    try:
+        number = value if isinstance(value, Decimal) else Decimal(str(value))
+    except InvalidOperation:
+        raise ValueError(f"not a number: {value!r}") from None
+    if not number.is_finite():
+        raise ValueError(f"not a finite number: {value!r}")
+    return number
+
+
+def _integer(value: Any) -> int | None:
+    number = _numeric(value)
+    if number is None:
+        return None
+    if number != number.to_integral_value():
+        raise ValueError(f"not an integer: {value!r}")
+    return int(number)
+
+
+def _text(value: Any) -> str | None:
+    # Binary COPY of a text column only takes str; the old INSERT cast numbers implicitly.
+    return None if value is None else str(value)
+
+
+def _check_predictions(predictions: list[Any]) -> None:
+    """Reject bad score/rank values before anything is committed (COPY would fail mid-stream)."""
+    for index, pred in enumerate(predictions):
+        if not isinstance(pred, dict):
+            continue
+        try:
+            _numeric(pred.get("score"))
+            _integer(pred.get("rank"))
+        except ValueError as exc:
+            raise ValueError(f"predictions[{index}]: {exc}") from None
+
+
+def _json(value: Any) -> Any:
+    # COPY sends None as SQL NULL; an explicit null in the payload stays a JSON null, as with Json().
+    return JSON_NULL if value is None else value
+
+
+def _prediction_rows(
+    run_id: str,
+    predictions: list[Any],
+    batch_map: dict[str, int],
+    step_map: dict[str, int],
+    steps: list[dict[str, Any]],
+):
+    default_batch_id = next(iter(batch_map.values())) if batch_map else None
+    # Payloads reuse a handful of step refs across millions of rows; resolve each once.
+    step_ids: dict[Any, int | None] = {}
+    for index, pred in enumerate(predictions):
+        if not isinstance(pred, dict):
+            continue
+        batch_key = pred.get("batch_key")
+        batch_id = batch_map.get(str(batch_key)) if batch_key else default_batch_id
+        if not batch_id:
+            continue
+        step_ref = pred.get("step_key") or pred.get("step_index")
+        try:
+            step_id = step_ids[step_ref]
+        except KeyError:
+            step_id = step_ids[step_ref] = _resolve_step_id(step_map, step_ref, steps)
+        except TypeError:
+            step_id = _resolve_step_id(step_map, step_ref, steps)
+        yield (
+            batch_id,
+            run_id,
+            step_id,
+            str(pred.get("sample_id") or index),
+            _text(pred.get("input_ref")),
+            _json(pred.get("target", {})),
+            _json(pred.get("prediction", {})),
+            _numeric(pred.get("score")),
+            _integer(pred.get("rank")),
+            _json(pred.get("error_flags", [])),
+            _json(pred.get("metadata", {})),
+        )
+
+
+def _copy_predictions(
+    conn: "psycopg.Connection",
+    run_id: str,
+    predictions: list[Any],
+    batch_map: dict[str, int],
+    step_map: dict[str, int],
+    steps: list[dict[str, Any]],
+    batch_size: int,
+) -> tuple[int, int]:
+    """Binary COPY predictions, committing every batch_size rows; returns (written, skipped).
+
+    The last batch commits together with predictions_complete = true on the run row.
+    """
+    rows = _prediction_rows(run_id, predictions, batch_map, step_map, steps)
+    statement = (
+        "COPY hmi_presenter.ml_predictions "
+        f"({', '.join(name for name, _ in PREDICTION_COLUMNS)}) FROM STDIN (FORMAT BINARY)"
+    )
+    written = 0
+    while True:
+        chunk = 0
+        with conn.cursor() as cursor:
+            with cursor.copy(statement) as copy:
+                copy.set_types([kind for _, kind in PREDICTION_COLUMNS])
+                for row in rows:
+                    copy.write_row(row)
+                    chunk += 1
+                    if chunk >= batch_size:
+                        break
+            if chunk < batch_size:
+                cursor.execute(
+                    "UPDATE hmi_presenter.ml_improvement_runs SET predictions_complete = true WHERE run_id = %s",
+                    (run_id,),
+                )
+        conn.commit()
+        written += chunk
+        if chunk < batch_size:
+            return written, len(predictions) - written
+
+
+def log_improvement(payload: dict[str, Any], dry_run: bool = False, batch_size: int = DEFAULT_BATCH_SIZE) -> None:
+    if batch_size < 1:
+        raise ValueError("batch_size must be at least 1")
     run = _normalize_run(payload)
     steps = payload.get("steps") or []
     datasets = payload.get("datasets") or []
     synthetic_runs = payload.get("synthetic_runs") or []
     batches = payload.get("prediction_batches") or []
     predictions = payload.get("predictions") or []
+    _check_predictions(predictions)
 
     if dry_run:
         print(f"Run: {run['run_id']}")
         print(f"Steps: {len(steps)} | Datasets: {len(datasets)} | Synthetic runs: {len(synthetic_runs)}")
         print(f"Prediction batches: {len(batches)} | Predictions: {len(predictions)}")
+        print(f"Prediction COPY batches: {-(-len(predictions) // batch_size)} of up to {batch_size} rows")
         return
 
     config = _get_db_config()
@@ -101,8 +287,8 @@ def log_improvement(payload: dict[str, Any], dry_run: bool = False) -> None:
                 INSERT INTO hmi_presenter.ml_improvement_runs
                     (run_id, project_key, goal, status, mode, algorithms,
                      dataset_id, dataset_version, synthetic_profile, metrics,
-                     params, source_paths, artifact_paths, notes)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                     params, source_paths, artifact_paths, notes, predictions_complete)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
                 ON CONFLICT (run_id) DO UPDATE
                     SET project_key = EXCLUDED.project_key,
                         goal = EXCLUDED.goal,
@@ -116,7 +302,8 @@ def log_improvement(payload: dict[str, Any], dry_run: bool = False) -> None:
                         params = EXCLUDED.params,
                         source_paths = EXCLUDED.source_paths,
                         artifact_paths = EXCLUDED.artifact_paths,
-                        notes = EXCLUDED.notes
+                        notes = EXCLUDED.notes,
+                        predictions_complete = EXCLUDED.predictions_complete
                 """,
                 (
                     run["run_id"],
@@ -133,6 +320,8 @@ def log_improvement(payload: dict[str, Any], dry_run: bool = False) -> None:
                     Json(run.get("source_paths", [])),
                     Json(run.get("artifact_paths", [])),
                     run.get("notes"),
+                    # Set by the transaction of the last COPY batch when there are predictions.
+                    not predictions,
                 ),
             )
 
@@ -200,18 +389,14 @@ def log_improvement(payload: dict[str, Any], dry_run: bool = False) -> None:
                     "DELETE FROM hmi_presenter.ml_improvement_steps WHERE run_id = %s",
                     (run["run_id"],),
                 )
-                for index, step in enumerate(steps):
-                    if not isinstance(step, dict):
-                        continue
-                    key = _step_key(step, index)
-                    cursor.execute(
-                        """
-                        INSERT INTO hmi_presenter.ml_improvement_steps
-                            (run_id, step_name, algorithm, algorithm_variant, seed,
-                             status, metrics, params, training_seconds, model_path, notes)
-                        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                        RETURNING id
-                        """,
+                step_rows = [
+                    (index, step) for index, step in enumerate(steps) if isinstance(step, dict)
+                ]
+                step_ids = _insert_returning_ids(
+                    cursor,
+                    "ml_improvement_steps",
+                    STEP_COLUMNS,
+                    [
                         (
                             run["run_id"],
                             step.get("step_name"),
@@ -224,10 +409,12 @@ def log_improvement(payload: dict[str, Any], dry_run: bool = False) -> None:
                             step.get("training_seconds"),
                             step.get("model_path"),
                             step.get("notes"),
-                        ),
-                    )
-                    step_id = cursor.fetchone()[0]
-                    step_map[key] = step_id
+                        )
+                        for _, step in step_rows
+                    ],
+                )
+                for (index, step), step_id in zip(step_rows, step_ids):
+                    step_map[_step_key(step, index)] = step_id
 
             batch_map: dict[str, int] = {}
             if batches or predictions:
@@ -237,23 +424,21 @@ def log_improvement(payload: dict[str, Any], dry_run: bool = False) -> None:
                 )
 
             if batches:
-                for index, batch in enumerate(batches):
-                    if not isinstance(batch, dict):
-                        continue
-                    key = _batch_key(batch, index)
-                    step_ref = batch.get("step_key") or batch.get("step_index")
-                    step_id = _resolve_step_id(step_map, step_ref, steps)
-                    cursor.execute(
-                        """
-                        INSERT INTO hmi_presenter.ml_prediction_batches
-                            (run_id, step_id, batch_key, dataset_id, dataset_version,
-                             split, record_count, metrics, notes)
-                        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-                        RETURNING id
-                        """,
+                batch_rows = [
+                    (_batch_key(batch, index), batch)
+                    for index, batch in enumerate(batches)
+                    if isinstance(batch, dict)
+                ]
+                batch_ids = _insert_returning_ids(
+                    cursor,
+                    "ml_prediction_batches",
+                    BATCH_COLUMNS,
+                    [
                         (
                             run["run_id"],
-                            step_id,
+                            _resolve_step_id(
+                                step_map, batch.get("step_key") or batch.get("step_index"), steps
+                            ),
                             key,
                             batch.get("dataset_id"),
                             batch.get("dataset_version"),
@@ -261,54 +446,56 @@ def log_improvement(payload: dict[str, Any], dry_run: bool = False) -> None:
                             batch.get("record_count"),
                             Json(batch.get("metrics", {})),
                             batch.get("notes"),
-                        ),
-                    )
-                    batch_id = cursor.fetchone()[0]
+                        )
+                        for key, batch in batch_rows
+                    ],
+                )
+                for (key, _), batch_id in zip(batch_rows, batch_ids):
                     batch_map[key] = batch_id
 
-            if predictions:
-                default_batch_id = None
-                if batch_map:
-                    default_batch_id = next(iter(batch_map.values()))
-                for index, pred in enumerate(predictions):
-                    if not isinstance(pred, dict):
-                        continue
-                    batch_key = pred.get("batch_key")
-                    batch_id = batch_map.get(str(batch_key)) if batch_key else default_batch_id
-                    if not batch_id:
-                        continue
-                    step_ref = pred.get("step_key") or pred.get("step_index")
-                    step_id = _resolve_step_id(step_map, step_ref, steps)
-                    cursor.execute(
-                        """
-                        INSERT INTO hmi_presenter.ml_predictions
-                            (batch_id, run_id, step_id, sample_id, input_ref,
-                             target, prediction, score, rank, error_flags, metadata)
-                        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                        """,
-                        (
-                            batch_id,
-                            run["run_id"],
-                            step_id,
-                            pred.get("sample_id") or str(index),
-                            pred.get("input_ref"),
-                            Json(pred.get("target", {})),
-                            Json(pred.get("prediction", {})),
-                            pred.get("score"),
-                            pred.get("rank"),
-                            Json(pred.get("error_flags", [])),
-                            Json(pred.get("metadata", {})),
-                        ),
-                    )
-
+        # Run, steps and batches are committed before the predictions stream in;
+        # re-running the payload replaces the batches (and cascades to their predictions).
         conn.commit()
 
+        if predictions:
+            started = time.perf_counter()
+            try:
+                written, skipped = _copy_predictions(
+                    conn, run["run_id"], predictions, batch_map, step_map, steps, batch_size
+                )
+            except BaseException:
+                # Earlier chunks are committed; drop the run's batches (cascading to their
+                # predictions). predictions_complete stays false, also if this cleanup fails.
+                try:
+                    conn.rollback()
+                    with conn.cursor() as cursor:
+                        cursor.execute(
+                            "DELETE FROM hmi_presenter.ml_prediction_batches WHERE run_id = %s",
+                            (run["run_id"],),
+                        )
+                    conn.commit()
+                except psycopg.Error as cleanup_exc:
+                    print(
+                        f"Could not remove the partial predictions of {run['run_id']}: {cleanup_exc}",
+                        file=sys.stderr,
+                    )
+                raise
+            elapsed = time.perf_counter() - started
+            rate = written / elapsed if elapsed > 0 else 0.0
+            print(f"Predictions: {written} copied in {elapsed:.2f}s ({rate:,.0f}/s), {skipped} skipped")
+
     print(f"Logged ML improvement run {run['run_id']}.")
 
 
 def main() -> None:
     parser = argparse.ArgumentParser(description="Log ML improvement runs and predictions")
     parser.add_argument("--input", required=True, help="Path to JSON payload")
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+        help="Predictions per binary COPY (each committed on its own)",
+    )
     parser.add_argument("--dry-run", action="store_true", help="Validate and report counts only")
     args = parser.parse_args()
 
@@ -317,7 +504,7 @@ def main() -> None:
         raise SystemExit(f"Input JSON not found: {input_path}")
 
     payload = _load_payload(input_path)
-    log_improvement(payload, dry_run=args.dry_run)
+    log_improvement(payload, dry_run=args.dry_run, batch_size=args.batch_size)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,153 @@
+"""Per-date aggregation of MODIS /subset pixel grids.
+
+Each record's ``data`` list is reshaped to ``nrows`` x ``ncols``, optionally
+cropped to a centred window, masked for the fill value and valid range,
+scaled, and reduced to mean/median/p10/p90 plus the valid-pixel fraction.
+NumPy is used when installed (all dates of a response are reduced in one
+stacked array); otherwise an equivalent pure-Python path runs.
+"""
+from __future__ import annotations
+
+import math
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # optional; the builder stays stdlib-only
+    np = None
+
+STAT_FIELDS = ["value", "value_median", "value_p10", "value_p90", "valid_fraction", "pixel_count"]
+DEFAULT_FILL_VALUE = -3000
+DEFAULT_VALID_RANGE = (-2000, 10000)
+ROUND_DIGITS = 4
+
+
+def _scale(record: Dict[str, Any], subset: Dict[str, Any]) -> float:
+    # ORNL /subset sends the scale at the top level next to nrows/ncols; a per-record value wins.
+    try:
+        scale = float(record.get("scale") or subset.get("scale"))
+    except (TypeError, ValueError):
+        return 1.0
+    return scale if scale else 1.0
+
+
+def _grid_shape(subset: Dict[str, Any], size: int) -> Tuple[int, int]:
+    try:
+        nrows = int(subset.get("nrows") or 0)
+        ncols = int(subset.get("ncols") or 0)
+    except (TypeError, ValueError):
+        nrows = ncols = 0
+    if nrows * ncols != size:
+        return 1, size
+    return nrows, ncols
+
+
+def _window_bounds(nrows: int, ncols: int, pixel_window: int) -> Tuple[int, int, int, int]:
+    if pixel_window <= 0:
+        return 0, nrows, 0, ncols
+    row_start = max(0, nrows // 2 - pixel_window // 2)
+    col_start = max(0, ncols // 2 - pixel_window // 2)
+    return row_start, min(nrows, row_start + pixel_window), col_start, min(ncols, col_start + pixel_window)
+
+
+def _percentile(ordered: Sequence[float], q: float) -> float:
+    # Linear interpolation between closest ranks, matching numpy's default.
+    pos = (len(ordered) - 1) * q
+    lo = math.floor(pos)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (pos - lo)
+
+
+def _stats_python(
+    values: Sequence[float], nrows: int, ncols: int, scale: float, fill_value: float, valid_range: Tuple[float, float], pixel_window: int
+) -> Dict[str, Any]:
+    row_start, row_end, col_start, col_end = _window_bounds(nrows, ncols, pixel_window)
+    window = [values[r * ncols + c] for r in range(row_start, row_end) for c in range(col_start, col_end)]
+    low, high = valid_range
+    valid = sorted(v * scale for v in window if v != fill_value and low <= v <= high)
+    stats: Dict[str, Any] = {"pixel_count": len(window), "valid_fraction": round(len(valid) / len(window), ROUND_DIGITS) if window else 0.0}
+    if not valid:
+        return {**stats, "value": "", "value_median": "", "value_p10": "", "value_p90": ""}
+    return {
+        **stats,
+        "value": round(sum(valid) / len(valid), ROUND_DIGITS),
+        "value_median": round(_percentile(valid, 0.5), ROUND_DIGITS),
+        "value_p10": round(_percentile(valid, 0.1), ROUND_DIGITS),
+        "value_p90": round(_percentile(valid, 0.9), ROUND_DIGITS),
+    }
+
+
+def _stats_numpy(
+    grids: List[List[float]], nrows: int, ncols: int, scales: List[float], fill_value: float, valid_range: Tuple[float, float], pixel_window: int
+) -> List[Dict[str, Any]]:
+    row_start, row_end, col_start, col_end = _window_bounds(nrows, ncols, pixel_window)
+    raw = np.asarray(grids, dtype=np.float64).reshape(len(grids), nrows, ncols)
+    raw = raw[:, row_start:row_end, col_start:col_end].reshape(len(grids), -1)
+    low, high = valid_range
+    valid = (raw != fill_value) & (raw >= low) & (raw <= high)
+    scaled = np.where(valid, raw * np.asarray(scales)[:, None], np.nan)
+    counts = valid.sum(axis=1)
+    pixel_count = raw.shape[1]
+    results: List[Dict[str, Any]] = [
+        {"pixel_count": pixel_count, "valid_fraction": round(float(count) / pixel_count, ROUND_DIGITS) if pixel_count else 0.0}
+        for count in counts
+    ]
+    has_valid = counts > 0
+    if has_valid.any():
+        subset = scaled[has_valid]
+        means = np.nanmean(subset, axis=1)
+        p10, median, p90 = np.nanpercentile(subset, [10, 50, 90], axis=1)
+        for pos, row in zip(np.flatnonzero(has_valid), range(len(subset))):
+            results[pos].update(
+                {
+                    "value": round(float(means[row]), ROUND_DIGITS),
+                    "value_median": round(float(median[row]), ROUND_DIGITS),
+                    "value_p10": round(float(p10[row]), ROUND_DIGITS),
+                    "value_p90": round(float(p90[row]), ROUND_DIGITS),
+                }
+            )
+    for result in results:
+        for name in ("value", "value_median", "value_p10", "value_p90"):
+            result.setdefault(name, "")
+    return results
+
+
+def _as_values(data: Any) -> Optional[List[float]]:
+    if isinstance(data, (int, float)):
+        return [float(data)]
+    if not isinstance(data, list) or not data:
+        return None
+    try:
+        return [float(item) for item in data]
+    except (TypeError, ValueError):
+        return None
+
+
+def aggregate_records(
+    subset: Dict[str, Any],
+    records: List[Dict[str, Any]],
+    fill_value: float = DEFAULT_FILL_VALUE,
+    valid_range: Tuple[float, float] = DEFAULT_VALID_RANGE,
+    pixel_window: int = 0,
+) -> List[Dict[str, Any]]:
+    """Return one stats dict per record (same order); records without pixels get empty stats."""
+    grids = [_as_values(record.get("data")) for record in records]
+    results: List[Dict[str, Any]] = [{name: "" for name in STAT_FIELDS} for _ in records]
+    # Group by grid size so a response reduces as one stacked array per shape.
+    by_size: Dict[int, List[int]] = {}
+    for pos, grid in enumerate(grids):
+        if grid:
+            by_size.setdefault(len(grid), []).append(pos)
+    for size, positions in by_size.items():
+        nrows, ncols = _grid_shape(subset, size)
+        scales = [_scale(records[pos], subset) for pos in positions]
+        if np is not None:
+            stats = _stats_numpy([grids[pos] for pos in positions], nrows, ncols, scales, fill_value, valid_range, pixel_window)
+        else:
+            stats = [
+                _stats_python(grids[pos], nrows, ncols, scale, fill_value, valid_range, pixel_window)
+                for pos, scale in zip(positions, scales)
+            ]
+        for pos, result in zip(positions, stats):
+            results[pos] = result
+    return results
@@ -0,0 +1,300 @@
+"""In-process SQLite stand-in for the hmi_presenter chart tables.
+
+Loads the builder CSVs (``assets/data``) into an in-memory SQLite database
+attached as ``hmi_presenter`` so the Postgres ``_fetch_*`` queries in
+generate_simple_charts run unchanged apart from a few dialect rewrites
+(placeholders, ``CURRENT_DATE - n days``, ``to_char`` and ``sum``). Tables
+are loaded on first use, with the same conversions as the COPY loader, and the
+migration 009 pyramids are computed here with the same period boundaries and
+aggregates. Sums and means are taken in Decimal like Postgres numeric, so the
+column arrays (and chart payloads) match the Postgres backend. ``CURRENT_DATE``
+is evaluated in UTC.
+"""
+from __future__ import annotations
+
+import csv
+import itertools
+import re
+import sqlite3
+import threading
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+from pathlib import Path
+from typing import Any
+
+from chart_tables import DATASETS, PARTITION_KEYS
+
+SCHEMA = "hmi_presenter"
+NUMBER_PATTERN = re.compile(r"^[-+]?([0-9]+\.?[0-9]*|\.[0-9]+)$")
+INTEGER_PATTERN = re.compile(r"^[-+]?[0-9]+$")
+DATE_PATTERN = re.compile(r"^[0-9]{4}-[0-9]{2}-[0-9]{2}$")
+# Pyramid view -> base table it is computed from.
+PYRAMIDS = {"ghcn_summary_pyramid": "ghcn_daily_summary", "modis_ndvi_pyramid": "modis_ndvi_timeseries"}
+TABLE_REFERENCE = re.compile(rf"\b{SCHEMA}\.(\w+)")
+DATE_OFFSET = re.compile(r"CURRENT_DATE - \(%s \* INTERVAL '1 day'\)")
+# Dates are stored as ISO text here, so to_char(..., 'YYYY-MM-DD') is the column itself.
+TO_CHAR_DATE = re.compile(r"to_char\((\w+), 'YYYY-MM-DD'\)")
+# Generated columns from the migrations, in SQLite spelling.
+GENERATED = {
+    "modis_ndvi_timeseries": [
+        # date() only normalises 2023-02-30 to 2023-03-02 when given a modifier.
+        (
+            "obs_date",
+            "CASE WHEN date GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]' AND date NOT GLOB '0000-*'"
+            " AND date(date, '+0 days') = date THEN date END",
+        ),
+    ],
+}
+
+_counter = itertools.count()
+
+
+def _convert(value: str, kind: str) -> Any:
+    cleaned = value.strip()
+    if kind == "text":
+        return cleaned or None
+    if kind == "numeric":
+        cleaned = cleaned.replace(",", "")
+        return float(cleaned) if NUMBER_PATTERN.match(cleaned) else None
+    if kind == "integer":
+        return int(cleaned) if INTEGER_PATTERN.match(cleaned) else None
+    if kind == "date":
+        return cleaned if DATE_PATTERN.match(cleaned) else None
+    raise ValueError(f"Unknown column conversion: {kind}")
+
+
+def translate(query: str) -> str:
+    """Rewrite the Postgres spellings used by the chart queries into SQLite."""
+    query = DATE_OFFSET.sub("date('now', '-' || ? || ' days')", query).replace("%s", "?")
+    query = TO_CHAR_DATE.sub(r"\1", query)
+    return re.sub(r"\bsum\(", "decimal_sum(", query)
+
+
+class DecimalSum:
+    """sum() in Decimal, like Postgres numeric, instead of accumulating doubles."""
+
+    def __init__(self) -> None:
+        self.total: Decimal | None = None
+
+    def step(self, value: Any) -> None:
+        if value is not None:
+            # str() of a stored double is the shortest text that round-trips, i.e. the CSV value.
+            self.total = (self.total or Decimal(0)) + Decimal(str(value))
+
+    def finalize(self) -> str | None:
+        return None if self.total is None else str(self.total)
+
+
+def _week_start(day: date) -> date:
+    return day - timedelta(days=day.weekday())
+
+
+def _month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def _season_start(day: date) -> date:
+    # date_trunc('quarter', d + 1 month) - 1 month: DJF, MAM, JJA, SON.
+    month = day.month % 12 + 1
+    year = day.year + (1 if day.month == 12 else 0)
+    quarter_month = (month - 1) // 3 * 3 + 1
+    if quarter_month == 1:
+        return date(year - 1, 12, 1)
+    return date(year, quarter_month - 1, 1)
+
+
+PERIODS = {"weekly": _week_start, "monthly": _month_start, "seasonal": _season_start}
+
+
+def _mean(values: list[Decimal]) -> str | None:
+    return str(sum(values) / len(values)) if values else None
+
+
+def _median(values: list[float]) -> float:
+    # percentile_cont(0.5): linear interpolation between the middle rows, in double precision.
+    ordered = sorted(values)
+    position = 0.5 * (len(ordered) - 1)
+    lower = int(position)
+    if lower + 1 >= len(ordered):
+        return ordered[lower]
+    return ordered[lower] + (ordered[lower + 1] - ordered[lower]) * (position - lower)
+
+
+class OfflineChartDB:
+    """Shared in-memory database; ``connect()`` hands out connections usable from any thread."""
+
+    def __init__(self, assets_dir: Path) -> None:
+        self.assets_dir = assets_dir
+        self.uri = f"file:hmi_presenter_offline_{next(_counter)}?mode=memory&cache=shared"
+        self._loaded: set[str] = set()
+        self._lock = threading.Lock()
+        # Keeps the shared in-memory database alive for the lifetime of this object.
+        self._keeper = self._open()
+
+    def _open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(":memory:", check_same_thread=False)
+        conn.execute(f"ATTACH DATABASE '{self.uri}' AS {SCHEMA}")
+        conn.create_aggregate("decimal_sum", 1, DecimalSum)
+        return conn
+
+    def connect(self) -> "OfflineConnection":
+        return OfflineConnection(self, self._open())
+
+    def close(self) -> None:
+        self._keeper.close()
+
+    def ensure(self, table: str) -> None:
+        with self._lock:
+            if table in self._loaded:
+                return
+            if table in PYRAMIDS:
+                self._load_table(PYRAMIDS[table])
+                self._build_pyramid(table)
+            else:
+                self._load_table(table)
+
+    def _load_table(self, table: str) -> None:
+        if table in self._loaded:
+            return
+        if table not in DATASETS:
+            raise ValueError(f"Table not available offline: {SCHEMA}.{table}")
+        filename, columns = DATASETS[table]
+        path = self.assets_dir / filename
+        names = [name for name, _, _ in columns]
+        required = names.index(PARTITION_KEYS[table]) if table in PARTITION_KEYS else None
+        rows = []
+        if path.exists():
+            with path.open("r", encoding="utf-8", newline="") as fh:
+                for record in csv.DictReader(fh):
+                    row = tuple(_convert(record.get(source) or "", kind) for _, kind, source in columns)
+                    if required is None or row[required] is not None:
+                        rows.append(row)
+        affinity = {"integer": "INTEGER", "numeric": "REAL"}
+        definitions = [f'"{name}" {affinity.get(kind, "TEXT")}' for name, kind, _ in columns]
+        definitions += [f'"{name}" TEXT GENERATED ALWAYS AS ({expr}) STORED' for name, expr in GENERATED.get(table, [])]
+        self._keeper.execute(f'CREATE TABLE {SCHEMA}."{table}" ({", ".join(definitions)})')
+        column_list = ", ".join(f'"{name}"' for name in names)
+        self._keeper.executemany(
+            f'INSERT INTO {SCHEMA}."{table}" ({column_list}) VALUES ({", ".join("?" for _ in columns)})', rows
+        )
+        self._keeper.commit()
+        self._loaded.add(table)
+
+    def _build_pyramid(self, view: str) -> None:
+        base = PYRAMIDS[view]
+        cursor = self._keeper.cursor()
+        if view == "ghcn_summary_pyramid":
+            cursor.execute(
+                f"SELECT station, date, prcp_tenths_mm, tmax_tenths_c, tmin_tenths_c FROM {SCHEMA}.{base} "
+                "WHERE station IS NOT NULL AND date IS NOT NULL"
+            )
+            groups: dict[tuple, list[tuple]] = defaultdict(list)
+            for station, day, prcp, tmax, tmin in cursor.fetchall():
+                observed = date.fromisoformat(day)
+                for resolution, start in PERIODS.items():
+                    groups[(resolution, station, start(observed))].append((observed, prcp, tmax, tmin))
+            rows = []
+            for (resolution, station, start), members in groups.items():
+                prcp = [Decimal(str(m[1])) for m in members if m[1] is not None]
+                tmax = [Decimal(str(m[2])) for m in members if m[2] is not None]
+                tmin = [Decimal(str(m[3])) for m in members if m[3] is not None]
+                rows.append(
+                    (
+                        resolution,
+                        station,
+                        start.isoformat(),
+                        max(m[0] for m in members).isoformat(),
+                        len(members),
+                        str(sum(prcp)) if prcp else None,
+                        _mean(tmax),
+                        _mean(tmin),
+                    )
+                )
+            cursor.execute(
+                f"CREATE TABLE {SCHEMA}.{view} (resolution TEXT, station TEXT, period_start TEXT, period_end TEXT, "
+                "day_count INTEGER, prcp_tenths_mm REAL, tmax_tenths_c REAL, tmin_tenths_c REAL)"
+            )
+        else:
+            cursor.execute(f"SELECT site_id, date, value FROM {SCHEMA}.{base} WHERE site_id IS NOT NULL AND value IS NOT NULL")
+            groups = defaultdict(list)
+            for site_id, day, value in cursor.fetchall():
+                if not day or not DATE_PATTERN.match(day):
+                    continue
+                observed = date.fromisoformat(day)
+                for resolution, start in PERIODS.items():
+                    groups[(resolution, site_id, start(observed))].append((observed, float(value)))
+            rows = [
+                (
+                    resolution,
+                    site_id,
+                    start.isoformat(),
+                    max(m[0] for m in members).isoformat(),
+                    len(members),
+                    _median([m[1] for m in members]),
+                )
+                for (resolution, site_id, start), members in groups.items()
+            ]
+            cursor.execute(
+                f"CREATE TABLE {SCHEMA}.{view} (resolution TEXT, site_id TEXT, period_start TEXT, period_end TEXT, "
+                "observation_count INTEGER, value REAL)"
+            )
+        if rows:
+            cursor.executemany(f"INSERT INTO {SCHEMA}.{view} VALUES ({', '.join('?' for _ in rows[0])})", rows)
+        self._keeper.commit()
+        self._loaded.add(view)
+
+
+class OfflineCursor:
+    """psycopg-style cursor (``%s`` params, dict rows) over an OfflineChartDB connection."""
+
+    def __init__(self, db: OfflineChartDB, conn: sqlite3.Connection) -> None:
+        self._db = db
+        self._cursor = conn.cursor()
+        self.rowcount = -1
+
+    def __enter__(self) -> "OfflineCursor":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self._cursor.close()
+
+    def execute(self, query: str, params: tuple = ()) -> None:
+        for table in TABLE_REFERENCE.findall(query):
+            self._db.ensure(table)
+        self._cursor.execute(translate(query), params)
+        self.rowcount = self._cursor.rowcount
+
+    def _row(self, values: tuple) -> dict[str, Any]:
+        return {name: value for (name, *_), value in zip(self._cursor.description, values)}
+
+    def fetchall(self) -> list[dict[str, Any]]:
+        return [self._row(values) for values in self._cursor.fetchall()]
+
+    def fetchone(self) -> dict[str, Any] | None:
+        values = self._cursor.fetchone()
+        return None if values is None else self._row(values)
+
+
+class OfflineConnection:
+    def __init__(self, db: OfflineChartDB, conn: sqlite3.Connection) -> None:
+        self._db = db
+        self._conn = conn
+
+    def __enter__(self) -> "OfflineConnection":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def cursor(self) -> OfflineCursor:
+        return OfflineCursor(self._db, self._conn)
+
+    def commit(self) -> None:
+        self._conn.commit()
+
+    def rollback(self) -> None:
+        self._conn.rollback()
+
+    def close(self) -> None:
+        self._conn.close()
@@ -0,0 +1,110 @@
+"""Pre-aggregated QuickStats rollups computed during the ingest scan.
+
+Every kept row is folded into one accumulator per grouping (for example
+state x year x commodity x statistic) holding the row count and the
+count/sum/min/max of its numeric values. The accumulators are plain lists,
+so per-checkpoint cubes from worker processes serialise to JSON and merge
+cheaply before the rollup CSVs are written. A grouping with an aggregation
+level only takes rows at that level, so county rows never add onto the state
+totals that already include them.
+"""
+from __future__ import annotations
+
+import csv
+import pathlib
+from typing import Dict, List, Optional, Sequence, Tuple
+
+GROUPINGS: Dict[str, Tuple[str, ...]] = {
+    "state_year": ("state_alpha", "year", "commodity", "statistic"),
+    "county_year": ("state_alpha", "county_name", "year"),
+}
+# grouping -> AGG_LEVEL_DESC its rows must have (read from the record's agg_level field).
+GROUPING_LEVELS: Dict[str, str] = {"state_year": "STATE", "county_year": "COUNTY"}
+MEASURE_FIELDS = ["row_count", "value_count", "value_sum", "value_min", "value_max"]
+
+# Accumulator layout: [row_count, value_count, value_sum, value_min, value_max]
+Accumulator = List
+
+
+def output_name(grouping: str) -> str:
+    return f"quickstats_rollup_{grouping}.csv"
+
+
+class RollupCube:
+    def __init__(
+        self,
+        fields: Sequence[str],
+        groupings: Optional[Dict[str, Tuple[str, ...]]] = None,
+        levels: Optional[Dict[str, str]] = None,
+    ) -> None:
+        self.groupings = dict(groupings or GROUPINGS)
+        positions = {name: pos for pos, name in enumerate(fields)}
+        self._keys = {
+            name: [positions[dim] for dim in dims] for name, dims in self.groupings.items()
+        }
+        levels = GROUPING_LEVELS if levels is None else levels
+        self._levels = {
+            name: (positions["agg_level"], level.upper())
+            for name, level in levels.items()
+            if name in self.groupings and "agg_level" in positions
+        }
+        self.cells: Dict[str, Dict[Tuple[str, ...], Accumulator]] = {name: {} for name in self.groupings}
+
+    def add(self, record: Sequence[str], value: Optional[float]) -> None:
+        for name, positions in self._keys.items():
+            level = self._levels.get(name)
+            if level is not None and record[level[0]].upper() != level[1]:
+                continue
+            key = tuple(record[pos] for pos in positions)
+            cell = self.cells[name].get(key)
+            if cell is None:
+                cell = self.cells[name][key] = [0, 0, 0.0, None, None]
+            cell[0] += 1
+            if value is None:
+                continue
+            cell[1] += 1
+            cell[2] += value
+            if cell[3] is None or value < cell[3]:
+                cell[3] = value
+            if cell[4] is None or value > cell[4]:
+                cell[4] = value
+
+    def to_state(self) -> Dict[str, List]:
+        return {name: [[list(key), *cell] for key, cell in cells.items()] for name, cells in self.cells.items()}
+
+    def merge_state(self, state: Dict[str, List]) -> None:
+        for name, entries in state.items():
+            cells = self.cells.setdefault(name, {})
+            for key, rows, count, total, low, high in entries:
+                cell = cells.get(tuple(key))
+                if cell is None:
+                    cells[tuple(key)] = [rows, count, total, low, high]
+                    continue
+                cell[0] += rows
+                cell[1] += count
+                cell[2] += total
+                if low is not None and (cell[3] is None or low < cell[3]):
+                    cell[3] = low
+                if high is not None and (cell[4] is None or high > cell[4]):
+                    cell[4] = high
+
+    def write(self, root: pathlib.Path) -> List[pathlib.Path]:
+        paths = []
+        for name, dims in self.groupings.items():
+            path = root / output_name(name)
+            with path.open("w", encoding="utf-8", newline="") as fh:
+                writer = csv.writer(fh)
+                writer.writerow([*dims, *MEASURE_FIELDS])
+                for key, (rows, count, total, low, high) in sorted(self.cells[name].items()):
+                    writer.writerow(
+                        [
+                            *key,
+                            rows,
+                            count,
+                            round(total, 3) if count else "",
+                            "" if low is None else round(low, 3),
+                            "" if high is None else round(high, 3),
+                        ]
+                    )
+            paths.append(path)
+        return paths
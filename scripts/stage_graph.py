@@ -0,0 +1,165 @@
+"""Small dependency-aware runner for the static chart-data build stages.
+
+Each stage names the stages it depends on. A stage starts as soon as all
+of its dependencies have finished, so independent stages run concurrently
+on a thread pool. Stages can be filtered with ``only``/``skip`` (filtered
+stages are treated as satisfied, their existing outputs are used) or
+declared up to date by the caller's ``is_fresh`` check. After the run the
+critical path, the chain of dependent stages that bounds wall-clock time,
+is reported next to the measured total.
+"""
+from __future__ import annotations
+
+import concurrent.futures
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+RAN = "ran"
+UP_TO_DATE = "up-to-date"
+EXCLUDED = "excluded"
+FAILED = "failed"
+BLOCKED = "blocked"
+
+
+class Stage:
+    def __init__(self, name: str, run: Callable[[], None], deps: Sequence[str] = ()) -> None:
+        self.name = name
+        self.run = run
+        self.deps = tuple(deps)
+
+
+class StageResult:
+    def __init__(self, name: str, status: str, started: float = 0.0, finished: float = 0.0) -> None:
+        self.name = name
+        self.status = status
+        self.started = started
+        self.finished = finished
+        self.error: Optional[BaseException] = None
+
+    @property
+    def elapsed(self) -> float:
+        return max(0.0, self.finished - self.started)
+
+
+class StageGraph:
+    def __init__(self, stages: Iterable[Stage]) -> None:
+        self.stages: Dict[str, Stage] = {}
+        for stage in stages:
+            if stage.name in self.stages:
+                raise ValueError(f"Duplicate stage: {stage.name}")
+            self.stages[stage.name] = stage
+        for stage in self.stages.values():
+            missing = [dep for dep in stage.deps if dep not in self.stages]
+            if missing:
+                raise ValueError(f"Stage {stage.name} depends on unknown stage(s): {', '.join(missing)}")
+        self.order = self._topological_order()
+
+    def _topological_order(self) -> List[str]:
+        order: List[str] = []
+        state: Dict[str, int] = {}
+
+        def visit(name: str, trail: List[str]) -> None:
+            if state.get(name) == 2:
+                return
+            if state.get(name) == 1:
+                raise ValueError(f"Stage cycle: {' -> '.join(trail + [name])}")
+            state[name] = 1
+            for dep in self.stages[name].deps:
+                visit(dep, trail + [name])
+            state[name] = 2
+            order.append(name)
+
+        for name in self.stages:
+            visit(name, [])
+        return order
+
+    def select(self, only: Sequence[str] = (), skip: Sequence[str] = ()) -> List[str]:
+        unknown = [name for name in list(only) + list(skip) if name not in self.stages]
+        if unknown:
+            raise ValueError(f"Unknown stage(s): {', '.join(unknown)}; expected one of {', '.join(self.order)}")
+        selected = [name for name in self.order if not only or name in only]
+        return [name for name in selected if name not in skip]
+
+    def run(
+        self,
+        selected: Sequence[str],
+        workers: int = 4,
+        is_fresh: Optional[Callable[[str], bool]] = None,
+    ) -> Dict[str, StageResult]:
+        """Run the selected stages; raises the first stage error after all others settle."""
+        origin = time.perf_counter()
+        results: Dict[str, StageResult] = {
+            name: StageResult(name, EXCLUDED) for name in self.order if name not in selected
+        }
+        pending = [name for name in self.order if name in selected]
+
+        def execute(name: str) -> StageResult:
+            started = time.perf_counter() - origin
+            if is_fresh is not None and is_fresh(name):
+                return StageResult(name, UP_TO_DATE, started, started)
+            result = StageResult(name, RAN, started)
+            try:
+                self.stages[name].run()
+            except BaseException as exc:  # SystemExit from die() must reach the caller too
+                result.status = FAILED
+                result.error = exc
+            result.finished = time.perf_counter() - origin
+            return result
+
+        running: Dict[concurrent.futures.Future, str] = {}
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            while pending or running:
+                for name in list(pending):
+                    deps = [results.get(dep) for dep in self.stages[name].deps]
+                    if any(dep is None for dep in deps):
+                        continue
+                    pending.remove(name)
+                    if any(dep.status in (FAILED, BLOCKED) for dep in deps):
+                        results[name] = StageResult(name, BLOCKED)
+                        continue
+                    running[executor.submit(execute, name)] = name
+                if not running:
+                    continue
+                done, _ = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    result = future.result()
+                    results[running.pop(future)] = result
+
+        for name in self.order:
+            error = results[name].error
+            if error is not None:
+                raise error
+        return results
+
+    def critical_path(self, results: Dict[str, StageResult]) -> List[str]:
+        cost: Dict[str, float] = {}
+        via: Dict[str, Optional[str]] = {}
+        for name in self.order:
+            deps = [dep for dep in self.stages[name].deps if dep in cost]
+            best = max(deps, key=lambda dep: cost[dep], default=None)
+            via[name] = best
+            cost[name] = results[name].elapsed + (cost[best] if best else 0.0)
+        if not cost:
+            return []
+        name: Optional[str] = max(cost, key=lambda item: cost[item])
+        path: List[str] = []
+        while name is not None:
+            path.append(name)
+            name = via[name]
+        return path[::-1]
+
+    def summary(self, results: Dict[str, StageResult]) -> List[str]:
+        lines = [
+            f"{name}: {results[name].status}"
+            + (f" in {results[name].elapsed:.1f}s" if results[name].status == RAN else "")
+            for name in self.order
+        ]
+        path = self.critical_path(results)
+        path_seconds = sum(results[name].elapsed for name in path)
+        wall = max((result.finished for result in results.values()), default=0.0)
+        stage_seconds = sum(result.elapsed for result in results.values())
+        lines.append(
+            f"critical path: {' -> '.join(path) or '-'} ({path_seconds:.1f}s); "
+            f"wall clock {wall:.1f}s vs {stage_seconds:.1f}s of stage time"
+        )
+        return lines
@@ -0,0 +1,133 @@
+"""Nearest-neighbour index over station coordinates.
+
+Stations are projected onto the unit sphere and stored in a bucketed
+KD-tree, so straight-line (chord) distance orders neighbours exactly like
+great-circle distance. Queries return ``(distance_km, station)`` pairs and
+accept an optional predicate such as "reports PRCP and TMAX".
+"""
+from __future__ import annotations
+
+import heapq
+import math
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+EARTH_RADIUS_KM = 6371.0
+LEAF_SIZE = 16
+
+Point = Tuple[float, float, float]
+Node = Union[List[int], Tuple[int, float, "Node", "Node"]]
+Predicate = Optional[Callable[[Dict], bool]]
+
+
+def to_unit_vector(lat: float, lon: float) -> Point:
+    phi = math.radians(lat)
+    lam = math.radians(lon)
+    cos_phi = math.cos(phi)
+    return (cos_phi * math.cos(lam), cos_phi * math.sin(lam), math.sin(phi))
+
+
+def chord_to_km(chord: float) -> float:
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, chord / 2))
+
+
+def km_to_chord(distance_km: float) -> float:
+    return 2 * math.sin(min(math.pi, distance_km / EARTH_RADIUS_KM) / 2)
+
+
+class StationIndex:
+    def __init__(self, stations: Sequence[Dict], lat_key: str = "lat", lon_key: str = "lon") -> None:
+        self.stations: List[Dict] = []
+        self.points: List[Point] = []
+        for station in stations:
+            try:
+                lat = float(station[lat_key])
+                lon = float(station[lon_key])
+            except (KeyError, TypeError, ValueError):
+                continue
+            self.stations.append(station)
+            self.points.append(to_unit_vector(lat, lon))
+        self.root: Node = self._build(list(range(len(self.points))))
+
+    def __len__(self) -> int:
+        return len(self.stations)
+
+    def _build(self, indices: List[int]) -> Node:
+        if len(indices) <= LEAF_SIZE:
+            return indices
+        points = self.points
+        spreads = []
+        for axis in range(3):
+            values = [points[i][axis] for i in indices]
+            spreads.append(max(values) - min(values))
+        axis = spreads.index(max(spreads))
+        indices.sort(key=lambda i: points[i][axis])
+        mid = len(indices) // 2
+        split = points[indices[mid]][axis]
+        return (axis, split, self._build(indices[:mid]), self._build(indices[mid:]))
+
+    def nearest(
+        self,
+        lat: float,
+        lon: float,
+        k: int = 1,
+        max_km: Optional[float] = None,
+        predicate: Predicate = None,
+    ) -> List[Tuple[float, Dict]]:
+        query = to_unit_vector(lat, lon)
+        bound = km_to_chord(max_km) ** 2 if max_km is not None else math.inf
+        # Max-heap of (-squared chord, index) holding the best k so far.
+        heap: List[Tuple[float, int]] = []
+        # Stack entries carry a lower bound on the squared chord to anything in the subtree.
+        stack: List[Tuple[Node, float]] = [(self.root, 0.0)]
+        while stack:
+            node, floor = stack.pop()
+            limit = -heap[0][0] if len(heap) >= k else bound
+            if floor > limit:
+                continue
+            if isinstance(node, list):
+                for i in node:
+                    point = self.points[i]
+                    d2 = (point[0] - query[0]) ** 2 + (point[1] - query[1]) ** 2 + (point[2] - query[2]) ** 2
+                    if d2 > limit or (predicate and not predicate(self.stations[i])):
+                        continue
+                    if len(heap) >= k:
+                        heapq.heapreplace(heap, (-d2, i))
+                    else:
+                        heapq.heappush(heap, (-d2, i))
+                    limit = -heap[0][0] if len(heap) >= k else bound
+                continue
+            axis, split, left, right = node
+            diff = query[axis] - split
+            near, far = (left, right) if diff < 0 else (right, left)
+            if diff * diff <= limit:
+                stack.append((far, max(floor, diff * diff)))
+            stack.append((near, floor))
+        return [
+            (chord_to_km(math.sqrt(-neg_d2)), self.stations[i])
+            for neg_d2, i in sorted(heap, key=lambda item: (-item[0], item[1]))
+        ]
+
+    def within(
+        self, lat: float, lon: float, radius_km: float, predicate: Predicate = None
+    ) -> List[Tuple[float, Dict]]:
+        query = to_unit_vector(lat, lon)
+        limit = km_to_chord(radius_km) ** 2
+        found: List[Tuple[float, int]] = []
+        stack: List[Node] = [self.root]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, list):
+                for i in node:
+                    point = self.points[i]
+                    d2 = (point[0] - query[0]) ** 2 + (point[1] - query[1]) ** 2 + (point[2] - query[2]) ** 2
+                    if d2 <= limit and (not predicate or predicate(self.stations[i])):
+                        found.append((d2, i))
+                continue
+            axis, split, left, right = node
+            diff = query[axis] - split
+            if diff < 0 or diff * diff <= limit:
+                stack.append(left)
+            if diff >= 0 or diff * diff <= limit:
+                stack.append(right)
+        found.sort()
+        return [(chord_to_km(math.sqrt(d2)), self.stations[i]) for d2, i in found]
@@ -18,6 +18,9 @@ const rawJson = byRole("slide-raw");
 let slideData = [];
 let chartMap = new Map();
 let currentSlideIndex = 0;
+// deck_id -> { etag, charts } so reloading an unchanged deck is a 304 instead of a full payload.
+const chartCache = new Map();
+let renderedChartKey = "";
 
 const setText = (el, value) => {
     if (el) {
@@ -27,6 +30,39 @@ const setText = (el, value) => {
 
 const isProjector = () => document.body.classList.contains("hmi-projector");
 
+const DAY_MS = 86400000;
+
+// Expands compact data_spec (scripts/generate_simple_charts.py --encoding compact): epoch-day
+// columns become millisecond timestamps and [start, step] axes are rebuilt to the series length.
+const decodeCompactOption = (option) => {
+    const encoding = option?.hmi_encoding;
+    if (!encoding || !Array.isArray(option.dataset)) {
+        return option;
+    }
+    const epochColumns = Array.isArray(encoding.epoch_days) ? encoding.epoch_days : [];
+    const daySteps = encoding.day_steps || {};
+    const dataset = option.dataset.map((entry) => {
+        const source = entry?.source;
+        if (!source || Array.isArray(source) || typeof source !== "object") {
+            return entry;
+        }
+        const length = Math.max(0, ...Object.values(source).map((column) => (Array.isArray(column) ? column.length : 0)));
+        const nextSource = { ...source };
+        epochColumns.forEach((column) => {
+            const range = daySteps[column];
+            if (!Array.isArray(nextSource[column]) && Array.isArray(range)) {
+                nextSource[column] = Array.from({ length }, (_, index) => range[0] + index * range[1]);
+            }
+            if (Array.isArray(nextSource[column])) {
+                nextSource[column] = nextSource[column].map((day) => (day === null ? null : day * DAY_MS));
+            }
+        });
+        return { ...entry, source: nextSource };
+    });
+    const { hmi_encoding: _encoding, ...rest } = option;
+    return { ...rest, dataset };
+};
+
 const sanitizeEChartsOption = (option) => {
     if (!option || typeof option !== "object") {
         return null;
@@ -58,10 +94,19 @@ const parseMediaUrl = (slide) => {
     return typeof candidate === "string" ? candidate : "";
 };
 
+const chartKey = (chartMeta) => (
+    chartMeta?.content_hash ? `${chartMeta.deck_id}:${chartMeta.slide_index}:${chartMeta.content_hash}` : ""
+);
+
 const renderChart = (chartMeta) => {
     if (!stageChart) {
         return;
     }
+    const key = chartKey(chartMeta);
+    if (key && key === renderedChartKey && stageChart.firstChild) {
+        return;
+    }
+    renderedChartKey = "";
     stageChart.innerHTML = "";
     if (!chartMeta || chartMeta.chart_library?.toLowerCase() !== "echarts") {
         return;
@@ -70,7 +115,7 @@ const renderChart = (chartMeta) => {
         setText(slideStatus, "ECharts is not available.");
         return;
     }
-    const option = sanitizeEChartsOption(chartMeta.data_spec);
+    const option = sanitizeEChartsOption(decodeCompactOption(chartMeta.data_spec));
     if (!option) {
         return;
     }
@@ -79,6 +124,7 @@ const renderChart = (chartMeta) => {
     stageChart.appendChild(canvas);
     const instance = window.echarts.init(canvas);
     instance.setOption(option, true);
+    renderedChartKey = key;
 };
 
 const renderSlide = () => {
@@ -148,13 +194,28 @@ const loadCharts = async (deckId) => {
     if (!deckId) {
         return;
     }
+    const cached = chartCache.get(deckId);
     try {
-        const response = await fetch(`${SLIDE_CHARTS_ENDPOINT}?deck_id=${encodeURIComponent(deckId)}`, { cache: "no-store" });
-        if (!response.ok) {
+        const headers = cached?.etag ? { "If-None-Match": cached.etag } : {};
+        const response = await fetch(`${SLIDE_CHARTS_ENDPOINT}?deck_id=${encodeURIComponent(deckId)}`, {
+            cache: "no-store",
+            headers
+        });
+        let charts;
+        if (response.status === 304 && cached) {
+            charts = cached.charts;
+        } else if (response.ok) {
+            const payload = await response.json();
+            charts = Array.isArray(payload.charts) ? payload.charts : [];
+            const etag = response.headers.get("ETag");
+            if (etag) {
+                chartCache.set(deckId, { etag, charts });
+            } else {
+                chartCache.delete(deckId);
+            }
+        } else {
             return;
         }
-        const payload = await response.json();
-        const charts = Array.isArray(payload.charts) ? payload.charts : [];
         charts.forEach((chart) => {
             if (chart && Number.isFinite(Number(chart.slide_index))) {
                 chartMap.set(Number(chart.slide_index), chart);
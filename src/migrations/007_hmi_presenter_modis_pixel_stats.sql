@@ -0,0 +1,10 @@
+-- Per-date MODIS pixel-window statistics (value holds the masked, scaled mean).
+CREATE SCHEMA IF NOT EXISTS hmi_presenter;
+SET search_path TO hmi_presenter, public;
+
+ALTER TABLE hmi_presenter.modis_ndvi_timeseries
+    ADD COLUMN IF NOT EXISTS value_median numeric,
+    ADD COLUMN IF NOT EXISTS value_p10 numeric,
+    ADD COLUMN IF NOT EXISTS value_p90 numeric,
+    ADD COLUMN IF NOT EXISTS valid_fraction numeric,
+    ADD COLUMN IF NOT EXISTS pixel_count integer;
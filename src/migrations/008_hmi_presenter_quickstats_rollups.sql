@@ -0,0 +1,39 @@
+-- Pre-aggregated QuickStats rollups written by the static builder's ingest pass.
+CREATE SCHEMA IF NOT EXISTS hmi_presenter;
+SET search_path TO hmi_presenter, public;
+
+CREATE TABLE IF NOT EXISTS hmi_presenter.quickstats_rollup_state_year (
+    id bigserial PRIMARY KEY,
+    created_at timestamptz NOT NULL DEFAULT now(),
+    state_alpha text,
+    year integer,
+    commodity text,
+    statistic text,
+    row_count integer NOT NULL DEFAULT 0,
+    value_count integer NOT NULL DEFAULT 0,
+    value_sum numeric,
+    value_min numeric,
+    value_max numeric
+);
+
+CREATE INDEX IF NOT EXISTS quickstats_rollup_state_year_year_idx
+    ON hmi_presenter.quickstats_rollup_state_year (year, state_alpha);
+
+CREATE INDEX IF NOT EXISTS quickstats_rollup_state_year_commodity_idx
+    ON hmi_presenter.quickstats_rollup_state_year (commodity, year);
+
+CREATE TABLE IF NOT EXISTS hmi_presenter.quickstats_rollup_county_year (
+    id bigserial PRIMARY KEY,
+    created_at timestamptz NOT NULL DEFAULT now(),
+    state_alpha text,
+    county_name text,
+    year integer,
+    row_count integer NOT NULL DEFAULT 0,
+    value_count integer NOT NULL DEFAULT 0,
+    value_sum numeric,
+    value_min numeric,
+    value_max numeric
+);
+
+CREATE INDEX IF NOT EXISTS quickstats_rollup_county_year_idx
+    ON hmi_presenter.quickstats_rollup_county_year (state_alpha, county_name, year);
@@ -0,0 +1,79 @@
+-- Weekly, monthly and seasonal rollups of the GHCN and NDVI series for long-range charts.
+-- Seasons are meteorological (DJF, MAM, JJA, SON); shifting by one month turns them into quarters.
+-- Refresh after each chart data load: REFRESH MATERIALIZED VIEW hmi_presenter.<view>.
+CREATE SCHEMA IF NOT EXISTS hmi_presenter;
+SET search_path TO hmi_presenter, public;
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS hmi_presenter.ghcn_summary_pyramid AS
+WITH periods AS (
+    SELECT 'weekly'::text AS resolution, station, date_trunc('week', date)::date AS period_start,
+           date, prcp_tenths_mm, tmax_tenths_c, tmin_tenths_c
+    FROM hmi_presenter.ghcn_daily_summary
+    WHERE station IS NOT NULL AND date IS NOT NULL
+    UNION ALL
+    SELECT 'monthly', station, date_trunc('month', date)::date,
+           date, prcp_tenths_mm, tmax_tenths_c, tmin_tenths_c
+    FROM hmi_presenter.ghcn_daily_summary
+    WHERE station IS NOT NULL AND date IS NOT NULL
+    UNION ALL
+    SELECT 'seasonal', station, (date_trunc('quarter', date + INTERVAL '1 month') - INTERVAL '1 month')::date,
+           date, prcp_tenths_mm, tmax_tenths_c, tmin_tenths_c
+    FROM hmi_presenter.ghcn_daily_summary
+    WHERE station IS NOT NULL AND date IS NOT NULL
+)
+SELECT
+    resolution,
+    station,
+    period_start,
+    max(date) AS period_end,
+    count(*) AS day_count,
+    sum(prcp_tenths_mm) AS prcp_tenths_mm,
+    avg(tmax_tenths_c) AS tmax_tenths_c,
+    min(tmax_tenths_c) AS tmax_min_tenths_c,
+    max(tmax_tenths_c) AS tmax_max_tenths_c,
+    avg(tmin_tenths_c) AS tmin_tenths_c,
+    min(tmin_tenths_c) AS tmin_min_tenths_c,
+    max(tmin_tenths_c) AS tmin_max_tenths_c
+FROM periods
+GROUP BY resolution, station, period_start
+WITH NO DATA;
+
+CREATE UNIQUE INDEX IF NOT EXISTS ghcn_summary_pyramid_key_idx
+    ON hmi_presenter.ghcn_summary_pyramid (resolution, station, period_start);
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS hmi_presenter.modis_ndvi_pyramid AS
+WITH observations AS (
+    SELECT site_id, date::date AS obs_date, value
+    FROM hmi_presenter.modis_ndvi_timeseries
+    WHERE site_id IS NOT NULL AND value IS NOT NULL
+      AND date ~ '^[0-9]{4}-[0-9]{2}-[0-9]{2}$'
+),
+periods AS (
+    SELECT 'weekly'::text AS resolution, site_id, date_trunc('week', obs_date)::date AS period_start, obs_date, value
+    FROM observations
+    UNION ALL
+    SELECT 'monthly', site_id, date_trunc('month', obs_date)::date, obs_date, value
+    FROM observations
+    UNION ALL
+    SELECT 'seasonal', site_id, (date_trunc('quarter', obs_date + INTERVAL '1 month') - INTERVAL '1 month')::date,
+           obs_date, value
+    FROM observations
+)
+SELECT
+    resolution,
+    site_id,
+    period_start,
+    max(obs_date) AS period_end,
+    count(*) AS observation_count,
+    percentile_cont(0.5) WITHIN GROUP (ORDER BY value) AS value,
+    min(value) AS value_min,
+    max(value) AS value_max
+FROM periods
+GROUP BY resolution, site_id, period_start
+WITH NO DATA;
+
+CREATE UNIQUE INDEX IF NOT EXISTS modis_ndvi_pyramid_key_idx
+    ON hmi_presenter.modis_ndvi_pyramid (resolution, site_id, period_start);
+
+REFRESH MATERIALIZED VIEW hmi_presenter.ghcn_summary_pyramid;
+REFRESH MATERIALIZED VIEW hmi_presenter.modis_ndvi_pyramid;
@@ -0,0 +1,22 @@
+-- Content hash per chart row so unchanged charts are not rewritten and the API can answer with ETag/304.
+-- content_hash is the sha256 of the canonical JSON payload written by scripts/generate_simple_charts.py.
+-- Writers that do not compute it (e.g. POST /api/slide-charts) should store NULL so the next run rewrites the row.
+CREATE SCHEMA IF NOT EXISTS hmi_presenter;
+SET search_path TO hmi_presenter, public;
+
+ALTER TABLE hmi_presenter.slide_chart_metadata
+    ADD COLUMN IF NOT EXISTS content_hash text;
+
+-- One version per deck for GET /api/slide-charts: ETag "<deck_hash>", 304 when If-None-Match matches.
+-- Rows without a hash fall back to updated_at so hand-written charts still change the deck version.
+CREATE OR REPLACE VIEW hmi_presenter.slide_chart_deck_versions AS
+SELECT
+    deck_id,
+    count(*) AS chart_count,
+    max(updated_at) AS updated_at,
+    md5(string_agg(
+        slide_index::text || ':' || coalesce(content_hash, 'ts:' || updated_at::text),
+        ',' ORDER BY slide_index
+    )) AS deck_hash
+FROM hmi_presenter.slide_chart_metadata
+GROUP BY deck_id;
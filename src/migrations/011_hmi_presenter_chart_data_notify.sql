@@ -0,0 +1,67 @@
+-- NOTIFY hmi_chart_data whenever chart source rows change, for scripts/chart_regen_daemon.py.
+-- Statement-level triggers read the transition table once, so a COPY load of a million rows sends
+-- one notification listing the distinct stations/sites/states it touched (delivered at commit).
+-- Payload: {"table": ..., "op": ..., "keys": [...]}; "keys" is null when there are too many to list,
+-- meaning "everything in this table may have changed". The loader's TRUNCATE is followed by an
+-- INSERT in the same transaction, so it needs no trigger of its own.
+CREATE SCHEMA IF NOT EXISTS hmi_presenter;
+SET search_path TO hmi_presenter, public;
+
+CREATE OR REPLACE FUNCTION hmi_presenter.notify_chart_data_change()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    key_column text := TG_ARGV[0];
+    keys text[];
+BEGIN
+    EXECUTE format('SELECT array_agg(DISTINCT %I::text) FROM changed_rows', key_column) INTO keys;
+    IF keys IS NULL THEN
+        RETURN NULL;
+    END IF;
+    -- NOTIFY payloads are capped at 8000 bytes.
+    IF octet_length(array_to_string(keys, ',')) > 7000 THEN
+        keys := NULL;
+    END IF;
+    PERFORM pg_notify(
+        'hmi_chart_data',
+        json_build_object('table', TG_TABLE_NAME, 'op', TG_OP, 'keys', keys)::text
+    );
+    RETURN NULL;
+END;
+$$;
+
+DO $$
+DECLARE
+    source record;
+BEGIN
+    FOR source IN
+        SELECT * FROM (VALUES
+            ('ghcn_daily_summary', 'station'),
+            ('modis_ndvi_timeseries', 'site_id'),
+            ('quickstats_irrigation_state_summary', 'state_alpha'),
+            ('quickstats_rollup_state_year', 'state_alpha')
+        ) AS t(table_name, key_column)
+    LOOP
+        -- Transition tables need one trigger per event.
+        EXECUTE format('DROP TRIGGER IF EXISTS %I ON hmi_presenter.%I', source.table_name || '_notify_insert', source.table_name);
+        EXECUTE format(
+            'CREATE TRIGGER %I AFTER INSERT ON hmi_presenter.%I REFERENCING NEW TABLE AS changed_rows '
+            'FOR EACH STATEMENT EXECUTE FUNCTION hmi_presenter.notify_chart_data_change(%L)',
+            source.table_name || '_notify_insert', source.table_name, source.key_column
+        );
+        EXECUTE format('DROP TRIGGER IF EXISTS %I ON hmi_presenter.%I', source.table_name || '_notify_update', source.table_name);
+        EXECUTE format(
+            'CREATE TRIGGER %I AFTER UPDATE ON hmi_presenter.%I REFERENCING NEW TABLE AS changed_rows '
+            'FOR EACH STATEMENT EXECUTE FUNCTION hmi_presenter.notify_chart_data_change(%L)',
+            source.table_name || '_notify_update', source.table_name, source.key_column
+        );
+        EXECUTE format('DROP TRIGGER IF EXISTS %I ON hmi_presenter.%I', source.table_name || '_notify_delete', source.table_name);
+        EXECUTE format(
+            'CREATE TRIGGER %I AFTER DELETE ON hmi_presenter.%I REFERENCING OLD TABLE AS changed_rows '
+            'FOR EACH STATEMENT EXECUTE FUNCTION hmi_presenter.notify_chart_data_change(%L)',
+            source.table_name || '_notify_delete', source.table_name, source.key_column
+        );
+    END LOOP;
+END;
+$$;
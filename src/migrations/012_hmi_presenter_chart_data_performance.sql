@@ -0,0 +1,170 @@
+-- Access paths for the chart queries (scripts/generate_simple_charts.py):
+--   * (station, date) and (site_id, obs_date) covering indexes so series reads are index-only,
+--   * a typed MODIS obs_date (generated from the text date) so ranges and ORDER BY use date order,
+--   * BRIN indexes on the append-ordered date columns in place of the single-column b-trees,
+--   * ghcn_daily_summary range-partitioned by year so date filters prune whole years.
+-- Check the plans with scripts/explain_chart_queries.py.
+CREATE SCHEMA IF NOT EXISTS hmi_presenter;
+SET search_path TO hmi_presenter, public;
+
+-- MODIS: typed date. make_date keeps the expression immutable (text::date depends on DateStyle).
+-- Malformed or impossible dates (2023-02-30, year 0000) become NULL instead of failing the ALTER:
+-- CASE checks its branches in order, so make_date only sees a valid month, and a day past the
+-- end of its month shows up as a different month once added to the 1st.
+ALTER TABLE hmi_presenter.modis_ndvi_timeseries
+    ADD COLUMN IF NOT EXISTS obs_date date GENERATED ALWAYS AS (
+        CASE
+            WHEN date !~ '^[0-9]{4}-(0[1-9]|1[0-2])-(0[1-9]|[12][0-9]|3[01])$' OR substr(date, 1, 4) = '0000'
+                THEN NULL
+            WHEN extract(month FROM make_date(substr(date, 1, 4)::integer, substr(date, 6, 2)::integer, 1)
+                    + (substr(date, 9, 2)::integer - 1)) = substr(date, 6, 2)::integer
+                THEN make_date(substr(date, 1, 4)::integer, substr(date, 6, 2)::integer, substr(date, 9, 2)::integer)
+        END
+    ) STORED;
+
+DROP INDEX IF EXISTS hmi_presenter.modis_ndvi_timeseries_site_idx;
+DROP INDEX IF EXISTS hmi_presenter.modis_ndvi_timeseries_date_idx;
+
+CREATE INDEX IF NOT EXISTS modis_ndvi_timeseries_site_date_idx
+    ON hmi_presenter.modis_ndvi_timeseries (site_id, obs_date) INCLUDE (date, value);
+
+CREATE INDEX IF NOT EXISTS modis_ndvi_timeseries_obs_date_brin
+    ON hmi_presenter.modis_ndvi_timeseries USING brin (obs_date);
+
+-- Yearly GHCN partitions; rows outside every year land in the default partition.
+CREATE OR REPLACE FUNCTION hmi_presenter.ensure_ghcn_partitions(first_year integer, last_year integer)
+RETURNS void
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    FOR year IN first_year..last_year LOOP
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS hmi_presenter.%I PARTITION OF hmi_presenter.ghcn_daily_summary '
+            'FOR VALUES FROM (%L) TO (%L)',
+            'ghcn_daily_summary_' || year, make_date(year, 1, 1), make_date(year + 1, 1, 1)
+        );
+    END LOOP;
+END;
+$$;
+
+DO $$
+DECLARE
+    first_year integer;
+    last_year integer;
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM pg_partitioned_table
+        WHERE partrelid = 'hmi_presenter.ghcn_daily_summary'::regclass
+    ) THEN
+        RETURN;
+    END IF;
+
+    -- The pyramid and the change triggers hang off the old table; both are recreated below.
+    DROP MATERIALIZED VIEW IF EXISTS hmi_presenter.ghcn_summary_pyramid;
+    ALTER SEQUENCE hmi_presenter.ghcn_daily_summary_id_seq OWNED BY NONE;
+    ALTER TABLE hmi_presenter.ghcn_daily_summary RENAME TO ghcn_daily_summary_unpartitioned;
+    ALTER INDEX IF EXISTS hmi_presenter.ghcn_daily_summary_pkey RENAME TO ghcn_daily_summary_unpartitioned_pkey;
+    DROP INDEX IF EXISTS hmi_presenter.ghcn_daily_summary_station_idx;
+    DROP INDEX IF EXISTS hmi_presenter.ghcn_daily_summary_date_idx;
+
+    CREATE TABLE hmi_presenter.ghcn_daily_summary (
+        id bigint NOT NULL DEFAULT nextval('hmi_presenter.ghcn_daily_summary_id_seq'),
+        created_at timestamptz NOT NULL DEFAULT now(),
+        station text,
+        state text,
+        date date NOT NULL,
+        prcp_tenths_mm numeric,
+        tmax_tenths_c numeric,
+        tmin_tenths_c numeric,
+        PRIMARY KEY (id, date)
+    ) PARTITION BY RANGE (date);
+    ALTER SEQUENCE hmi_presenter.ghcn_daily_summary_id_seq OWNED BY hmi_presenter.ghcn_daily_summary.id;
+    CREATE TABLE hmi_presenter.ghcn_daily_summary_default
+        PARTITION OF hmi_presenter.ghcn_daily_summary DEFAULT;
+
+    SELECT coalesce(min(extract(year FROM date))::integer, extract(year FROM CURRENT_DATE)::integer),
+           greatest(coalesce(max(extract(year FROM date))::integer, 0), extract(year FROM CURRENT_DATE)::integer + 1)
+    INTO first_year, last_year
+    FROM hmi_presenter.ghcn_daily_summary_unpartitioned;
+    PERFORM hmi_presenter.ensure_ghcn_partitions(first_year, last_year);
+
+    -- Rows without a date could never match a chart query and cannot be routed to a partition.
+    INSERT INTO hmi_presenter.ghcn_daily_summary
+        (id, created_at, station, state, date, prcp_tenths_mm, tmax_tenths_c, tmin_tenths_c)
+    SELECT id, created_at, station, state, date, prcp_tenths_mm, tmax_tenths_c, tmin_tenths_c
+    FROM hmi_presenter.ghcn_daily_summary_unpartitioned
+    WHERE date IS NOT NULL;
+    DROP TABLE hmi_presenter.ghcn_daily_summary_unpartitioned;
+END;
+$$;
+
+CREATE INDEX IF NOT EXISTS ghcn_daily_summary_station_date_idx
+    ON hmi_presenter.ghcn_daily_summary (station, date) INCLUDE (prcp_tenths_mm, tmax_tenths_c, tmin_tenths_c);
+
+CREATE INDEX IF NOT EXISTS ghcn_daily_summary_date_brin
+    ON hmi_presenter.ghcn_daily_summary USING brin (date);
+
+-- Migration 011 change notifications, now on the partitioned table (they fire for every partition).
+DROP TRIGGER IF EXISTS ghcn_daily_summary_notify_insert ON hmi_presenter.ghcn_daily_summary;
+CREATE TRIGGER ghcn_daily_summary_notify_insert
+    AFTER INSERT ON hmi_presenter.ghcn_daily_summary REFERENCING NEW TABLE AS changed_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION hmi_presenter.notify_chart_data_change('station');
+DROP TRIGGER IF EXISTS ghcn_daily_summary_notify_update ON hmi_presenter.ghcn_daily_summary;
+CREATE TRIGGER ghcn_daily_summary_notify_update
+    AFTER UPDATE ON hmi_presenter.ghcn_daily_summary REFERENCING NEW TABLE AS changed_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION hmi_presenter.notify_chart_data_change('station');
+DROP TRIGGER IF EXISTS ghcn_daily_summary_notify_delete ON hmi_presenter.ghcn_daily_summary;
+CREATE TRIGGER ghcn_daily_summary_notify_delete
+    AFTER DELETE ON hmi_presenter.ghcn_daily_summary REFERENCING OLD TABLE AS changed_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION hmi_presenter.notify_chart_data_change('station');
+
+-- Migration 009 pyramid, recreated over the partitioned table.
+CREATE MATERIALIZED VIEW IF NOT EXISTS hmi_presenter.ghcn_summary_pyramid AS
+WITH periods AS (
+    SELECT 'weekly'::text AS resolution, station, date_trunc('week', date)::date AS period_start,
+           date, prcp_tenths_mm, tmax_tenths_c, tmin_tenths_c
+    FROM hmi_presenter.ghcn_daily_summary
+    WHERE station IS NOT NULL AND date IS NOT NULL
+    UNION ALL
+    SELECT 'monthly', station, date_trunc('month', date)::date,
+           date, prcp_tenths_mm, tmax_tenths_c, tmin_tenths_c
+    FROM hmi_presenter.ghcn_daily_summary
+    WHERE station IS NOT NULL AND date IS NOT NULL
+    UNION ALL
+    SELECT 'seasonal', station, (date_trunc('quarter', date + INTERVAL '1 month') - INTERVAL '1 month')::date,
+           date, prcp_tenths_mm, tmax_tenths_c, tmin_tenths_c
+    FROM hmi_presenter.ghcn_daily_summary
+    WHERE station IS NOT NULL AND date IS NOT NULL
+)
+SELECT
+    resolution,
+    station,
+    period_start,
+    max(date) AS period_end,
+    count(*) AS day_count,
+    sum(prcp_tenths_mm) AS prcp_tenths_mm,
+    avg(tmax_tenths_c) AS tmax_tenths_c,
+    min(tmax_tenths_c) AS tmax_min_tenths_c,
+    max(tmax_tenths_c) AS tmax_max_tenths_c,
+    avg(tmin_tenths_c) AS tmin_tenths_c,
+    min(tmin_tenths_c) AS tmin_min_tenths_c,
+    max(tmin_tenths_c) AS tmin_max_tenths_c
+FROM periods
+GROUP BY resolution, station, period_start
+WITH NO DATA;
+
+CREATE UNIQUE INDEX IF NOT EXISTS ghcn_summary_pyramid_key_idx
+    ON hmi_presenter.ghcn_summary_pyramid (resolution, station, period_start);
+
+-- Pyramid reads filter on period_end; cover it so the chart query stays index-only.
+CREATE INDEX IF NOT EXISTS ghcn_summary_pyramid_series_idx
+    ON hmi_presenter.ghcn_summary_pyramid (resolution, station, period_end)
+    INCLUDE (period_start, prcp_tenths_mm, tmax_tenths_c, tmin_tenths_c);
+
+CREATE INDEX IF NOT EXISTS modis_ndvi_pyramid_series_idx
+    ON hmi_presenter.modis_ndvi_pyramid (resolution, site_id, period_end)
+    INCLUDE (period_start, value);
+
+REFRESH MATERIALIZED VIEW hmi_presenter.ghcn_summary_pyramid;
+ANALYZE hmi_presenter.ghcn_daily_summary;
+ANALYZE hmi_presenter.modis_ndvi_timeseries;
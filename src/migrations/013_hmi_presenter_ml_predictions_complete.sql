@@ -0,0 +1,17 @@
+-- Completion flag for streamed predictions (scripts/log_ml_improvement.py).
+-- The loader commits one binary COPY per --batch-size rows, so a crash between batches leaves a
+-- prefix of the run's predictions committed. It sets predictions_complete = false with the run row
+-- and back to true in the transaction of the last batch; readers go through
+-- ml_predictions_complete (or filter on the flag) so partial loads are never shown.
+-- Existing runs default to complete.
+CREATE SCHEMA IF NOT EXISTS hmi_presenter;
+SET search_path TO hmi_presenter, public;
+
+ALTER TABLE hmi_presenter.ml_improvement_runs
+    ADD COLUMN IF NOT EXISTS predictions_complete boolean NOT NULL DEFAULT true;
+
+CREATE OR REPLACE VIEW hmi_presenter.ml_predictions_complete AS
+SELECT predictions.*
+FROM hmi_presenter.ml_predictions AS predictions
+JOIN hmi_presenter.ml_improvement_runs AS runs ON runs.run_id = predictions.run_id
+WHERE runs.predictions_complete;
@@ -0,0 +1,7 @@
+"""Make the stdlib-only builder modules in scripts/ importable from the tests."""
+import pathlib
+import sys
+
+SCRIPTS_DIR = pathlib.Path(__file__).resolve().parents[1] / "scripts"
+if str(SCRIPTS_DIR) not in sys.path:
+    sys.path.insert(0, str(SCRIPTS_DIR))
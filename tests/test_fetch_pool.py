@@ -0,0 +1,67 @@
+"""FetchPool counters, global and per scope, against a local http.server."""
+from __future__ import annotations
+
+import http.server
+import threading
+
+import pytest
+
+from fetch_pool import FetchPool
+
+BODY = b"x" * 1000
+
+
+class Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+
+@pytest.fixture
+def base_url():
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_scopes_count_only_their_own_requests(base_url) -> None:
+    pool = FetchPool(workers=4, retries=0, timeout=5)
+    started = threading.Barrier(2)
+    seen = {}
+
+    def stage(name: str, count: int) -> None:
+        def get(number: int) -> bytes:
+            with pool.request(f"{base_url}/{name}/{number}") as resp:
+                return resp.read()
+
+        with pool.scope():
+            since = pool.snapshot()
+            started.wait()
+            pool.map(get, range(count))
+            seen[name] = pool.snapshot()
+            seen[name + "_since"] = since
+
+    stages = [threading.Thread(target=stage, args=("modis", 3)), threading.Thread(target=stage, args=("ghcn", 5))]
+    for thread in stages:
+        thread.start()
+    for thread in stages:
+        thread.join()
+
+    assert seen["modis_since"]["requests"] == 0
+    assert seen["modis"]["requests"] == 3
+    assert seen["modis"]["bytes"] == 3 * len(BODY)
+    assert seen["ghcn"]["requests"] == 5
+    assert pool.snapshot()["requests"] == 8
+    assert pool.snapshot()["bytes"] == 8 * len(BODY)
+    pool.close()
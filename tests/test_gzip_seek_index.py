@@ -0,0 +1,87 @@
+"""gzip_seek_index checkpoints count csv records, the same rows a sequential scan reads."""
+from __future__ import annotations
+
+import csv
+import gzip
+import io
+import itertools
+import random
+
+import pytest
+
+import gzip_seek_index
+
+HEADER = "state_alpha\tshort_desc\tvalue\n"
+
+
+def write_source(path, rows) -> None:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, delimiter="\t", lineterminator="\n")
+    for row in rows:
+        writer.writerow(row)
+    path.write_bytes(gzip.compress((HEADER + buffer.getvalue()).encode("utf-8")))
+
+
+def sample_rows(count: int) -> list[list[str]]:
+    rng = random.Random(7)
+    notes = ["plain", "multi\nline", 'quoted "inch"', "tab\tinside", '12" pipe', ""]
+    return [[f"S{n % 5}", rng.choice(notes), str(n)] for n in range(count)]
+
+
+def sequential_rows(path, max_rows: int = 0) -> list[list[str]]:
+    with gzip.open(path, "rt", encoding="utf-8", newline="") as fh:
+        reader = csv.reader(fh, delimiter="\t")
+        next(reader)
+        return list(itertools.islice(reader, max_rows or None))
+
+
+def checkpoint_rows(index, checkpoint) -> list[list[str]]:
+    lines = gzip_seek_index.iter_checkpoint_lines(index["chunks_path"], checkpoint)
+    return list(csv.reader(lines, delimiter="\t"))
+
+
+@pytest.mark.parametrize("read_block", [13, 1 << 20])
+@pytest.mark.parametrize("chunk_rows", [1, 7, 64])
+def test_checkpoints_match_sequential_scan(tmp_path, monkeypatch, chunk_rows, read_block) -> None:
+    # Small reads split quoted fields and lines across blocks.
+    monkeypatch.setattr(gzip_seek_index, "READ_BLOCK", read_block)
+    source = tmp_path / "qs.txt.gz"
+    write_source(source, sample_rows(300))
+    index = gzip_seek_index.build_index(source, chunk_rows)
+
+    expected = sequential_rows(source)
+    assert index["row_count"] == len(expected) == 300
+    scanned = []
+    for checkpoint in index["checkpoints"]:
+        rows = checkpoint_rows(index, checkpoint)
+        assert checkpoint["first_row"] == len(scanned)
+        assert len(rows) == checkpoint["rows"] <= chunk_rows
+        scanned.extend(rows)
+    assert scanned == expected
+
+
+def test_capped_index_stops_at_the_checkpoint_holding_max_rows(tmp_path) -> None:
+    source = tmp_path / "qs.txt.gz"
+    write_source(source, sample_rows(300))
+    index = gzip_seek_index.build_index(source, 20, max_rows=45)
+
+    assert index["max_rows"] == 45
+    assert [checkpoint["first_row"] for checkpoint in index["checkpoints"]] == [0, 20, 40]
+    assert gzip_seek_index.load_index(source, 20, max_rows=40) is not None
+    assert gzip_seek_index.load_index(source, 20, max_rows=100) is None
+    assert gzip_seek_index.load_index(source, 20) is None
+
+
+def test_literal_quotes_and_last_row_without_newline(tmp_path) -> None:
+    # A quote inside an unquoted field is plain text to csv.reader and must not open a field.
+    body = 'IA\t"two\nlines"\t1\nNE\t12" pipe\t2\nKS\tlast\t3'
+    source = tmp_path / "qs.txt.gz"
+    source.write_bytes(gzip.compress((HEADER + body).encode("utf-8")))
+    index = gzip_seek_index.build_index(source, 1)
+
+    assert index["row_count"] == 3
+    assert [checkpoint_rows(index, checkpoint) for checkpoint in index["checkpoints"]] == [
+        [["IA", "two\nlines", "1"]],
+        [["NE", '12" pipe', "2"]],
+        [["KS", "last", "3"]],
+    ]
@@ -0,0 +1,183 @@
+"""HttpCache against a local http.server stand-in for the upstream data hosts."""
+from __future__ import annotations
+
+import hashlib
+import http.server
+import json
+import threading
+import time
+
+import pytest
+
+from fetch_pool import FetchPool
+from http_cache import HttpCache
+
+ETAG = '"v1"'
+LAST_MODIFIED = "Sat, 17 Jan 2026 00:00:00 GMT"
+
+
+class Upstream(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self) -> None:
+        super().__init__(("127.0.0.1", 0), Handler)
+        self.bodies: dict[str, bytes] = {}
+        self.requests: list[tuple[str, dict[str, str]]] = []
+        # path -> bytes to send before dropping the connection (once).
+        self.truncate: dict[str, int] = {}
+        self.delay = 0.0
+
+    def url(self, path: str) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}{path}"
+
+
+class Handler(http.server.BaseHTTPRequestHandler):
+    server: Upstream
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        self.server.requests.append((self.path, dict(self.headers)))
+        body = self.server.bodies.get(self.path)
+        if body is None:
+            self.send_error(404)
+            return
+        time.sleep(self.server.delay)
+        if self.headers.get("If-None-Match") == ETAG or self.headers.get("If-Modified-Since") == LAST_MODIFIED:
+            self.send_response(304)
+            self.send_header("ETag", ETAG)
+            self.end_headers()
+            return
+        start = 0
+        range_header = self.headers.get("Range")
+        if range_header and self.headers.get("If-Range") in (ETAG, LAST_MODIFIED):
+            start = int(range_header.removeprefix("bytes=").rstrip("-"))
+            if start >= len(body):
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{len(body)}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{len(body) - 1}/{len(body)}")
+        else:
+            self.send_response(200)
+        payload = body[start:]
+        self.send_header("ETag", ETAG)
+        self.send_header("Last-Modified", LAST_MODIFIED)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        cut = self.server.truncate.pop(self.path, None)
+        self.wfile.write(payload if cut is None else payload[:cut])
+        self.wfile.flush()
+        if cut is not None:
+            self.close_connection = True
+
+
+@pytest.fixture
+def upstream():
+    server = Upstream()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return HttpCache(tmp_path / "cache", client=FetchPool(retries=0, backoff_seconds=0, timeout=5))
+
+
+def test_200_is_stored_content_addressed(upstream, cache):
+    body = b"station,date\nUSW00023062,2026-01-01\n" * 100
+    upstream.bodies["/data.csv"] = body
+
+    path = cache.fetch(upstream.url("/data.csv"))
+
+    assert path.read_bytes() == body
+    assert path.name == hashlib.sha256(body).hexdigest()
+    assert cache.cached_path(upstream.url("/data.csv")) == path
+    assert cache.stats["misses"] == 1
+
+
+def test_revalidation_sends_validators_and_reuses_body_on_304(upstream, cache):
+    upstream.bodies["/data.csv"] = b"a,b\n1,2\n"
+    first = cache.fetch(upstream.url("/data.csv"))
+
+    second = cache.fetch(upstream.url("/data.csv"))
+
+    assert second == first
+    _, headers = upstream.requests[-1]
+    assert headers["If-None-Match"] == ETAG
+    assert headers["If-Modified-Since"] == LAST_MODIFIED
+    assert cache.stats["hits"] == 1
+
+
+def test_max_age_skips_the_request(upstream, cache):
+    upstream.bodies["/dates.json"] = b'{"dates": []}'
+    cache.fetch(upstream.url("/dates.json"))
+
+    cache.fetch(upstream.url("/dates.json"), max_age=3600)
+
+    assert len(upstream.requests) == 1
+
+
+def test_truncated_body_resumes_with_range_and_if_range(upstream, cache):
+    body = bytes(range(256)) * 64
+    upstream.bodies["/big.gz"] = body
+    upstream.truncate["/big.gz"] = 5000
+
+    with pytest.raises(OSError, match="Incomplete download"):
+        cache.fetch(upstream.url("/big.gz"))
+    path = cache.fetch(upstream.url("/big.gz"))
+
+    assert path.read_bytes() == body
+    assert path.name == hashlib.sha256(body).hexdigest()
+    _, headers = upstream.requests[-1]
+    assert headers["Range"] == "bytes=5000-"
+    assert headers["If-Range"] == ETAG
+    assert cache.stats["resumed"] == 1
+
+
+def test_416_discards_the_partial_and_refetches(upstream, cache):
+    body = b"x" * 100
+    upstream.bodies["/big.gz"] = body
+    url = upstream.url("/big.gz")
+    part_path, meta_path = cache._partial_paths(url)
+    part_path.parent.mkdir(parents=True)
+    part_path.write_bytes(b"y" * 500)
+    meta_path.write_text(json.dumps({"etag": ETAG}), encoding="utf-8")
+
+    path = cache.fetch(url, max_age=60)
+
+    assert path.read_bytes() == body
+    assert [headers.get("Range") for _, headers in upstream.requests] == ["bytes=500-", None]
+    assert not part_path.exists()
+
+
+def test_least_recently_used_bodies_are_evicted(upstream, tmp_path):
+    cache = HttpCache(tmp_path / "cache", max_bytes=250, client=FetchPool(retries=0, timeout=5))
+    for name in ("a", "b", "c"):
+        upstream.bodies[f"/{name}"] = name.encode() * 100
+    first = cache.fetch(upstream.url("/a"))
+    cache.fetch(upstream.url("/b"))
+    cache.fetch(upstream.url("/a"))  # revalidated, so /b is now the oldest
+
+    cache.fetch(upstream.url("/c"))
+
+    assert cache.cached_path(upstream.url("/b")) is None
+    assert cache.cached_path(upstream.url("/a")) == first
+    assert cache.cached_path(upstream.url("/c")) is not None
+
+
+def test_concurrent_fetches_of_one_url_share_a_single_download(upstream, cache):
+    body = b"0123456789" * 10000
+    upstream.bodies["/big.gz"] = body
+    upstream.delay = 0.05
+    results = FetchPool(workers=8).map(lambda _: cache.fetch(upstream.url("/big.gz")), range(8))
+
+    assert {path.read_bytes() for path in results} == {body}
+    assert cache.stats["misses"] == 1
+    assert not list((cache.root / "partial").glob("*.part"))